@@ -0,0 +1,23 @@
+"""
+Settings from the environment / .env file.
+
+.env is only read the first time a setting is asked for, so importing a
+module that has settings does not cost anything at startup.
+"""
+import os
+
+_env_loaded = False
+
+
+def load_env():
+    """Read .env into os.environ once"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def getenv(name, default=None):
+    load_env()
+    return os.getenv(name, default)
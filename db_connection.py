@@ -1,115 +1,526 @@
-from dotenv import load_dotenv
 import os
+import threading
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from config import load_env
+from query_cache import QueryCache, tables_read
+from query_stats import TimedCursor, caller_name, submitted_by, query_stats
+
+
+class PoolExhaustedError(Error):
+    """Raised when no pooled connection becomes free within the borrow timeout"""
+
+
+class PooledConnection:
+    """
+    A connection borrowed from the pool.
+    Behaves like a mysql.connector connection, but close() hands it back
+    to the pool instead of tearing down the socket, and its cursors report
+    every statement to query_stats.
+    """
+
+    def __init__(self, pool, raw, created_at, last_used, wait=0.0):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = created_at
+        self.last_used = last_used   # last time a statement succeeded on it (or it was opened / pinged)
+        self.wait = wait   # seconds spent waiting for this connection, charged to its first statement
+        self._released = False
+
+    def mark_used(self):
+        """Record a successful round trip: the connection is known to be alive"""
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._raw.cursor(*args, **kwargs), self)
+
+    def close(self):
+        """Return the connection to the pool"""
+        if not self._released:
+            self._released = True
+            self._pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections shared by every tab.
+
+    Connections run in autocommit mode, so a read holds no transaction (and
+    no snapshot) once it returns and handing the connection back costs
+    nothing. Writers whose statements must land together call
+    conn.start_transaction() first.
+
+    Connections are opened lazily up to `size`, borrowed with acquire() and
+    handed back with release() (or PooledConnection.close()). Connections older
+    than `recycle_seconds` are replaced on borrow.
+
+    Liveness is tracked from the last successful use of each connection rather
+    than checked per query: a background keepalive thread pings idle
+    connections that have not been used for `validate_after` seconds (and
+    drops the ones that fail), so a borrow normally costs no round trip. Only
+    a connection whose last use is older than twice that (the keepalive fell
+    behind, e.g. after the machine slept) is pinged on borrow.
+    """
+
+    def __init__(self, size=5, recycle_seconds=1800, validate_after=60, timeout=10, keepalive=True):
+        self.size = size
+        self.recycle_seconds = recycle_seconds
+        self.validate_after = validate_after
+        self.timeout = timeout
+
+        self._lock = threading.Condition()
+        self._idle = []        # LIFO stack of (raw_connection, created_at, last_used)
+        self._total = 0        # open connections, idle + borrowed
+        self._closed = False
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+        self._keepalive = keepalive and validate_after > 0
+
+        self._stats = {
+            "created": 0,
+            "borrowed": 0,
+            "returned": 0,
+            "recycled": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "pings": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _connect(self):
+        """Open a brand new connection on the configured backend"""
+        if backend_name() == "sqlite":
+            import sqlite_backend
+            conn = sqlite_backend.connect(os.getenv("DB_SQLITE_PATH", "rms.sqlite3"))
+        else:
+            conn = mysql.connector.connect(
+                host=os.getenv("DB_HOST"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+                database=os.getenv("DB_NAME"),
+                port=int(os.getenv("DB_PORT", 3306)),
+                autocommit=True,
+                connect_timeout=30
+            )
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _close_quietly(self, raw):
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def acquire(self, timeout=None, validate=False):
+        """
+        Borrow a connection from the pool.
+        Blocks until one is free, raising PoolExhaustedError after `timeout` seconds.
+        With validate=True a reused connection is pinged first (used when retrying
+        after a connection error).
+        """
+        self._start_keepalive()
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        record = None
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise Error("Connection pool is closed")
+                if self._idle:
+                    record = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available after {timeout}s (pool size {self.size})"
+                    )
+                self._lock.wait(remaining)
+
+        try:
+            raw, created_at, last_used = self._checkout(record, validate)
+        except Exception:
+            with self._lock:
+                self._total -= 1
+                self._lock.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats["borrowed"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+
+        return PooledConnection(self, raw, created_at, last_used, waited)
+
+    def _checkout(self, record, validate=False):
+        """Turn an idle record (or None for a new slot) into a live connection"""
+        now = time.monotonic()
+        if record is None:
+            return self._connect(), now, now
+
+        raw, created_at, last_used = record
+        if now - created_at > self.recycle_seconds:
+            self._close_quietly(raw)
+            with self._lock:
+                self._stats["recycled"] += 1
+            return self._connect(), now, now
+
+        stale_after = self.validate_after * 2 if self._keepalive else self.validate_after
+        if validate or now - last_used > stale_after:
+            if not self._ping(raw):
+                self._close_quietly(raw)
+                with self._lock:
+                    self._stats["recycled"] += 1
+                return self._connect(), now, now
+            last_used = time.monotonic()
+
+        return raw, created_at, last_used
+
+    def _ping(self, raw):
+        with self._lock:
+            self._stats["pings"] += 1
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _start_keepalive(self):
+        if not self._keepalive or self._keepalive_thread is not None:
+            return
+        with self._lock:
+            if self._keepalive_thread is None and not self._closed:
+                self._keepalive_thread = threading.Thread(target=self._keepalive_loop,
+                                                          name="db-keepalive", daemon=True)
+                self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        # Wake often enough that no idle connection goes much past validate_after unchecked
+        interval = max(1.0, self.validate_after / 2)
+        while not self._stop.wait(interval):
+            self.keepalive()
+
+    def keepalive(self):
+        """Ping idle connections not used for validate_after seconds; drop dead or expired ones"""
+        now = time.monotonic()
+        with self._lock:
+            due = [record for record in self._idle
+                   if now - record[2] > self.validate_after or now - record[1] > self.recycle_seconds]
+            # Take them out so nobody borrows a connection while it is being pinged
+            self._idle = [record for record in self._idle if record not in due]
+
+        for raw, created_at, last_used in due:
+            alive = now - created_at <= self.recycle_seconds and self._ping(raw)
+            with self._lock:
+                if alive and not self._closed:
+                    self._idle.insert(0, (raw, created_at, time.monotonic()))
+                    self._lock.notify()
+                    continue
+                self._total -= 1
+                self._stats["recycled"] += 1
+                self._lock.notify()
+            self._close_quietly(raw)
+
+    def release(self, pooled):
+        """Give a borrowed connection back to the pool"""
+        raw = pooled._raw
+        keep = True
+        try:
+            # Never hand the next borrower someone else's open transaction
+            if raw.in_transaction:
+                raw.rollback()
+        except Error:
+            keep = False
+
+        with self._lock:
+            self._stats["returned"] += 1
+            if keep and not self._closed:
+                self._idle.append((raw, pooled.created_at, pooled.last_used))
+            else:
+                self._total -= 1
+                self._stats["discarded"] += 1
+            self._lock.notify()
+
+        if not keep or self._closed:
+            self._close_quietly(raw)
+
+    def discard(self, pooled):
+        """Drop a borrowed connection that is known to be broken"""
+        if pooled._released:
+            return
+        pooled._released = True
+        self._close_quietly(pooled._raw)
+        with self._lock:
+            self._total -= 1
+            self._stats["discarded"] += 1
+            self._lock.notify()
+
+    def close_all(self):
+        """Close every idle connection and refuse new borrows"""
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._lock.notify_all()
+        for raw, _, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+            })
+        borrowed = stats["borrowed"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / borrowed if borrowed else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_config_checked = False
+
+REQUIRED_VARS = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_NAME']
+
+# Client errors meaning the connection itself is gone, not that the statement was wrong
+CONNECTION_ERRNOS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+}
+
+
+def is_connection_error(error):
+    return getattr(error, "errno", None) in CONNECTION_ERRNOS
+
+
+def backend_name():
+    """Database backend selected by DB_BACKEND: mysql (default) or sqlite"""
+    load_env()
+    return os.getenv("DB_BACKEND", "mysql").strip().lower()
+
+
+def load_config():
+    """Load .env and validate the database settings (once)"""
+    global _config_checked
+    if _config_checked:
+        return
+    load_env()
+
+    backend = backend_name()
+    if backend == "sqlite":
+        print(f"✅ Using SQLite database: {os.getenv('DB_SQLITE_PATH', 'rms.sqlite3')}")
+        _config_checked = True
+        return
+    if backend != "mysql":
+        raise ValueError(f"Unknown DB_BACKEND '{backend}' (expected mysql or sqlite)")
+
+    missing_vars = [var for var in REQUIRED_VARS if not os.getenv(var)]
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    print(f"✅ Environment variables loaded: DB_HOST={os.getenv('DB_HOST')}, DB_NAME={os.getenv('DB_NAME')}")
+    _config_checked = True
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            load_config()
+            _pool = ConnectionPool(
+                size=int(os.getenv("DB_POOL_SIZE", 5)),
+                recycle_seconds=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+                validate_after=int(os.getenv("DB_POOL_VALIDATE_AFTER", 60)),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                keepalive=os.getenv("DB_POOL_KEEPALIVE", "1") != "0",
+            )
+        return _pool
 
 
 class DatabaseConnection:
     def __init__(self):
-        """Initialize the database connection manager"""
-        self.connection = None
-        self._load_environment()
-    
+        """
+        Initialize the database connection manager.
+        Nothing is read or opened here: settings are loaded and the pool is
+        created the first time a query needs them.
+        """
+        self.pool = None
+        self._cache = None
+
     def _load_environment(self):
         """Load and validate environment variables"""
-        load_dotenv()
-       
-        required_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_NAME']
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
-        
-        if missing_vars:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-        
-        print(f"✅ Environment variables loaded: DB_HOST={os.getenv('DB_HOST')}, DB_NAME={os.getenv('DB_NAME')}")
-    
+        load_config()
+
     def connect(self):
         """
-        Establish a connection to the MySQL database
+        Make sure the shared connection pool is up and can hand out a connection
         """
         try:
-            self.connection = mysql.connector.connect(
-                host=os.getenv("DB_HOST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("DB_NAME"),
-                port=int(os.getenv("DB_PORT", 3306)),
-                autocommit=True,
-                connect_timeout=30  # Added timeout
-            )
-            
-            if self.connection.is_connected():
-                print("✅ Database connection established successfully")
-                return True
-                
+            self.pool = get_pool()
+            conn = self.pool.acquire()
+            conn.close()
+            print("✅ Database connection pool ready")
+            return True
+
         except Error as e:
             print(f"❌ Database connection error: {e}")
             print(f"❌ Connection details: host={os.getenv('DB_HOST')}, db={os.getenv('DB_NAME')}, user={os.getenv('DB_USER')}")
             return False
-    
+
     def disconnect(self):
-        """Close the database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("🔒 Database connection closed")
-    
-    def execute_query(self, query, params=None):
+        """Close all pooled database connections"""
+        if self.pool:
+            self.pool.close_all()
+            print("🔒 Database connections closed")
+
+    def execute_query(self, query, params=None, changes=(), cache=False, dictionary=True, raise_errors=False):
         """
-        Execute a SQL query and return results
+        Execute a SQL query on a pooled connection and return results.
+        For writes, `changes` is a list of (table_name, row_id) published to
+        the change feed in the same transaction when any row was affected.
+        With cache=True a SELECT is answered from the query cache while the
+        tables it reads are unchanged; every write made here invalidates the
+        cached reads of the table it touches. Rows are dicts unless
+        dictionary=False; errors are printed and None returned unless
+        raise_errors=True.
         """
-        cursor = None
-        try:
-            # Ensure we have a valid connection
-            if not self.connection or not self.connection.is_connected():
-                print("🔄 Reconnecting to database...")
-                if not self.connect():
-                    print("❌ Failed to reconnect to database")
-                    return None
-            
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-            else:
-                self.connection.commit()
-                result = cursor.rowcount
-            
-            return result
-            
-        except Error as e:
-            print(f"❌ Query execution error: {e}")
-            print(f"❌ Failed query: {query}")
-            if params:
-                print(f"❌ Query parameters: {params}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-    
+        is_select = query.strip().upper().startswith('SELECT')
+        if cache and is_select:
+            key = (QueryCache.key(query, params), dictionary)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            tables = tables_read(query)
+            snapshot = self.cache.snapshot(tables)
+
+        # Reads are idempotent: if the connection turns out to be dead, retry once on a checked one
+        for attempt in (1, 2):
+            conn = None
+            cursor = None
+            try:
+                if changes:
+                    change_feed.ensure_table()
+                conn = get_pool().acquire(validate=attempt > 1)
+                if changes and not is_select:
+                    conn.start_transaction()  # the write and its change feed events land together
+                cursor = conn.cursor(dictionary=dictionary)
+                cursor.execute(query, params or ())
+
+                if is_select:
+                    result = cursor.fetchall()
+                    if cache:
+                        self.cache.put(key, tables, result, snapshot)
+                else:
+                    result = cursor.rowcount
+                    if result:
+                        for table_name, row_id in changes:
+                            record_change(cursor, table_name, row_id)
+                    conn.commit()
+                    self.cache.invalidate(query)
+
+                return result
+
+            except Error as e:
+                if conn is not None and is_connection_error(e):
+                    get_pool().discard(conn)
+                    if is_select and attempt == 1:
+                        print(f"🔄 Database connection lost ({e}), retrying on a fresh connection")
+                        continue
+                if raise_errors:
+                    raise
+                print(f"❌ Query execution error: {e}")
+                print(f"❌ Failed query: {query}")
+                if params:
+                    print(f"❌ Query parameters: {params}")
+                return None
+            finally:
+                if cursor:
+                    try:
+                        cursor.close()
+                    except Error:
+                        pass
+                if conn:
+                    conn.close()
+
+    @property
+    def cache(self):
+        """Process-wide read-through cache for execute_query(cache=True)"""
+        with _pool_lock:
+            if self._cache is None:
+                load_env()
+                self._cache = QueryCache(
+                    ttl=float(os.getenv("QUERY_CACHE_TTL", 30)),
+                    max_entries=int(os.getenv("QUERY_CACHE_ENTRIES", 256)),
+                    max_rows=int(os.getenv("QUERY_CACHE_ROWS", 20000)),
+                )
+            return self._cache
+
+    def cache_stats(self):
+        """Hit/miss/invalidation counters for the query cache"""
+        return self.cache.stats()
+
+    def pool_stats(self):
+        """Usage counters for the shared connection pool"""
+        return get_pool().stats()
+
+    def query_report(self, limit=20):
+        """p50/p95/p99 latency per query fingerprint for this session"""
+        return query_stats().report(limit)
+
     def get_database_info(self):
         """
         Get comprehensive database information
         """
         try:
-            cursor = self.connection.cursor()
-            
-            cursor.execute("SELECT VERSION()")
-            version = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT DATABASE()")
-            db_name = cursor.fetchone()[0]
-            
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-            
-            cursor.close()
-            
+            with get_pool().acquire() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("SELECT VERSION()")
+                version = cursor.fetchone()[0]
+
+                cursor.execute("SELECT DATABASE()")
+                db_name = cursor.fetchone()[0]
+
+                cursor.execute("SHOW TABLES")
+                tables = cursor.fetchall()
+
+                cursor.close()
+
             return {
                 'version': version,
                 'database_name': db_name,
                 'table_count': len(tables)
             }
-            
+
         except Error as e:
             print(f"❌ Error getting database info: {e}")
             return None
@@ -117,35 +528,311 @@ class DatabaseConnection:
     def test_connection(self):
         """Test if connection is alive"""
         try:
-            if self.connection and self.connection.is_connected():
-                cursor = self.connection.cursor()
+            with get_pool().acquire() as conn:
+                cursor = conn.cursor()
                 cursor.execute("SELECT 1")
+                cursor.fetchall()
                 cursor.close()
-                return True
-            return False
+            return True
         except Error:
             return False
 
 
+class QueryExecutor:
+    """
+    Runs database work on background threads so Tk callbacks never block on I/O.
+
+    run() returns a concurrent.futures.Future and, once the work finishes,
+    calls on_success(result) or on_error(exception) on the Tk main loop.
+    Results are picked up by polling the future with widget.after(), so no
+    Tk call is ever made from a worker thread. Callbacks are skipped if the
+    widget was destroyed while the work was running.
+    """
+
+    def __init__(self, max_workers=4, poll_interval=15, thread_name_prefix="db-worker"):
+        # max_workers may be a callable; the thread pool is only built on first submit
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.thread_name_prefix = thread_name_prefix
+        self._workers = None
+        self._workers_lock = threading.Lock()
+
+    def _get_workers(self):
+        with self._workers_lock:
+            if self._workers is None:
+                max_workers = self.max_workers() if callable(self.max_workers) else self.max_workers
+                self._workers = ThreadPoolExecutor(max_workers=max_workers,
+                                                   thread_name_prefix=self.thread_name_prefix)
+            return self._workers
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn on a worker thread and return its Future"""
+        # Queries the work runs are attributed to the code that submitted it
+        fn = submitted_by(caller_name(2))(fn)
+        return self._get_workers().submit(fn, *args, **kwargs)
+
+    def run(self, widget, fn, *args, on_success=None, on_error=None, **kwargs):
+        """Run fn in the background and deliver the outcome through widget.after()"""
+        future = self.submit(fn, *args, **kwargs)
+        self._watch(widget, future, on_success, on_error)
+        return future
+
+    def _watch(self, widget, future, on_success, on_error):
+        def poll():
+            try:
+                if not widget.winfo_exists():
+                    return
+                if not future.done():
+                    widget.after(self.poll_interval, poll)
+                    return
+            except tk.TclError:
+                return  # widget destroyed while waiting
+
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"❌ Background database task failed: {error}")
+            elif on_success:
+                on_success(future.result())
+
+        try:
+            widget.after(self.poll_interval, poll)
+        except tk.TclError:
+            pass
+
+    def shutdown(self, wait=False):
+        """Stop accepting work; pending tasks still finish"""
+        if self._workers is not None:
+            self._workers.shutdown(wait=wait)
+
+
 # Create a global database instance
 db = DatabaseConnection()
 
 
+def _executor_workers():
+    load_env()
+    return int(os.getenv("DB_EXECUTOR_WORKERS", 4))
+
+
+# Shared background executor for every tab's database work
+executor = QueryExecutor(max_workers=_executor_workers)
+
+
+CHANGE_FEED_DDL = """
+    CREATE TABLE IF NOT EXISTS order_events (
+        event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        table_name VARCHAR(32) NOT NULL,
+        row_id INT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+# One row that every event writer locks before inserting, so event_ids commit in id order
+CHANGE_FEED_LOCK_DDL = """
+    CREATE TABLE IF NOT EXISTS order_events_lock (
+        lock_id INT PRIMARY KEY
+    )
+"""
+CHANGE_FEED_LOCK_ROW = """
+    INSERT INTO order_events_lock (lock_id)
+    SELECT COUNT(*) + 1 FROM order_events_lock HAVING COUNT(*) = 0
+"""
+
+
+def record_change(cursor, table_name, row_id):
+    """
+    Publish a changed row to the change feed; call inside the writer's
+    transaction, after its other writes, right before the commit.
+
+    event_id is handed out at INSERT time, not at commit, so two writers
+    could otherwise commit out of id order and a reader that had already
+    moved its mark past the later id would never see the earlier one.
+    Locking the order_events_lock row first makes the next writer wait
+    until this transaction has committed or rolled back.
+    """
+    cursor.execute("SELECT lock_id FROM order_events_lock WHERE lock_id = 1 FOR UPDATE")
+    cursor.fetchall()
+    cursor.execute("INSERT INTO order_events (table_name, row_id) VALUES (%s, %s)", (table_name, row_id))
+
+
+class ChangeFeed:
+    """
+    Lightweight change feed over the order_events table.
+
+    Every write to orders or bill appends (table_name, row_id) to
+    order_events in the same transaction, and writers take turns (see
+    record_change), so events become visible in event_id order. Readers
+    remember the highest event_id they have seen and only ask for what
+    came after it; the
+    polling query is a MAX() on the primary key, shared by every tab of the
+    process for `min_interval` seconds, so idle stations cost MySQL almost
+    nothing.
+    """
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._high_water = 0
+        self._checked_at = None
+
+    def ensure_table(self):
+        """Create order_events and its writer lock if needed (once per process)"""
+        if self._table_ready:
+            return
+        with get_pool().acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(CHANGE_FEED_DDL)
+            cursor.execute(CHANGE_FEED_LOCK_DDL)
+            cursor.execute(CHANGE_FEED_LOCK_ROW)
+            cursor.close()
+            conn.commit()
+        self._table_ready = True
+
+    def current_mark(self):
+        """Latest event_id, read straight from the database; runs on a worker thread"""
+        self.ensure_table()
+        with get_pool().acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(event_id), 0) FROM order_events")
+            mark = cursor.fetchone()[0]
+            cursor.close()
+        with self._lock:
+            self._high_water = max(self._high_water, mark)
+            self._checked_at = time.monotonic()
+        return mark
+
+    def high_water(self):
+        """Latest event_id, re-read at most once every min_interval seconds"""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.min_interval:
+                return self._high_water
+        return self.current_mark()
+
+    @staticmethod
+    def changes_query(mark, tables):
+        """(query, params) reading the events after `mark` for `tables`"""
+        placeholders = ", ".join(["%s"] * len(tables))
+        return (f"SELECT event_id, table_name, row_id FROM order_events "
+                f"WHERE event_id > %s AND table_name IN ({placeholders}) ORDER BY event_id",
+                (mark, *tables))
+
+    def changes_since(self, mark, tables):
+        """
+        Return (new_mark, {table_name: set(row_ids)}) for events after `mark`.
+        Runs on a worker thread.
+        """
+        if self.high_water() <= mark:
+            return mark, {}
+
+        with get_pool().acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(*self.changes_query(mark, tables))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        changes = {}
+        new_mark = max(mark, self._high_water)
+        for event_id, table_name, row_id in rows:
+            changes.setdefault(table_name, set()).add(row_id)
+            new_mark = max(new_mark, event_id)
+        return new_mark, changes
+
+    def subscribe(self, widget, tables, callback, interval_ms=None):
+        """
+        Poll for changes to `tables` on a Tk timer owned by `widget` and call
+        callback(changes) on the main loop when there are any.
+        """
+        if interval_ms is None:
+            load_env()
+            interval_ms = int(os.getenv("CHANGE_FEED_INTERVAL_MS", 3000))
+        return FeedSubscription(self, widget, tuple(tables), callback, interval_ms)
+
+
+class FeedSubscription:
+    """
+    One tab's view of the change feed.
+    Set `mark` after a full load (see ChangeFeed.current_mark) so only later
+    events are delivered; until then polls only establish the baseline.
+    """
+
+    def __init__(self, feed, widget, tables, callback, interval_ms):
+        self.feed = feed
+        self.widget = widget
+        self.tables = tables
+        self.callback = callback
+        self.interval_ms = interval_ms
+        self.mark = None
+        self.paused = False
+        self._in_flight = False
+        self._timer = None
+        self._schedule()
+
+    def _schedule(self):
+        try:
+            self._timer = self.widget.after(self.interval_ms, self._tick)
+        except tk.TclError:
+            self._timer = None  # widget destroyed
+
+    def _tick(self):
+        self._timer = None
+        if not self.paused and not self._in_flight:
+            self._in_flight = True
+            executor.run(self.widget, self._poll, self.mark,
+                         on_success=self._deliver, on_error=self._on_error)
+        self._schedule()
+
+    def _poll(self, mark):
+        """Runs on a worker thread"""
+        if mark is None:
+            return self.feed.current_mark(), {}
+        return self.feed.changes_since(mark, self.tables)
+
+    def _deliver(self, result):
+        self._in_flight = False
+        new_mark, changes = result
+        if self.mark is not None and new_mark < self.mark:
+            return  # a full load moved the mark on while we were polling
+        self.mark = new_mark
+        if changes and not self.paused:
+            self.callback(changes)
+
+    def _on_error(self, error):
+        self._in_flight = False
+        print(f"⚠️ Change feed poll failed: {error}")
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def cancel(self):
+        self.paused = True
+        if self._timer is not None:
+            try:
+                self.widget.after_cancel(self._timer)
+            except tk.TclError:
+                pass
+            self._timer = None
+
+
+# Shared change feed; tabs subscribe to it for auto-refresh
+change_feed = ChangeFeed()
+
+
 def create_connection():
     """
     Legacy function for backward compatibility
-    Creates a direct MySQL connection
+    Borrows a connection from the shared pool; calling close() on it
+    returns it to the pool instead of closing the socket.
     """
-    load_dotenv()
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME"),
-            port=int(os.getenv("DB_PORT", 3306))
-        )
-        print("✅ Direct connection created")
+        conn = get_pool().acquire()
         return conn
     except Error as e:
         print(f"❌ Direct connection error: {e}")
@@ -170,28 +857,30 @@ def initialize_database():
 if __name__ == "__main__":
     print("🔍 Database Connection Test")
     print("=" * 40)
-    
+
     if initialize_database():
         print("\n✅ Database is ready for use!")
-        
+
         # Test some queries
         print("\n🧪 Testing queries...")
-        
+
         # Test SELECT
         result = db.execute_query("SELECT COUNT(*) as count FROM reservation")
         if result:
             print(f"✅ Reservations count: {result[0]['count']}")
-        
+
         # Test INSERT (if needed)
         # result = db.execute_query("INSERT INTO test ...")
-        
+
         # Test connection status
         if db.test_connection():
             print("✅ Connection test passed")
         else:
             print("❌ Connection test failed")
-            
+
+        print(f"📈 Pool stats: {db.pool_stats()}")
+
     else:
         print("\n❌ Database initialization failed!")
-    
-    db.disconnect()
\ No newline at end of file
+
+    db.disconnect()
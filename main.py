@@ -1,9 +1,14 @@
-from ttkbootstrap import Window
-from ui.tabs_frame import Tabsframe
+from ui.startup import startup
 
-class RmsApp(Window):  
+with startup.phase("import"):
+    from ttkbootstrap import Window
+    from ui.tabs_frame import Tabsframe
+    from config import getenv
+
+class RmsApp(Window):
     def __init__(self):
-        super().__init__(themename="flatly")  
+        with startup.phase("window"):
+            super().__init__(themename="flatly")
         self.title("Restaurant Management System")
         self.geometry("1500x800")
         self.resizable(False, False)
@@ -11,7 +16,35 @@ class RmsApp(Window):
         tabs = Tabsframe(self)
         tabs.pack(fill="both", expand=True)
 
+        self._first_paint = self.bind("<Map>", self._on_map, add="+")
+
+    def _on_map(self, event):
+        if event.widget is not self:
+            return
+        self.unbind("<Map>", self._first_paint)
+        # Idle callbacks run after Tk has drawn the mapped window
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        startup.record("first paint total", startup.elapsed())
+        # Open the first database connection now, off the UI thread, instead of on the first query
+        from db_connection import db, executor
+        began = startup.elapsed()
+        executor.run(self, db.connect,
+                     on_success=lambda ok: self._on_connected(began),
+                     on_error=lambda e: self._on_connected(began))
+
+    def _on_connected(self, began):
+        startup.record("connect (bg)", startup.elapsed() - began)
+        print(startup.report())
+        log_path = getenv("STARTUP_LOG")
+        if log_path:
+            startup.write_log(log_path)
+
 
 if __name__ == "__main__":
     app = RmsApp()
     app.mainloop()
+
+    from db_connection import db
+    print(db.query_report())
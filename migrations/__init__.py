@@ -0,0 +1,92 @@
+"""
+Versioned schema migrations.
+
+    python -m migrations            apply pending migrations
+    python -m migrations status     show applied / pending versions
+    python -m migrations check      EXPLAIN the tab queries, fail on full scans
+
+Applied versions are recorded in schema_migrations. MySQL commits DDL
+implicitly, so each version is recorded right after its statements run,
+and a named lock keeps two terminals from migrating at the same time.
+"""
+from mysql.connector import Error, errorcode
+from db_connection import get_pool
+from migrations.versions import MIGRATIONS
+
+LOCK_NAME = "rms_schema_migrations"
+LOCK_TIMEOUT = 30  # seconds
+
+# Errors meaning "this object is already there", from databases that predate the runner
+ALREADY_APPLIED = {errorcode.ER_DUP_KEYNAME, errorcode.ER_TABLE_EXISTS_ERROR, errorcode.ER_DUP_FIELDNAME}
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied"""
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    _ensure_version_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations(cursor):
+    done = applied_versions(cursor)
+    return [migration for migration in MIGRATIONS if migration[0] not in done]
+
+
+def migrate():
+    """Apply every pending migration in order; returns the versions applied"""
+    applied = []
+    with get_pool().acquire() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError("Another terminal is migrating the database; try again shortly")
+        try:
+            for version, description, statements in pending_migrations(cursor):
+                print(f"🔧 Applying migration {version}: {description}")
+                for statement in statements:
+                    # MySQL ends the transaction at every DDL statement; data fixes still get their own
+                    if not conn.in_transaction:
+                        conn.start_transaction()
+                    try:
+                        if callable(statement):
+                            statement(cursor)
+                        else:
+                            cursor.execute(statement)
+                    except Error as e:
+                        if e.errno not in ALREADY_APPLIED:
+                            raise MigrationError(f"Migration {version} failed: {e}") from e
+                        print(f"   ↪ already present, skipped ({e.msg})")
+                if not conn.in_transaction:
+                    conn.start_transaction()
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                               (version, description))
+                conn.commit()
+                applied.append(version)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+            cursor.close()
+    return applied
+
+
+def status():
+    """[(version, description, applied)] for every known migration"""
+    with get_pool().acquire() as conn:
+        cursor = conn.cursor()
+        done = applied_versions(cursor)
+        conn.commit()
+        cursor.close()
+    return [(version, description, version in done) for version, description, _ in MIGRATIONS]
@@ -0,0 +1,40 @@
+import argparse
+import sys
+from migrations import migrate, status, MigrationError
+from migrations.explain_check import check
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="RMS schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status", "check"])
+    parser.add_argument("--strict", action="store_true",
+                        help="check: also fail on full scans the optimizer chose over a usable index")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        try:
+            applied = migrate()
+        except MigrationError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Schema is up to date")
+        return 0
+
+    if args.command == "status":
+        for version, description, applied in status():
+            print(f"{'✅' if applied else '⏳'} {version:>3}  {description}")
+        return 0
+
+    failures, warnings = check(strict=args.strict)
+    for message in warnings:
+        print(f"⚠️ {message}")
+    for message in failures:
+        print(f"❌ {message}")
+    if failures:
+        return 1
+    print("✅ No hot query falls back to a full table scan")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+EXPLAIN-based guard for the queries the tabs run most.
+
+Each query is EXPLAINed against the live database. A table read with
+type=ALL (a full table scan) fails the check when no index could have been
+used at all (possible_keys is NULL), because that means an index is
+missing. A full scan with usable indexes is only a warning unless strict:
+on small tables MySQL legitimately prefers scanning. Tables a query is
+meant to read in full (the menu grid) are listed in
+its allowed set.
+
+On the SQLite backend EXPLAIN becomes EXPLAIN QUERY PLAN; a plain
+"SCAN <table>" step counts as a full scan (SEARCH, or SCAN ... USING INDEX,
+does not). SQLite does not report which indexes it considered, so
+possible_keys is worked out the way MySQL would list them: the table's
+indexes whose leading column the query mentions. A scan with none of those
+fails like a MySQL scan with possible_keys NULL.
+"""
+import re
+from datetime import date, datetime, timedelta
+from db_connection import get_pool
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+# full_scans() marker: SQLite plans do not say which indexes were considered
+SQLITE_UNKNOWN_KEYS = object()
+
+# Aliases used in the hot queries, so messages name the real table
+TABLE_ALIASES = {"o": "orders", "c": "customer", "oi": "order_items", "m": "menu",
+                 "b": "bill", "e": "employees"}
+
+# Sample arguments for the query builders below
+_FIRST_DAY, _LAST_DAY = date(2025, 1, 1), date(2025, 1, 7)
+_BILL_AFTER = (datetime(2025, 1, 15, 12, 0), 1000)
+_RESERVATION_AFTER = (_FIRST_DAY, timedelta(hours=12), 0)
+
+
+def hot_queries():
+    """
+    (name, query, params, tables allowed to be read in full) for each hot
+    query, taken from the modules that run them so the check cannot drift
+    """
+    # Imported here: the tab modules pull in tkinter, which `migrate` does not need
+    from db_connection import ChangeFeed
+    from services import bills, reservations
+    from services.availability import DAY_QUERY
+    from services.customers import LOOKUP_QUERY
+    from services.menu_search import MENU_QUERY
+    from tabs.kitchen_order import (COMPLETED_ORDERS_QUERY, PENDING_ORDERS_BY_STATUS_QUERY,
+                                    PENDING_ORDERS_QUERY)
+    from tabs.manager import PENDING_BILLS_QUERY
+
+    return [
+        ("kitchen: pending orders (All)", PENDING_ORDERS_QUERY, (), set()),
+        ("kitchen: pending orders (by status)", PENDING_ORDERS_BY_STATUS_QUERY, ("Cooking",), set()),
+        ("kitchen: completed orders", COMPLETED_ORDERS_QUERY, (), set()),
+        ("bill: paid bills page", *bills.page_query(_FIRST_DAY, _LAST_DAY, bills.ALL_METHODS, _BILL_AFTER), set()),
+        ("bill: paid bills page by method", *bills.page_query(_FIRST_DAY, _LAST_DAY, "Card"), set()),
+        ("bill: summary", *bills.summary_query(_FIRST_DAY, _LAST_DAY, bills.ALL_METHODS), set()),
+        ("manager: pending bills", PENDING_BILLS_QUERY, (), set()),
+        ("reservation: window page", *reservations.page_query(_FIRST_DAY, _LAST_DAY, _RESERVATION_AFTER), set()),
+        ("reservation: search by phone", *reservations.search_query("0300", _FIRST_DAY, _LAST_DAY), set()),
+        ("reservation: search by name", *reservations.search_query("Ahm", _FIRST_DAY, _LAST_DAY), set()),
+        ("reservation: availability day", DAY_QUERY, (_FIRST_DAY,), set()),
+        ("menu / pos: menu grid", MENU_QUERY, (), {"menu"}),
+        ("pos: customer by phone", LOOKUP_QUERY, ("5550100",), set()),
+        ("change feed: new events", *ChangeFeed.changes_query(0, ("orders", "bill")), set()),
+    ]
+
+def sqlite_possible_keys(cursor, table, query):
+    """Indexes of `table` whose leading column appears in the query, comma-separated, or None"""
+    keys = []
+    cursor.execute(f"PRAGMA index_list({table})")
+    for index in cursor.fetchall():
+        cursor.execute(f"PRAGMA index_info({index['name']})")
+        columns = sorted(cursor.fetchall(), key=lambda column: column["seqno"])
+        if columns and re.search(rf"\b{re.escape(columns[0]['name'])}\b", query):
+            keys.append(index["name"])
+    return ",".join(keys) or None
+
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    return cursor.fetchall()
+
+
+def full_scans(plan):
+    """
+    (table, estimated_rows, possible_keys) for every full table scan in an
+    EXPLAIN result; possible_keys is SQLITE_UNKNOWN_KEYS on SQLite
+    """
+    for row in plan:
+        if "detail" in row:
+            match = _SQLITE_SCAN_RE.match(row["detail"])
+            if match:
+                yield match.group(1), None, SQLITE_UNKNOWN_KEYS
+        elif row.get("type") == "ALL":
+            yield row.get("table"), row.get("rows"), row.get("possible_keys")
+
+
+def check(strict=False):
+    """
+    EXPLAIN every hot query; returns (failures, warnings) as lists of
+    human-readable strings.
+    """
+    failures, warnings = [], []
+    with get_pool().acquire() as conn:
+        cursor = conn.cursor(dictionary=True)
+        for name, query, params, allowed in hot_queries():
+            for table, rows, possible_keys in full_scans(explain(cursor, query, params)):
+                table = TABLE_ALIASES.get(table, table)
+                if table in allowed:
+                    continue
+                if possible_keys is SQLITE_UNKNOWN_KEYS:
+                    possible_keys = sqlite_possible_keys(cursor, table, query)
+                message = f"{name}: full scan of {table} (rows≈{rows}, possible_keys={possible_keys})"
+                if strict or not possible_keys:
+                    failures.append(message)
+                else:
+                    warnings.append(message)
+        cursor.close()
+    return failures, warnings
@@ -0,0 +1,194 @@
+"""
+Schema versions, applied in order by the migration runner.
+
+Each entry is (version, description, [steps]); a step is a SQL statement
+or a function called with the migration cursor (for data fixes that need
+Python, e.g. phone normalization). Tables are created
+with IF NOT EXISTS so a database that predates the runner is adopted as-is;
+indexes that already exist are skipped by the runner. Never edit a
+released version - add a new one.
+
+Steps are self-contained: the SQL and the data fix functions live here
+rather than being imported from the app, so a later change to the
+services cannot change what an old version does.
+"""
+import re
+
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def _phone_key(phone):
+    """Digits of a phone number, or None when it has none (as services.customers did for versions 4-5)"""
+    digits = _NON_DIGITS_RE.sub("", str(phone or ""))
+    return digits or None
+
+
+def _merge_duplicate_customers(cursor):
+    """
+    Version 4: collapse customers that share a phone key into one row.
+
+    The oldest row survives and takes the most recent name; orders and
+    bills of the others are re-pointed to it before they are deleted.
+    Fills phone_key for every customer.
+    """
+    cursor.execute("SELECT customer_id, customer_name, phone FROM customer ORDER BY customer_id")
+    groups = {}
+    for customer_id, name, phone in cursor.fetchall():
+        key = _phone_key(phone)
+        if key is not None:
+            groups.setdefault(key, []).append((customer_id, name))
+
+    repoint, names, keys, duplicates = [], [], [], []
+    for key, rows in groups.items():
+        survivor = rows[0][0]
+        keys.append((key, survivor))
+        if len(rows) > 1:
+            names.append((rows[-1][1], survivor))
+            for customer_id, _ in rows[1:]:
+                repoint.append((survivor, customer_id))
+                duplicates.append((customer_id,))
+
+    if repoint:
+        cursor.executemany("UPDATE orders SET customer_id = %s WHERE customer_id = %s", repoint)
+        cursor.executemany("UPDATE bill SET customer_id = %s WHERE customer_id = %s", repoint)
+        cursor.executemany("DELETE FROM customer WHERE customer_id = %s", duplicates)
+        cursor.executemany("UPDATE customer SET customer_name = %s WHERE customer_id = %s", names)
+    if keys:
+        cursor.executemany("UPDATE customer SET phone_key = %s WHERE customer_id = %s", keys)
+
+
+def _fill_reservation_phone_keys(cursor):
+    """Version 5: phone_key (digits of phone) for every existing reservation"""
+    cursor.execute("SELECT res_id, phone FROM reservation")
+    keys = [(_phone_key(phone), res_id) for res_id, phone in cursor.fetchall()]
+    if keys:
+        cursor.executemany("UPDATE reservation SET phone_key = %s WHERE res_id = %s", keys)
+
+
+MIGRATIONS = [
+    (1, "create schema", [
+        """
+        CREATE TABLE IF NOT EXISTS menu (
+            menu_id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            image VARCHAR(255),
+            price DECIMAL(10, 2) NOT NULL,
+            category VARCHAR(50),
+            status VARCHAR(20) NOT NULL DEFAULT 'Available'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS customer (
+            customer_id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_name VARCHAR(100) NOT NULL,
+            phone VARCHAR(20)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS employees (
+            employee_id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            total_price DECIMAL(10, 2) NOT NULL,
+            order_date DATETIME NOT NULL,
+            kitchen_status VARCHAR(20) DEFAULT 'Received'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_item_id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT NOT NULL,
+            menu_id INT NOT NULL,
+            qty INT NOT NULL,
+            price DECIMAL(10, 2) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS bill (
+            bill_id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            order_id INT NOT NULL,
+            bill_date DATETIME NOT NULL,
+            payment_method VARCHAR(20) NOT NULL,
+            bill_amount DECIMAL(10, 2) NOT NULL,
+            employee_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reservation (
+            res_id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_name VARCHAR(100) NOT NULL,
+            phone VARCHAR(20),
+            date DATE NOT NULL,
+            time TIME NOT NULL,
+            guests INT NOT NULL
+        )
+        """,
+    ]),
+
+    (2, "indexes for the tab queries", [
+        # Kitchen: WHERE kitchen_status ... ORDER BY order_date
+        "CREATE INDEX idx_orders_status_date ON orders (kitchen_status, order_date)",
+        "CREATE INDEX idx_orders_customer ON orders (customer_id)",
+        # Kitchen: JOIN order_items ON order_id (menu_id covers the join to menu)
+        "CREATE INDEX idx_order_items_order ON order_items (order_id, menu_id)",
+        # Bill / Manager: WHERE status ... ORDER BY bill_date
+        "CREATE INDEX idx_bill_status_date ON bill (status, bill_date)",
+        # Kitchen: EXISTS (SELECT 1 FROM bill WHERE order_id = ...)
+        "CREATE INDEX idx_bill_order ON bill (order_id)",
+        # Reservation: ORDER BY date, time
+        "CREATE INDEX idx_reservation_date_time ON reservation (date, time)",
+        # Menu / POS: ORDER BY category, name
+        "CREATE INDEX idx_menu_category_name ON menu (category, name)",
+    ]),
+
+    (3, "change feed", [
+        """
+        CREATE TABLE IF NOT EXISTS order_events (
+            event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            table_name VARCHAR(32) NOT NULL,
+            row_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+
+    (4, "one customer per phone number", [
+        "ALTER TABLE customer ADD COLUMN phone_key VARCHAR(20)",
+        # _merge_duplicate_customers re-points bills by customer_id
+        "CREATE INDEX idx_bill_customer ON bill (customer_id)",
+        _merge_duplicate_customers,
+        "CREATE UNIQUE INDEX uq_customer_phone_key ON customer (phone_key)",
+    ]),
+
+    (5, "reservation search by phone and name", [
+        "ALTER TABLE reservation ADD COLUMN phone_key VARCHAR(20)",
+        _fill_reservation_phone_keys,
+        # Reservation search: phone_key / customer_name LIKE 'prefix%' AND date BETWEEN ...
+        "CREATE INDEX idx_reservation_phone_key ON reservation (phone_key, date)",
+        "CREATE INDEX idx_reservation_name ON reservation (customer_name, date)",
+    ]),
+
+    (6, "bill history filters", [
+        # Bill: WHERE status = 'Paid' AND payment_method = ... ORDER BY bill_date DESC, bill_id DESC
+        "CREATE INDEX idx_bill_status_method_date ON bill (status, payment_method, bill_date)",
+        # Bill summary: COUNT/SUM per payment_method over a bill_date range, from the index alone
+        "CREATE INDEX idx_bill_status_date_summary ON bill (status, bill_date, payment_method, bill_amount)",
+    ]),
+
+    (7, "change feed events commit in id order", [
+        # Row every event writer locks before inserting into order_events (record_change)
+        """
+        CREATE TABLE IF NOT EXISTS order_events_lock (
+            lock_id INT PRIMARY KEY
+        )
+        """,
+        "INSERT INTO order_events_lock (lock_id) SELECT COUNT(*) + 1 FROM order_events_lock HAVING COUNT(*) = 0",
+    ]),
+]
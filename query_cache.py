@@ -0,0 +1,135 @@
+"""
+Read-through result cache for DatabaseConnection.execute_query.
+
+Entries are keyed by (normalized SQL, params) and tagged with the tables
+the SELECT reads. Any INSERT/UPDATE/DELETE that goes through
+execute_query drops every entry tagged with the table it writes; DDL drops
+everything. Entries also expire after `ttl` seconds, which bounds how
+stale a row changed by another terminal can get. Memory is bounded by
+both an entry count and a total cached-row budget, evicting least
+recently used entries first.
+
+Per-table generation counters close the race where a slow read that
+started before a write would otherwise store its now-stale result after
+the write's invalidation.
+"""
+import collections
+import re
+import threading
+import time
+
+_WS_RE = re.compile(r"\s+")
+_READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)`?", re.IGNORECASE)
+_DDL_RE = re.compile(r"^\s*(?:CREATE|ALTER|DROP|TRUNCATE|RENAME)\b", re.IGNORECASE)
+
+
+def normalize(query):
+    return _WS_RE.sub(" ", query).strip()
+
+
+def tables_read(query):
+    return {table.lower() for table in _READ_TABLES_RE.findall(query)}
+
+
+def tables_written(query):
+    """Tables a statement modifies; None means "unknown / schema change": drop everything"""
+    if _DDL_RE.match(query):
+        return None
+    match = _WRITE_TABLE_RE.match(query)
+    return {match.group(1).lower()} if match else None
+
+
+class QueryCache:
+    def __init__(self, ttl=30.0, max_entries=256, max_rows=20000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()   # key -> (expires_at, tables, rows)
+        self._by_table = {}                          # table -> set(keys)
+        self._generations = collections.Counter()    # table -> write count
+        self._rows = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0,
+                       "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def key(query, params):
+        return normalize(query), tuple(params or ())
+
+    def get(self, key):
+        """Cached rows (a fresh list) or None; counts a hit or a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return list(entry[2])
+
+    def snapshot(self, tables):
+        """Generation stamp to take before running a read"""
+        with self._lock:
+            return {table: self._generations[table] for table in tables}
+
+    def put(self, key, tables, rows, snapshot):
+        """Store a read result unless one of its tables was written since `snapshot`"""
+        rows = list(rows)
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if any(self._generations[table] != generation for table, generation in snapshot.items()):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), rows)
+            self._rows += len(rows)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._stats["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._rows > self.max_rows):
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, query):
+        """Drop entries affected by a write statement"""
+        tables = tables_written(query)
+        with self._lock:
+            if tables is None:
+                tables = set(self._by_table) | set(self._generations)
+                for key in list(self._entries):
+                    self._drop(key)
+            for table in tables:
+                self._generations[table] += 1
+                for key in list(self._by_table.get(table, ())):
+                    self._drop(key)
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def _drop(self, key):
+        _, tables, rows = self._entries.pop(key)
+        self._rows -= len(rows)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"entries": len(self._entries), "rows": self._rows})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,345 @@
+"""
+Latency instrumentation for every database statement.
+
+Pooled connections hand out TimedCursor wrappers, so each statement —
+whether it came through DatabaseConnection.execute_query or a
+create_connection() call site — is measured for wall time (execute plus
+fetch), rows returned, the connection wait paid to borrow it from the pool
+and the tab function that issued it. Samples are grouped by query
+fingerprint (literals and parameters replaced with ?).
+
+Statements slower than SLOW_QUERY_MS (default 200; 0 logs everything) and
+failed statements are appended as JSON lines to SLOW_QUERY_LOG (default
+slow_queries.log), rotated at SLOW_QUERY_LOG_BYTES with
+SLOW_QUERY_LOG_BACKUPS old files kept.
+
+    python -m query_stats [LOG]     p50/p95/p99 per fingerprint from the log
+
+The running app keeps the same report in memory (query_stats.report()) and
+prints it on exit.
+"""
+import argparse
+import collections
+import glob
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from config import getenv
+
+_WS_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+# Frames from these modules are plumbing, not the code that asked for the query
+_PLUMBING = ("db_connection", "query_stats", "sqlite_backend", "query_cache", "concurrent.", "threading")
+
+_context = threading.local()
+
+
+def fingerprint(query):
+    """Query text with literals and parameters replaced by ?, whitespace collapsed"""
+    query = _STRING_RE.sub("?", query)
+    query = query.replace("%s", "?")
+    query = _NUMBER_RE.sub("?", query)
+    query = _IN_LIST_RE.sub("IN (...)", query)
+    return _WS_RE.sub(" ", query).strip()
+
+
+def _is_plumbing(module):
+    return module.startswith(_PLUMBING)
+
+
+def caller_name(skip=1):
+    """module.Class.function of the nearest frame outside the database plumbing"""
+    frame = sys._getframe(skip)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not _is_plumbing(module):
+            code = frame.f_code
+            return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return None
+
+
+def submitted_by(label):
+    """Wrap work for a worker thread so its statements are attributed to `label`"""
+    def wrap(fn):
+        def run(*args, **kwargs):
+            previous = getattr(_context, "caller", None)
+            _context.caller = label
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _context.caller = previous
+        return run
+    return wrap
+
+
+def current_caller():
+    """Who issued the statement running now: the stack if it says, else whoever submitted the work"""
+    return caller_name(2) or getattr(_context, "caller", None) or "unknown"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class QueryStats:
+    def __init__(self, slow_ms=200.0, log_path="slow_queries.log", max_bytes=1_000_000, backups=3,
+                 samples=1000):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._by_fingerprint = {}   # fingerprint -> stats dict
+        self._logger = None
+
+    def record(self, query, seconds, rows, caller, wait=0.0, error=None):
+        key = fingerprint(query)
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._by_fingerprint.get(key)
+            if entry is None:
+                entry = self._by_fingerprint[key] = {
+                    "count": 0, "errors": 0, "rows": 0, "wait_ms": 0.0,
+                    "durations": collections.deque(maxlen=self.samples),
+                    "callers": collections.Counter(),
+                }
+            entry["count"] += 1
+            entry["rows"] += max(rows, 0)
+            entry["wait_ms"] += wait * 1000
+            entry["durations"].append(ms)
+            entry["callers"][caller] += 1
+            if error is not None:
+                entry["errors"] += 1
+
+        if error is not None or ms >= self.slow_ms:
+            self._log({
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "ms": round(ms, 2),
+                "rows": rows,
+                "wait_ms": round(wait * 1000, 2),
+                "caller": caller,
+                "query": key,
+                **({"error": str(error)} if error is not None else {}),
+            })
+
+    def _log(self, sample):
+        try:
+            if self._logger is None:
+                with self._lock:
+                    if self._logger is None:
+                        logger = logging.getLogger("rms.slow_queries")
+                        logger.propagate = False
+                        logger.setLevel(logging.INFO)
+                        handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                                      backupCount=self.backups, encoding="utf-8")
+                        handler.setFormatter(logging.Formatter("%(message)s"))
+                        logger.addHandler(handler)
+                        self._logger = logger
+            self._logger.info(json.dumps(sample, default=str))
+        except OSError as e:
+            print(f"⚠️ Could not write slow query log {self.log_path}: {e}")
+            self.slow_ms = float("inf")   # don't retry on every statement
+
+    def summary(self):
+        """Per-fingerprint latency summary, slowest p95 first"""
+        with self._lock:
+            entries = [(key, dict(entry, durations=list(entry["durations"]),
+                                  callers=collections.Counter(entry["callers"])))
+                       for key, entry in self._by_fingerprint.items()]
+        return summarize((key, entry["durations"], entry["count"], entry["rows"], entry["wait_ms"],
+                          entry["errors"], entry["callers"]) for key, entry in entries)
+
+    def report(self, limit=20):
+        return format_report(self.summary()[:limit])
+
+    def reset(self):
+        with self._lock:
+            self._by_fingerprint.clear()
+
+
+def summarize(groups):
+    """groups: (fingerprint, durations_ms, count, rows, wait_ms, errors, callers Counter)"""
+    rows = []
+    for key, durations, count, total_rows, wait_ms, errors, callers in groups:
+        durations = sorted(durations)
+        rows.append({
+            "query": key,
+            "count": count,
+            "errors": errors,
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "max": durations[-1] if durations else 0.0,
+            "avg_rows": total_rows / count if count else 0.0,
+            "avg_wait_ms": wait_ms / count if count else 0.0,
+            "callers": [name for name, _ in callers.most_common(3)],
+        })
+    rows.sort(key=lambda row: row["p95"], reverse=True)
+    return rows
+
+
+def format_report(rows):
+    if not rows:
+        return "📊 No queries recorded"
+    lines = ["📊 Query latency (ms)",
+             f"   {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'rows':>7} {'wait':>7}  query / callers"]
+    for row in rows:
+        errors = f" ({row['errors']} failed)" if row["errors"] else ""
+        lines.append(f"   {row['count']:>6} {row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} "
+                     f"{row['max']:>8.1f} {row['avg_rows']:>7.1f} {row['avg_wait_ms']:>7.1f}  "
+                     f"{row['query'][:90]}{errors}")
+        if row["callers"]:
+            lines.append(f"   {'':>55}  ↳ {', '.join(row['callers'])}")
+    return "\n".join(lines)
+
+
+class TimedCursor:
+    """
+    Cursor wrapper that reports each statement to query_stats.
+    A statement is finished (and recorded) when its rows are fetched with
+    fetchall(), or at the next execute()/close() after fetchone()/fetchmany().
+    """
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+        self._pending = None   # [query, started, rows, caller, wait]
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _start(self, query):
+        self._finish()
+        # The pool wait is charged to the first statement run on the borrowed connection
+        wait, self._connection.wait = self._connection.wait, 0.0
+        self._pending = [query, time.perf_counter(), 0, current_caller(), wait]
+
+    def _finish(self, error=None):
+        if self._pending is None:
+            return
+        query, started, rows, caller, wait = self._pending
+        self._pending = None
+        if error is None:
+            self._connection.mark_used()
+        if rows == 0 and error is None:
+            rowcount = getattr(self._cursor, "rowcount", -1)
+            rows = rowcount if rowcount and rowcount > 0 else 0
+        query_stats().record(query, time.perf_counter() - started, rows, caller, wait, error)
+
+    def execute(self, query, params=(), *args, **kwargs):
+        self._start(query)
+        try:
+            return self._cursor.execute(query, params, *args, **kwargs)
+        except Exception as e:
+            self._finish(error=e)
+            raise
+
+    def executemany(self, query, seq_of_params, *args, **kwargs):
+        self._start(query)
+        try:
+            return self._cursor.executemany(query, seq_of_params, *args, **kwargs)
+        except Exception as e:
+            self._finish(error=e)
+            raise
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if self._pending is not None and row is not None:
+            self._pending[2] += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+            self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def query_stats():
+    """Process-wide QueryStats, configured from the environment on first use"""
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = QueryStats(
+                    slow_ms=float(getenv("SLOW_QUERY_MS", 200)),
+                    log_path=getenv("SLOW_QUERY_LOG", "slow_queries.log"),
+                    max_bytes=int(getenv("SLOW_QUERY_LOG_BYTES", 1_000_000)),
+                    backups=int(getenv("SLOW_QUERY_LOG_BACKUPS", 3)),
+                )
+    return _stats
+
+
+def read_log(path):
+    """Group the samples of a slow query log (and its rotated backups) by fingerprint"""
+    groups = {}
+    for file_path in sorted(glob.glob(glob.escape(path) + ".*")) + [path]:
+        try:
+            with open(file_path, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        sample = json.loads(line)
+                    except ValueError:
+                        continue
+                    group = groups.setdefault(sample["query"], [[], 0, 0.0, 0, collections.Counter()])
+                    group[0].append(sample["ms"])
+                    group[1] += max(sample.get("rows", 0), 0)
+                    group[2] += sample.get("wait_ms", 0.0)
+                    group[3] += 1 if "error" in sample else 0
+                    group[4][sample.get("caller", "unknown")] += 1
+        except OSError:
+            continue
+    return summarize((key, durations, len(durations), rows, wait_ms, errors, callers)
+                     for key, (durations, rows, wait_ms, errors, callers) in groups.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m query_stats",
+                                     description="Per-query latency percentiles from the slow query log")
+    parser.add_argument("log", nargs="?", help="log file (default: SLOW_QUERY_LOG or slow_queries.log)")
+    parser.add_argument("--limit", type=int, default=20, help="show the N slowest queries by p95")
+    args = parser.parse_args(argv)
+
+    path = args.log or getenv("SLOW_QUERY_LOG", "slow_queries.log")
+    rows = read_log(path)
+    if not rows:
+        print(f"📊 No samples in {path} (set SLOW_QUERY_MS=0 to log every query)")
+        return 0
+    print(format_report(rows[:args.limit]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Table availability for reservations.
+
+The dining room is modelled as table classes (seats -> number of tables),
+from RESERVATION_TABLES ("2x6,4x8,6x2" = six 2-seaters, eight 4-seaters,
+two 6-seaters). Every reservation holds one table for
+RESERVATION_SLOT_MINUTES from its start time: the smallest class that
+fits the party and still has a table free for the whole stay.
+
+For each day that has been asked about, the engine keeps one sorted list
+of start minutes per table class. Because every stay has the same length,
+the stays that can overlap a new one are exactly those starting less than
+one slot before or after it, which two bisects find; so "can we seat N at
+HH:MM" costs O(log n) plus the handful of overlapping stays, and "next
+free slots" is that check per candidate start. Adds, edits and deletes
+update the lists in place. A day is read from the database (one indexed
+query) the first time it is needed and again once it is older than
+RESERVATION_AVAILABILITY_MAX_AGE seconds, to pick up other terminals'
+bookings.
+"""
+import bisect
+import threading
+import time
+from datetime import time as dt_time, timedelta
+from config import getenv
+from db_connection import db
+
+DAY_QUERY = "SELECT res_id, time, guests FROM reservation WHERE date = %s"
+
+
+def parse_tables(spec):
+    """Table classes from "2x6,4x8" (seats x tables) -> {2: 6, 4: 8}"""
+    tables = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        seats, _, count = part.lower().partition("x")
+        tables[int(seats)] = tables.get(int(seats), 0) + int(count or 1)
+    return tables
+
+
+def to_minutes(value):
+    """Minutes after midnight for a TIME value (timedelta, time or "HH:MM[:SS]")"""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, dt_time):
+        return value.hour * 60 + value.minute
+    hours, minutes = str(value).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def day_key(day):
+    """Index key of a day, whether given as a date or as a YYYY-MM-DD string"""
+    return str(day)[:10]
+
+
+class DaySchedule:
+    """Stays of one day, as sorted start minutes per table class"""
+
+    def __init__(self, tables):
+        self.starts = {seats: [] for seats in tables}   # seats -> sorted [(start, res_id)]
+        self.loaded_at = time.monotonic()
+
+
+class AvailabilityEngine:
+    def __init__(self, tables, slot_minutes=90, opening="11:00", closing="23:00", step_minutes=30,
+                 max_age=60):
+        self.tables = dict(sorted(tables.items()))
+        self.slot = slot_minutes
+        self.opening = to_minutes(opening)
+        self.closing = to_minutes(closing)
+        self.step = step_minutes
+        self.max_age = max_age
+        self._days = {}          # date -> DaySchedule
+        self._placed = {}        # res_id -> (date, seats, start)
+        self._lock = threading.RLock()
+
+    def empty_copy(self, max_age=None):
+        """A new engine for the same dining room and hours with no days loaded"""
+        return AvailabilityEngine(self.tables, self.slot, format_minutes(self.opening),
+                                  format_minutes(self.closing), self.step,
+                                  self.max_age if max_age is None else max_age)
+
+    # --- loading ---
+    def ensure_day(self, day):
+        """Load (or refresh) one day's reservations; runs on a worker thread"""
+        day = day_key(day)
+        with self._lock:
+            schedule = self._days.get(day)
+            if schedule is not None and time.monotonic() - schedule.loaded_at < self.max_age:
+                return
+        rows = db.execute_query(DAY_QUERY, (day,), dictionary=False, raise_errors=True)
+        with self._lock:
+            self._drop_day(day)
+            self._days[day] = DaySchedule(self.tables)
+            for res_id, start, guests in sorted(rows, key=lambda row: (to_minutes(row[1]), row[0])):
+                self._place(res_id, day, to_minutes(start), guests)
+
+    def forget_day(self, day):
+        """Drop a loaded day so it is read again when next needed (after a bulk write)"""
+        with self._lock:
+            self._drop_day(day_key(day))
+
+    def _drop_day(self, day):
+        self._days.pop(day, None)
+        for res_id in [res_id for res_id, placed in self._placed.items() if placed[0] == day]:
+            del self._placed[res_id]
+
+    # --- queries ---
+    @property
+    def largest_table(self):
+        """Seats at the biggest table; a larger party does not fit any single table"""
+        return max(self.tables)
+
+    def _busy(self, seats, schedule, start, exclude=None):
+        """Most tables of one class in use at any moment of [start, start + slot)"""
+        starts = schedule.starts[seats]
+        lo = bisect.bisect_right(starts, (start - self.slot, float("inf")))
+        hi = bisect.bisect_left(starts, (start + self.slot, -1))
+        overlapping = [other for other, res_id in starts[lo:hi] if res_id != exclude]
+        if not overlapping:
+            return 0
+        # Occupancy only rises at a start, so check the new stay's start and each later
+        # overlapping start; `overlapping` is sorted, so each count is two bisects
+        peak = 0
+        for moment in [start] + [other for other in overlapping if other > start]:
+            in_use = (bisect.bisect_right(overlapping, moment)
+                      - bisect.bisect_right(overlapping, moment - self.slot))
+            peak = max(peak, in_use)
+        return peak
+
+    def _fitting_class(self, schedule, guests, start, exclude=None):
+        for seats, count in self.tables.items():
+            if seats >= guests and self._busy(seats, schedule, start, exclude) < count:
+                return seats
+        return None
+
+    def can_seat(self, day, guests, start, exclude=None):
+        """Seats of the table class a party of `guests` would get at `start`, or None if full"""
+        start = to_minutes(start)
+        with self._lock:
+            schedule = self._days.get(day_key(day)) or DaySchedule(self.tables)
+            return self._fitting_class(schedule, guests, start, exclude)
+
+    def next_free_slots(self, day, guests, after, limit=3, exclude=None):
+        """Up to `limit` start times ("HH:MM") from `after` on where the party fits"""
+        after = to_minutes(after)
+        first = max(self.opening, -(-after // self.step) * self.step)
+        free = []
+        with self._lock:
+            schedule = self._days.get(day_key(day)) or DaySchedule(self.tables)
+            for start in range(first, self.closing - self.slot + 1, self.step):
+                if self._fitting_class(schedule, guests, start, exclude) is not None:
+                    free.append(format_minutes(start))
+                    if len(free) >= limit:
+                        break
+        return free
+
+    # --- incremental updates ---
+    def _place(self, res_id, day, start, guests):
+        schedule = self._days[day]
+        seats = self._fitting_class(schedule, guests, start)
+        if seats is None:
+            # Overbooked (or larger than any table): count it against the closest class anyway
+            fitting = [s for s in self.tables if s >= guests]
+            seats = fitting[0] if fitting else max(self.tables)
+        bisect.insort(schedule.starts[seats], (start, res_id))
+        self._placed[res_id] = (day, seats, start)
+
+    def add(self, res_id, day, start, guests):
+        """Record a reservation that was just written"""
+        day = day_key(day)
+        with self._lock:
+            if day not in self._days:
+                return  # the day is read in full when it is first needed
+            self.remove(res_id)
+            self._place(res_id, day, to_minutes(start), guests)
+
+    def remove(self, res_id):
+        with self._lock:
+            placed = self._placed.pop(res_id, None)
+            if placed is None:
+                return
+            day, seats, start = placed
+            starts = self._days[day].starts[seats]
+            index = bisect.bisect_left(starts, (start, res_id))
+            if index < len(starts) and starts[index] == (start, res_id):
+                del starts[index]
+
+    def update(self, res_id, day, start, guests):
+        with self._lock:
+            self.remove(res_id)
+            self.add(res_id, day, start, guests)
+
+
+def _engine():
+    return AvailabilityEngine(
+        parse_tables(getenv("RESERVATION_TABLES", "2x6,4x8,6x2")),
+        slot_minutes=int(getenv("RESERVATION_SLOT_MINUTES", 90)),
+        opening=getenv("RESERVATION_OPENING", "11:00"),
+        closing=getenv("RESERVATION_CLOSING", "23:00"),
+        step_minutes=int(getenv("RESERVATION_SLOT_STEP", 30)),
+        max_age=int(getenv("RESERVATION_AVAILABILITY_MAX_AGE", 60)),
+    )
+
+
+_availability = None
+_availability_lock = threading.Lock()
+
+
+def availability():
+    """Process-wide engine, configured from the environment on first use"""
+    global _availability
+    with _availability_lock:
+        if _availability is None:
+            _availability = _engine()
+        return _availability
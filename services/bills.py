@@ -0,0 +1,133 @@
+"""
+Paid bill queries for the Bill tab.
+
+The tab shows one date range and optionally one payment method, both
+pushed down into SQL, newest first, a page at a time with keyset
+pagination on (bill_date, bill_id): each page continues below the last row
+of the previous one. The summary bar (count, total and per-method totals)
+comes from one GROUP BY over the same filters, which the
+(status, bill_date, payment_method, bill_amount) index answers without
+touching the table (migration 6).
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from db_connection import db
+from services.checkout import PAYMENT_STATUS
+
+PAGE_SIZE = 100
+
+RANGES = ("Today", "This week", "This month", "All time", "Custom")
+
+ALL_METHODS = "All methods"
+METHODS = (ALL_METHODS,) + tuple(PAYMENT_STATUS)
+
+BILL_COLUMNS = """
+    SELECT b.bill_id, c.customer_name, b.order_id, b.bill_date, b.payment_method,
+           b.bill_amount, e.name, b.status
+    FROM bill b
+    JOIN customer c ON b.customer_id = c.customer_id
+    JOIN employees e ON b.employee_id = e.employee_id
+"""
+
+
+def range_bounds(name, today=None):
+    """(first_day, last_day) for a named range; (None, None) for All time; None for Custom"""
+    today = today or date.today()
+    if name == "Today":
+        return today, today
+    if name == "This week":
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+    if name == "This month":
+        first = today.replace(day=1)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+        return first, next_month - timedelta(days=1)
+    if name == "All time":
+        return None, None
+    return None
+
+
+def _filters(first_day, last_day, method):
+    """WHERE clause (on alias b) and params for paid bills in a day range, optionally one method"""
+    where, params = ["b.status = 'Paid'"], []
+    if first_day is not None:
+        where.append("b.bill_date >= %s")
+        params.append(datetime.combine(first_day, time.min))
+    if last_day is not None:
+        where.append("b.bill_date < %s")
+        params.append(datetime.combine(last_day + timedelta(days=1), time.min))
+    if method and method != ALL_METHODS:
+        where.append("b.payment_method = %s")
+        params.append(method)
+    return " AND ".join(where), params
+
+
+def page_key(bill):
+    """Keyset cursor of a fetched bill row: the next page starts below it"""
+    return bill[3], bill[0]
+
+
+def matches(bill, first_day, last_day, method):
+    """Whether a bill row (re-read after a change) belongs in the filtered list"""
+    bill_date, payment_method, status = bill[3], bill[4], bill[7]
+    if status != 'Paid':
+        return False
+    if method and method != ALL_METHODS and payment_method != method:
+        return False
+    day = bill_date.date() if isinstance(bill_date, datetime) else bill_date
+    return ((first_day is None or day >= first_day) and
+            (last_day is None or day <= last_day))
+
+
+def page_query(first_day, last_day, method, after=None, limit=PAGE_SIZE):
+    """(query, params) for one page of fetch_page"""
+    where, params = _filters(first_day, last_day, method)
+    if after is not None:
+        after_date, after_id = after
+        # Spelled out rather than (bill_date, bill_id) < (...) so MySQL keeps the index range
+        where += " AND (b.bill_date < %s OR (b.bill_date = %s AND b.bill_id < %s))"
+        params += [after_date, after_date, after_id]
+    query = f"{BILL_COLUMNS} WHERE {where} ORDER BY b.bill_date DESC, b.bill_id DESC LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+
+def fetch_page(first_day, last_day, method, after=None, limit=PAGE_SIZE):
+    """Up to `limit` paid bills matching the filters, newest first, below `after`"""
+    query, params = page_query(first_day, last_day, method, after, limit)
+    return db.execute_query(query, params, dictionary=False, raise_errors=True)
+
+
+def fetch_by_id(bill_ids):
+    """Current rows for the given bills, whatever their status"""
+    placeholders = ", ".join(["%s"] * len(bill_ids))
+    return db.execute_query(f"{BILL_COLUMNS} WHERE b.bill_id IN ({placeholders})", tuple(bill_ids),
+                            dictionary=False, raise_errors=True)
+
+
+class BillSummary:
+    def __init__(self, by_method):
+        self.by_method = by_method     # method -> (count, total)
+        self.count = sum(count for count, _ in by_method.values())
+        self.total = sum((total for _, total in by_method.values()), Decimal("0"))
+
+
+def summary_query(first_day, last_day, method):
+    """(query, params) for summarize"""
+    where, params = _filters(first_day, last_day, method)
+    return f"""
+        SELECT b.payment_method, COUNT(*), SUM(b.bill_amount)
+        FROM bill b
+        WHERE {where}
+        GROUP BY b.payment_method
+        ORDER BY b.payment_method
+    """, tuple(params)
+
+
+def summarize(first_day, last_day, method):
+    """Count and total of the filtered bills, overall and per payment method, computed by the database"""
+    query, params = summary_query(first_day, last_day, method)
+    rows = db.execute_query(query, params, dictionary=False, raise_errors=True)
+    # SQLite sums DECIMAL columns as floats
+    return BillSummary({payment_method: (count, Decimal(str(total or 0)).quantize(Decimal("0.01")))
+                        for payment_method, count, total in rows})
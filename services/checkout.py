@@ -0,0 +1,100 @@
+"""
+Checkout service shared by the POS payment paths.
+
+A sale (customer, order, order lines and bill) is written in one short
+transaction: the order lines go in with a single executemany(), which
+mysql-connector sends as one multi-row INSERT, so the number of round trips
+no longer grows with the size of the cart. The same transaction publishes
+the new order and bill to the change feed.
+"""
+from datetime import datetime
+from mysql.connector import Error
+from db_connection import db, create_connection, change_feed, record_change
+from services.customers import upsert_customer
+
+# Bill status recorded for each payment method
+PAYMENT_STATUS = {
+    "Card": "Paid",
+    "Cash": "Pending",
+}
+
+
+class EmployeeNotFoundError(Exception):
+    """Raised when the employee ID entered at checkout does not exist"""
+
+
+def cart_total(cart_items):
+    """Sum of price * qty over CartLine records"""
+    return sum(item.total for item in cart_items)
+
+
+def checkout(cust_name, cust_phone, cart_items, payment_method, employee_id):
+    """
+    Write a complete sale in one transaction.
+
+    cart_items is a list of CartLine records (services.models).
+    Returns a dict with order_id, bill_id, customer_id, customer_name (as on
+    file, for a returning customer), employee_name, total_price and
+    bill_date. Nothing is written if any step fails.
+    """
+    if not cart_items:
+        raise ValueError("Cart is empty")
+    if payment_method not in PAYMENT_STATUS:
+        raise ValueError(f"Unknown payment method: {payment_method}")
+
+    total_price = cart_total(cart_items)
+    now = datetime.now()
+
+    # Validate the employee before writing anything (cached: the same few IDs ring up every sale)
+    result = db.execute_query("SELECT name FROM employees WHERE employee_id = %s", (employee_id,),
+                              cache=True, dictionary=False, raise_errors=True)
+    if not result:
+        raise EmployeeNotFoundError(f"Employee ID {employee_id} not found")
+    employee_name = result[0][0]
+
+    change_feed.ensure_table()  # DDL must not run inside the sale's transaction
+    conn = create_connection()
+    if conn is None:
+        raise Error("Cannot connect to database")
+
+    try:
+        conn.start_transaction()
+        cursor = conn.cursor()
+
+        customer_id, customer_name = upsert_customer(cursor, cust_name, cust_phone)
+
+        cursor.execute("INSERT INTO orders (customer_id, total_price, order_date, kitchen_status) VALUES (%s, %s, %s, %s)",
+                       (customer_id, total_price, now, "Received"))
+        order_id = cursor.lastrowid
+
+        # All order lines in one multi-row INSERT
+        cursor.executemany("INSERT INTO order_items (order_id, menu_id, qty, price) VALUES (%s, %s, %s, %s)",
+                           [(order_id, item.menu_id, item.qty, item.price) for item in cart_items])
+
+        cursor.execute("""
+            INSERT INTO bill (customer_id, order_id, bill_date, payment_method, bill_amount, employee_id, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (customer_id, order_id, now, payment_method, total_price, employee_id, PAYMENT_STATUS[payment_method]))
+        bill_id = cursor.lastrowid
+
+        # Let the kitchen, bill and manager screens pick the sale up
+        record_change(cursor, "orders", order_id)
+        record_change(cursor, "bill", bill_id)
+
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        'order_id': order_id,
+        'bill_id': bill_id,
+        'customer_id': customer_id,
+        'customer_name': customer_name,
+        'employee_name': employee_name,
+        'total_price': total_price,
+        'bill_date': now,
+    }
@@ -0,0 +1,151 @@
+"""
+Customer repository.
+
+Customers are identified by their phone number, normalized to digits only
+and stored in customer.phone_key under a unique index (migration 4). A
+regular who orders every day keeps one customer row instead of gaining a
+new one per sale, so the customer table the Kitchen, Bill and Manager
+joins read stays small.
+
+CustomerDirectory keeps the same phone keys in memory so the POS can
+autofill a returning customer's name from the first digits of the phone.
+"""
+import bisect
+import re
+import time
+from mysql.connector import Error, errorcode
+from db_connection import db, executor
+
+_NON_DIGITS_RE = re.compile(r"\D")
+
+LOOKUP_QUERY = "SELECT customer_id, customer_name FROM customer WHERE phone_key = %s"
+
+
+def normalize_phone(phone):
+    """Digits of a phone number, or None when it has none ("(555) 010-99" -> "55501099")"""
+    digits = _NON_DIGITS_RE.sub("", str(phone or ""))
+    return digits or None
+
+
+def upsert_customer(cursor, name, phone):
+    """
+    Return (customer_id, customer_name) for this phone number, creating the
+    customer if needed. A known customer keeps the name on file: every past
+    order and bill shows it, so a different name typed at the till does not
+    rename them (only an empty name on file is filled in).
+    Runs on the caller's cursor, inside the caller's transaction.
+    """
+    key = normalize_phone(phone)
+    if key is None:
+        cursor.execute("INSERT INTO customer (customer_name, phone) VALUES (%s, %s)", (name, phone))
+        return cursor.lastrowid, name
+
+    cursor.execute(LOOKUP_QUERY, (key,))
+    row = cursor.fetchone()
+    if row is None:
+        try:
+            cursor.execute("INSERT INTO customer (customer_name, phone, phone_key) VALUES (%s, %s, %s)",
+                           (name, phone, key))
+            return cursor.lastrowid, name
+        except Error as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+            # Another terminal added the same phone since our lookup. A plain SELECT would
+            # re-read this transaction's REPEATABLE READ snapshot and miss that row; a
+            # locking read sees the latest committed version
+            cursor.execute(LOOKUP_QUERY + " FOR UPDATE", (key,))
+            row = cursor.fetchone()
+            if row is None:
+                raise Error(f"Customer with phone {key} already exists but could not be read")
+
+    customer_id, current_name = row[0], row[1]
+    if name and not (current_name or "").strip():
+        cursor.execute("UPDATE customer SET customer_name = %s WHERE customer_id = %s", (name, customer_id))
+        return customer_id, name
+    return customer_id, current_name
+
+
+class CustomerDirectory:
+    """
+    In-memory phone prefix index for the POS cart window.
+
+    Phone keys are kept in one sorted list (with names and display phones in
+    parallel lists), so a prefix lookup is a bisect plus a short walk: no
+    query per keystroke. The directory is loaded in the background the first
+    time it is needed, reloaded when it is older than `max_age` seconds, and
+    updated in place as this terminal records sales. Only touched from the
+    Tk thread; the load itself runs on the shared executor.
+    """
+
+    def __init__(self, max_age=600):
+        self.max_age = max_age
+        self._keys = []
+        self._names = []
+        self._phones = []
+        self._loaded_at = None
+        self._loading = False
+        self._added_while_loading = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def ensure_loaded(self, widget):
+        """Start a background (re)load if the directory was never loaded or is stale"""
+        fresh = self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age
+        if fresh or self._loading:
+            return
+        self._loading = True
+        executor.run(widget, _fetch_directory, on_success=self._on_loaded, on_error=self._on_load_failed)
+
+    def _on_loaded(self, rows):
+        self._loading = False
+        self._loaded_at = time.monotonic()
+        rows.sort(key=lambda row: row[0])
+        self._keys = [row[0] for row in rows]
+        self._names = [row[1] for row in rows]
+        self._phones = [row[2] for row in rows]
+        # Sales recorded while the query ran may be missing from its result
+        added, self._added_while_loading = self._added_while_loading, []
+        for phone, name in added:
+            self.add(phone, name)
+
+    def _on_load_failed(self, error):
+        self._loading = False
+        self._added_while_loading = []
+        print(f"⚠️ Could not load customer phone numbers: {error}")
+
+    def add(self, phone, name):
+        """Record a customer this terminal just served"""
+        key = normalize_phone(phone)
+        if key is None:
+            return
+        if self._loading:
+            self._added_while_loading.append((phone, name))
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            self._names[i] = name
+            return
+        self._keys.insert(i, key)
+        self._names.insert(i, name)
+        self._phones.insert(i, phone)
+
+    def complete(self, phone_prefix, limit=5):
+        """[(phone, name)] of customers whose phone starts with these digits, an exact match first"""
+        prefix = normalize_phone(phone_prefix)
+        if prefix is None:
+            return []
+        i = bisect.bisect_left(self._keys, prefix)
+        matches = []
+        while i < len(self._keys) and self._keys[i].startswith(prefix) and len(matches) < limit:
+            matches.append((self._phones[i], self._names[i]))
+            i += 1
+        return matches
+
+
+def _fetch_directory():
+    """Runs on a worker thread"""
+    return db.execute_query("SELECT phone_key, customer_name, phone FROM customer WHERE phone_key IS NOT NULL",
+                            dictionary=False, raise_errors=True)
+
+
+customer_directory = CustomerDirectory()
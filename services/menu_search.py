@@ -0,0 +1,113 @@
+"""
+In-memory search index over menu item names and categories.
+
+Built once per menu load so each keystroke is a couple of dict lookups
+instead of a scan over every item:
+
+- every word of the name and category is indexed by all of its prefixes,
+  so "chi bur" finds "Chicken Burger";
+- every word is also indexed by its trigrams, so a query word that has no
+  prefix hit still finds items that share most of its trigrams ("burgr",
+  "cheeseburger" for "burger").
+
+Menu items are the MenuItem records (services.models) the tabs load from
+the database.
+"""
+import re
+
+WORD_RE = re.compile(r"\w+")
+
+# Share of a query word's trigrams an indexed word must contain to count as a fuzzy hit
+FUZZY_THRESHOLD = 0.6
+
+# The one query both tabs load those rows with, so they share a query-cache entry
+MENU_QUERY = "SELECT menu_id, name, image, price, category, status FROM menu ORDER BY category, name"
+
+
+def tokenize(text):
+    return WORD_RE.findall(str(text or "").lower())
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuSearchIndex:
+    def __init__(self, items=()):
+        self._prefixes = {}   # prefix -> set(menu_id)
+        self._trigrams = {}   # trigram -> set(menu_id)
+        self._words = {}      # menu_id -> set(words), used to undo an item
+        self._all = set()
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """Index one menu row (re-indexes it if the menu_id is already present)"""
+        menu_id, name, category = item.menu_id, item.name, item.category
+        if menu_id in self._all:
+            self.remove(menu_id)
+
+        words = set(tokenize(name)) | set(tokenize(category))
+        self._words[menu_id] = words
+        self._all.add(menu_id)
+        for word in words:
+            for end in range(1, len(word) + 1):
+                self._prefixes.setdefault(word[:end], set()).add(menu_id)
+            for gram in trigrams(word):
+                self._trigrams.setdefault(gram, set()).add(menu_id)
+
+    def remove(self, menu_id):
+        """Drop a menu item from the index"""
+        words = self._words.pop(menu_id, None)
+        if words is None:
+            return
+        self._all.discard(menu_id)
+        for word in words:
+            for end in range(1, len(word) + 1):
+                self._discard(self._prefixes, word[:end], menu_id)
+            for gram in trigrams(word):
+                self._discard(self._trigrams, gram, menu_id)
+
+    @staticmethod
+    def _discard(index, key, menu_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(menu_id)
+            if not ids:
+                del index[key]
+
+    def _match_word(self, word):
+        matches = set(self._prefixes.get(word, ()))
+        if len(word) < 3:
+            return matches
+
+        # Typo / infix tolerance: count how many of the word's trigrams each item has
+        grams = trigrams(word)
+        counts = {}
+        for gram in grams:
+            for menu_id in self._trigrams.get(gram, ()):
+                counts[menu_id] = counts.get(menu_id, 0) + 1
+        needed = FUZZY_THRESHOLD * len(grams)
+        matches.update(menu_id for menu_id, hits in counts.items() if hits >= needed)
+        return matches
+
+    def search(self, query):
+        """
+        Return the set of menu_ids matching every word of the query,
+        or None when the query is blank (meaning "show everything").
+        """
+        words = tokenize(query)
+        if not words:
+            return None
+
+        result = None
+        for word in words:
+            matches = self._match_word(word)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result
+
+    def __len__(self):
+        return len(self._all)
@@ -0,0 +1,167 @@
+"""
+Menu and cart models shared by the Menu and POS tabs.
+
+MenuItem and CartLine are __slots__ records: one small object per row
+instead of a tuple read by position or an ad-hoc dict. Menu indexes the
+items by menu_id and keeps an ordered list per category; Cart keeps its
+total and item count up to date as lines change instead of re-summing on
+every update.
+"""
+
+
+class MenuItem:
+    """One row of the menu table"""
+    __slots__ = ("menu_id", "name", "image", "price", "category", "status")
+
+    def __init__(self, menu_id, name, image, price, category, status):
+        self.menu_id = menu_id
+        self.name = name
+        self.image = image
+        self.price = price
+        self.category = category
+        self.status = status
+
+    @classmethod
+    def from_row(cls, row):
+        """From a (menu_id, name, image, price, category, status) row"""
+        return cls(*row)
+
+    def as_tuple(self):
+        return (self.menu_id, self.name, self.image, self.price, self.category, self.status)
+
+    def __eq__(self, other):
+        return isinstance(other, MenuItem) and self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.menu_id)
+
+    def __repr__(self):
+        return f"MenuItem({self.menu_id}, {self.name!r}, {self.category!r})"
+
+
+class Menu:
+    """
+    The loaded menu: items in query order (category, name), looked up by
+    menu_id in O(1), with an ordered view per category.
+    """
+
+    def __init__(self, items=()):
+        self.items = list(items)
+        self.by_id = {item.menu_id: item for item in self.items}
+        self.by_category = {}   # category -> [items], categories in first-seen order
+        for item in self.items:
+            self.by_category.setdefault(item.category, []).append(item)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(MenuItem.from_row(row) for row in rows)
+
+    @property
+    def categories(self):
+        return list(self.by_category)
+
+    def get(self, menu_id):
+        return self.by_id.get(menu_id)
+
+    def in_category(self, category):
+        return self.by_category.get(category, [])
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __eq__(self, other):
+        return isinstance(other, Menu) and self.items == other.items
+
+
+class CartLine:
+    """A menu item in the cart with its quantity"""
+    __slots__ = ("menu_id", "name", "price", "qty")
+
+    def __init__(self, menu_id, name, price, qty=1):
+        self.menu_id = menu_id
+        self.name = name
+        self.price = price
+        self.qty = qty
+
+    @property
+    def total(self):
+        return self.price * self.qty
+
+    def copy(self):
+        return CartLine(self.menu_id, self.name, self.price, self.qty)
+
+    def __repr__(self):
+        return f"CartLine({self.menu_id}, {self.name!r}, qty={self.qty})"
+
+
+class Cart:
+    """
+    Lines keyed by menu_id, in the order they were added. `total` and
+    `count` are maintained on every change, so reading them is O(1).
+    """
+
+    def __init__(self):
+        self._lines = {}
+        self.total = 0
+        self.count = 0
+
+    def add(self, item, qty=1):
+        """Add qty of a MenuItem (or one more of a menu_id already in the cart); returns the line"""
+        line = self._lines.get(item.menu_id)
+        if line is None:
+            line = self._lines[item.menu_id] = CartLine(item.menu_id, item.name, item.price, 0)
+        line.qty += qty
+        self.total += line.price * qty
+        self.count += qty
+        return line
+
+    def increment(self, menu_id):
+        line = self._lines[menu_id]
+        line.qty += 1
+        self.total += line.price
+        self.count += 1
+        return line
+
+    def decrement(self, menu_id):
+        """Take one off a line, dropping it at zero; returns the line or None if it was removed"""
+        line = self._lines[menu_id]
+        line.qty -= 1
+        self.total -= line.price
+        self.count -= 1
+        if line.qty <= 0:
+            del self._lines[menu_id]
+            return None
+        return line
+
+    def remove(self, menu_id):
+        line = self._lines.pop(menu_id, None)
+        if line is not None:
+            self.total -= line.total
+            self.count -= line.qty
+
+    def clear(self):
+        self._lines.clear()
+        self.total = 0
+        self.count = 0
+
+    def lines(self):
+        return list(self._lines.values())
+
+    def snapshot(self):
+        """Independent copies of the lines, for staging an order the cart can no longer change"""
+        return [line.copy() for line in self._lines.values()]
+
+    def get(self, menu_id):
+        return self._lines.get(menu_id)
+
+    def __contains__(self, menu_id):
+        return menu_id in self._lines
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __bool__(self):
+        return bool(self._lines)
@@ -0,0 +1,155 @@
+"""
+In-memory staging area for POS orders that are waiting on a payment dialog.
+
+Nothing touches the database while the cashier is filling in the payment
+form. The cart snapshot is staged here under a token; the payment button
+claims it with begin_submit(), the checkout service writes the whole sale,
+and finish() drops it. Orders whose dialog is abandoned are reaped by a
+background sweeper once their TTL runs out, so they can never reach the
+kitchen.
+"""
+import collections
+import itertools
+import threading
+import time
+from config import getenv
+
+OPEN = "open"
+SUBMITTING = "submitting"
+
+
+class StagedOrder:
+    """Cart snapshot waiting for payment"""
+
+    def __init__(self, token, cust_name, cust_phone, cart_items, payment_method, ttl):
+        self.token = token
+        self.cust_name = cust_name
+        self.cust_phone = cust_phone
+        self.cart_items = cart_items
+        self.payment_method = payment_method
+        self.ttl = ttl
+        self.state = OPEN
+        self.expires_at = time.monotonic() + ttl
+
+    def is_expired(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self.state == OPEN and now >= self.expires_at
+
+
+class OrderStaging:
+    """Thread-safe registry of staged orders with a background expiry sweeper"""
+
+    def __init__(self, ttl=900, sweep_interval=30):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._tokens = itertools.count(1)
+        self._reaped = collections.deque(maxlen=256)  # recently expired tokens
+        self._sweeper = None
+        self._stop = threading.Event()
+        self._stats = {"staged": 0, "completed": 0, "discarded": 0, "expired": 0}
+
+    def stage(self, cust_name, cust_phone, cart_items, payment_method):
+        """Stage a cart snapshot and return its token"""
+        self.start_sweeper()
+        with self._lock:
+            token = next(self._tokens)
+            self._orders[token] = StagedOrder(token, cust_name, cust_phone,
+                                              list(cart_items), payment_method, self.ttl)
+            self._stats["staged"] += 1
+        return token
+
+    def begin_submit(self, token):
+        """
+        Claim a staged order for checkout.
+        Returns None if it expired, was discarded or is already being submitted.
+        """
+        with self._lock:
+            order = self._orders.get(token)
+            if order is None or order.state != OPEN:
+                return None
+            if order.is_expired():
+                del self._orders[token]
+                self._reaped.append(token)
+                self._stats["expired"] += 1
+                return None
+            order.state = SUBMITTING
+            return order
+
+    def reopen(self, token):
+        """Put a claimed order back after a failed checkout so the cashier can retry"""
+        with self._lock:
+            order = self._orders.get(token)
+            if order is not None:
+                order.state = OPEN
+                order.expires_at = time.monotonic() + order.ttl
+
+    def finish(self, token):
+        """Drop an order that was written successfully"""
+        with self._lock:
+            if self._orders.pop(token, None) is not None:
+                self._stats["completed"] += 1
+
+    def discard(self, token):
+        """Drop an order whose dialog was closed without paying"""
+        with self._lock:
+            order = self._orders.get(token)
+            if order is not None and order.state == OPEN:
+                del self._orders[token]
+                self._stats["discarded"] += 1
+
+    def state(self, token):
+        """OPEN or SUBMITTING while the order is staged, otherwise None"""
+        with self._lock:
+            order = self._orders.get(token)
+            if order is None or order.is_expired():
+                return None
+            return order.state
+
+    def was_reaped(self, token):
+        """True if the order expired before it was paid"""
+        with self._lock:
+            return token in self._reaped
+
+    def sweep(self):
+        """Remove every expired order; returns the reaped tokens"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, order in self._orders.items() if order.is_expired(now)]
+            for token in expired:
+                del self._orders[token]
+            self._reaped.extend(expired)
+            self._stats["expired"] += len(expired)
+        return expired
+
+    def start_sweeper(self):
+        """Start the background sweeper thread if it is not running yet"""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="order-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            reaped = self.sweep()
+            if reaped:
+                print(f"🧹 Reaped {len(reaped)} abandoned order(s)")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._orders)
+        return stats
+
+
+# Shared staging area used by the POS tab
+order_staging = OrderStaging(
+    ttl=int(getenv("ORDER_STAGING_TTL", 900)),
+    sweep_interval=int(getenv("ORDER_SWEEP_INTERVAL", 30)),
+)
@@ -0,0 +1,130 @@
+"""
+CSV import and export of reservations.
+
+Import streams the file: each row is checked with validate_reservation
+(the form's rules) and against table availability (the form's capacity
+check, counting the file's earlier rows as booked), valid rows are
+inserted with executemany in batches of `batch_size`, and the whole file
+is one transaction, so a database error leaves nothing half-imported.
+Invalid and overbooked rows are skipped and reported by line number. Export reads the date window a page at a time with the same keyset
+as the Reservation tab, so only one page is ever held in memory.
+
+Columns: customer_name, phone, date (YYYY-MM-DD), time (HH:MM), guests.
+Export adds res_id first; import ignores it.
+"""
+import csv
+from mysql.connector import Error
+from db_connection import create_connection
+from services.availability import availability, format_minutes, to_minutes
+from services.customers import normalize_phone
+from services.reservations import (page_key, fetch_page, validate_reservation, InvalidReservation,
+                                   PartyTooLargeError)
+
+IMPORT_COLUMNS = ("customer_name", "phone", "date", "time", "guests")
+EXPORT_COLUMNS = ("res_id",) + IMPORT_COLUMNS
+
+INSERT_QUERY = """
+    INSERT INTO reservation (customer_name, phone, phone_key, date, time, guests)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejects = []    # [(line number, message)]
+
+    def __repr__(self):
+        return f"ImportResult(imported={self.imported}, rejected={len(self.rejects)})"
+
+
+def import_csv(path, batch_size=500):
+    """Import reservations from a CSV file; returns an ImportResult"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return import_rows(csv.DictReader(f), batch_size)
+
+
+def import_rows(reader, batch_size=500):
+    """Import from a csv.DictReader (anything with `fieldnames`, `line_num` and row dicts)"""
+    columns = {name.strip().lower(): name for name in (reader.fieldnames or ())}
+    missing = [name for name in IMPORT_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    result = ImportResult()
+    days = set()
+    # Its own engine, so rows of an import that is rolled back never count as booked elsewhere;
+    # a day is read once, since a re-read would not see this file's uncommitted rows
+    capacity = availability().empty_copy(max_age=float("inf"))
+    conn = create_connection()
+    if conn is None:
+        raise Error("Cannot connect to database")
+    try:
+        conn.start_transaction()
+        cursor = conn.cursor()
+        batch = []
+        for row in reader:
+            try:
+                name, phone, day, start, guests = validate_reservation(
+                    *(row.get(columns[name]) for name in IMPORT_COLUMNS))
+            except InvalidReservation as e:
+                result.rejects.append((reader.line_num, str(e)))
+                continue
+            refusal = _capacity_refusal(capacity, day, start, guests)
+            if refusal:
+                result.rejects.append((reader.line_num, refusal))
+                continue
+            # Negative ids: the row has none yet and must not clash with a stored reservation
+            capacity.add(-reader.line_num, day, start, guests)
+            batch.append((name, phone, normalize_phone(phone), day, start, guests))
+            days.add(day)
+            if len(batch) >= batch_size:
+                cursor.executemany(INSERT_QUERY, batch)
+                result.imported += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_QUERY, batch)
+            result.imported += len(batch)
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    # No res_ids come back from a batch insert, so the touched days are read again when next needed
+    engine = availability()
+    for day in days:
+        engine.forget_day(day)
+    return result
+
+
+def _capacity_refusal(engine, day, start, guests):
+    """Why the form would refuse this booking for lack of a table, or None if a table is free"""
+    if guests > engine.largest_table:
+        return str(PartyTooLargeError(guests, engine.largest_table))
+    engine.ensure_day(day)
+    if engine.can_seat(day, guests, start) is None:
+        return f"No table for {guests} at {start[:5]} on {day}"
+    return None
+
+
+def export_csv(path, first_day, last_day, page_size=1000):
+    """Write the reservations of a date window to a CSV file; returns the number of rows"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        return export_rows(csv.writer(f), first_day, last_day, page_size)
+
+
+def export_rows(writer, first_day, last_day, page_size=1000):
+    writer.writerow(EXPORT_COLUMNS)
+    count, after = 0, None
+    while True:
+        rows = fetch_page(first_day, last_day, after, page_size)
+        for row in rows:
+            writer.writerow((row["res_id"], row["customer_name"], row["phone"], str(row["date"])[:10],
+                             format_minutes(to_minutes(row["time"])), row["guests"]))
+        count += len(rows)
+        if len(rows) < page_size:
+            return count
+        after = page_key(rows[-1])
@@ -0,0 +1,321 @@
+"""
+Reservation queries for the Reservation tab.
+
+The tab only ever shows one date window (today, this week or a custom
+range), pushed down into SQL, and reads it a page at a time with keyset
+pagination on (date, time, res_id): each page continues after the last
+row of the previous one, so a page costs the same whether it is the first
+or the fiftieth, and the (date, time) index serves both the range and the
+order.
+
+Writes go through add/update/delete_reservation so the availability
+engine (services.availability) follows every change without re-reading
+the day.
+
+Search is by phone prefix (on phone_key, the digits of the phone) or by
+customer name prefix, each backed by a (column, date) index (migration
+5). ReservationIndex answers the same searches in memory once the tab
+has the whole window loaded.
+"""
+import bisect
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+from db_connection import db, create_connection
+from services.availability import availability, day_key, format_minutes, to_minutes
+from services.customers import normalize_phone
+
+PAGE_SIZE = 100
+
+WINDOWS = ("Today", "This week", "Custom")
+
+COLUMNS = "res_id, customer_name, phone, time, date, guests"
+
+MAX_GUESTS = 20
+
+
+class ReservationNotFoundError(Exception):
+    """Raised when a reservation to update or delete is no longer in the database"""
+
+
+class PartyTooLargeError(Exception):
+    """Raised when a party is larger than any single table, however free the day is"""
+
+    def __init__(self, guests, largest):
+        super().__init__(f"No table seats {guests}; the largest seats {largest}")
+        self.guests = guests
+        self.largest = largest
+
+
+class InvalidReservation(ValueError):
+    """A reservation field failed validation; `field` names it"""
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+def validate_reservation(customer_name, phone, reservation_date, reservation_time, guests):
+    """
+    Check the fields of a reservation the way the form does and return them
+    ready to store: (customer_name, phone, "YYYY-MM-DD", "HH:MM:SS", guests).
+    Raises InvalidReservation with the message to show.
+    """
+    customer_name = str(customer_name or "").strip()
+    phone = str(phone or "").strip()
+    reservation_date = str(reservation_date or "").strip()
+    reservation_time = str(reservation_time or "").strip()
+    if not customer_name:
+        raise InvalidReservation("customer_name", "Please enter customer name")
+    if not phone:
+        raise InvalidReservation("phone", "Please enter phone number")
+    if not reservation_date:
+        raise InvalidReservation("date", "Please enter reservation date")
+    if not reservation_time:
+        raise InvalidReservation("time", "Please enter reservation time")
+
+    try:
+        guests = int(str(guests).strip())
+    except ValueError:
+        raise InvalidReservation("guests", "Please enter a valid number for guests")
+    if guests < 1 or guests > MAX_GUESTS:
+        raise InvalidReservation("guests", f"Number of guests must be between 1 and {MAX_GUESTS}")
+
+    try:
+        reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise InvalidReservation("date", "Invalid date format. Please use YYYY-MM-DD")
+
+    # Stored as HH:MM:SS, the way MySQL keeps TIME, so paging compares like with like
+    try:
+        reservation_time = datetime.strptime(reservation_time, '%H:%M').strftime('%H:%M:%S')
+    except ValueError:
+        raise InvalidReservation("time", "Invalid time format. Please use HH:MM")
+
+    return customer_name, phone, reservation_date, reservation_time, guests
+
+
+def window_bounds(window, today=None):
+    """(first_day, last_day) for a named window; None for Custom"""
+    today = today or date.today()
+    if window == "Today":
+        return today, today
+    if window == "This week":
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+    return None
+
+
+def page_key(row):
+    """Keyset cursor of a fetched row: where the next page starts"""
+    return row["date"], row["time"], row["res_id"]
+
+
+def _page_query(query, params, after, limit):
+    """Continue a reservation query from the row after `after`, ordered by date, time and id"""
+    if after is not None:
+        after_date, after_time, after_id = after
+        # Spelled out rather than (date, time, res_id) > (...) so MySQL keeps the index range
+        query += """
+            AND (date > %s
+                 OR (date = %s AND (time > %s OR (time = %s AND res_id > %s))))
+        """
+        params += [after_date, after_date, after_time, after_time, after_id]
+    query += " ORDER BY date, time, res_id LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+
+def page_query(first_day, last_day, after=None, limit=PAGE_SIZE):
+    """(query, params) for one page of fetch_page"""
+    return _page_query(f"SELECT {COLUMNS} FROM reservation WHERE date BETWEEN %s AND %s",
+                       [first_day, last_day], after, limit)
+
+
+def fetch_page(first_day, last_day, after=None, limit=PAGE_SIZE):
+    """Up to `limit` reservations in the window, ordered by date, time and id, after `after`"""
+    query, params = page_query(first_day, last_day, after, limit)
+    return db.execute_query(query, params, raise_errors=True)
+
+
+def is_phone_term(term):
+    """A search term with digits and no letters is a phone number prefix, anything else a name prefix"""
+    return normalize_phone(term) is not None and not any(ch.isalpha() for ch in term)
+
+
+def _like_prefix(text):
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+
+
+def search_query(term, first_day, last_day, after=None, limit=PAGE_SIZE):
+    """(query, params) for one page of search_page"""
+    if is_phone_term(term):
+        column, prefix = "phone_key", normalize_phone(term)
+    else:
+        column, prefix = "customer_name", term.strip()
+    return _page_query(f"SELECT {COLUMNS} FROM reservation WHERE {column} LIKE %s ESCAPE '!' AND date BETWEEN %s AND %s",
+                       [_like_prefix(prefix), first_day, last_day], after, limit)
+
+
+def search_page(term, first_day, last_day, after=None, limit=PAGE_SIZE):
+    """
+    Like fetch_page, limited to reservations whose phone (digits only) or
+    customer name starts with `term`. Each is a prefix range on its own
+    (column, date) index.
+    """
+    query, params = search_query(term, first_day, last_day, after, limit)
+    return db.execute_query(query, params, raise_errors=True)
+
+
+def count_in_window(first_day, last_day):
+    rows = db.execute_query("SELECT COUNT(*) AS total FROM reservation WHERE date BETWEEN %s AND %s",
+                            (first_day, last_day), raise_errors=True)
+    return rows[0]["total"]
+
+
+def check_availability(day, start, guests, exclude=None):
+    """
+    (seats of the table the party would get or None, next free start times);
+    runs on a worker thread. Raises PartyTooLargeError when no table is big
+    enough at any time.
+    """
+    engine = availability()
+    if guests > engine.largest_table:
+        raise PartyTooLargeError(guests, engine.largest_table)
+    engine.ensure_day(day)
+    seats = engine.can_seat(day, guests, start, exclude)
+    if seats is not None:
+        return seats, []
+    return None, engine.next_free_slots(day, guests, start, exclude=exclude)
+
+
+def add_reservation(customer_name, phone, day, start, guests):
+    """Insert a reservation and return its res_id"""
+    conn = create_connection()
+    if conn is None:
+        raise Error("Cannot connect to database")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO reservation (customer_name, phone, phone_key, date, time, guests)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (customer_name, phone, normalize_phone(phone), day, start, guests))
+        res_id = cursor.lastrowid
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    availability().add(res_id, day, start, guests)
+    return res_id
+
+
+def update_reservation(res_id, customer_name, phone, day, start, guests):
+    result = db.execute_query("""
+        UPDATE reservation
+        SET customer_name = %s, phone = %s, phone_key = %s, date = %s, time = %s, guests = %s
+        WHERE res_id = %s
+    """, (customer_name, phone, normalize_phone(phone), day, start, guests, res_id), raise_errors=True)
+    # MySQL counts changed rows, so an edit that changes nothing also reports 0
+    if result == 0 and not db.execute_query("SELECT res_id FROM reservation WHERE res_id = %s",
+                                            (res_id,), raise_errors=True):
+        availability().remove(int(res_id))
+        raise ReservationNotFoundError(f"Reservation #{res_id} no longer exists")
+    availability().update(int(res_id), day, start, guests)
+    return result
+
+
+def delete_reservation(res_id):
+    result = db.execute_query("DELETE FROM reservation WHERE res_id = %s", (res_id,), raise_errors=True)
+    availability().remove(int(res_id))
+    if result != 1:
+        raise ReservationNotFoundError(f"Reservation #{res_id} no longer exists")
+    return result
+
+
+def sort_key(row):
+    """
+    page_key with the date and time as fixed-width text, so rows read from
+    the database and rows built from the form order the same way
+    """
+    return day_key(row["date"]), format_minutes(to_minutes(row["time"])), int(row["res_id"])
+
+
+class ReservationIndex:
+    """
+    In-memory index over the reservations loaded in the tab.
+
+    Rows are kept in tree order (sort_key) plus two sorted prefix lists,
+    lowercased name and phone digits, so a search is a bisect and a short
+    walk over the matches. `complete` is set once the whole window has been
+    loaded; until then only the server can answer a search for the window.
+    Only touched from the Tk thread.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.rows = {}          # res_id -> row
+        self._keys = {}         # res_id -> sort_key(row)
+        self._order = []        # sorted sort_key(row): the tree order
+        self._names = []        # sorted (lowercased name, res_id)
+        self._phones = []       # sorted (phone digits, res_id)
+        self.complete = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    def last_key(self):
+        return self._order[-1] if self._order else None
+
+    def add(self, row):
+        """Index a row (replacing an older version of it); returns its position in tree order"""
+        res_id = int(row["res_id"])
+        self.remove(res_id)
+        self.rows[res_id] = row
+        bisect.insort(self._names, (str(row["customer_name"]).lower(), res_id))
+        phone_key = normalize_phone(row.get("phone"))
+        if phone_key is not None:
+            bisect.insort(self._phones, (phone_key, res_id))
+        key = self._keys[res_id] = sort_key(row)
+        position = bisect.bisect_left(self._order, key)
+        self._order.insert(position, key)
+        return position
+
+    def remove(self, res_id):
+        """Drop a row; returns it, or None if it was not indexed"""
+        row = self.rows.pop(int(res_id), None)
+        if row is None:
+            return None
+        res_id = int(res_id)
+        _discard(self._names, (str(row["customer_name"]).lower(), res_id))
+        phone_key = normalize_phone(row.get("phone"))
+        if phone_key is not None:
+            _discard(self._phones, (phone_key, res_id))
+        _discard(self._order, self._keys.pop(res_id))
+        return row
+
+    def all_rows(self):
+        return [self.rows[key[2]] for key in self._order]
+
+    def search(self, term):
+        """Rows whose phone digits or lowercased name start with `term`, in tree order"""
+        if is_phone_term(term):
+            keys, prefix = self._phones, normalize_phone(term)
+        else:
+            keys, prefix = self._names, term.strip().lower()
+        i = bisect.bisect_left(keys, (prefix,))
+        found = []
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            found.append(self._keys[keys[i][1]])
+            i += 1
+        found.sort()
+        return [self.rows[key[2]] for key in found]
+
+
+def _discard(keys, key):
+    i = bisect.bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -0,0 +1,277 @@
+"""
+In-process SQLite engine behind the same interface the app uses for MySQL.
+
+Selected with DB_BACKEND=sqlite (file from DB_SQLITE_PATH, default
+rms.sqlite3; ":memory:" gives a throwaway database shared by the pool).
+Connections and cursors mimic the parts of mysql.connector the tabs use:
+`%s` parameters, cursor(dictionary=True), lastrowid/rowcount, ping(),
+autocommit with start_transaction() and in_transaction,
+DATETIME/DATE/TIME/DECIMAL columns coming back as
+datetime/date/timedelta/Decimal, and errors raised as mysql.connector.Error
+(with MySQL error numbers where callers check them), so every existing
+`except Error` keeps working.
+
+MySQL-only syntax is translated on the way in:
+  %s placeholders                    -> ?
+  GROUP_CONCAT(x SEPARATOR ', ')     -> GROUP_CONCAT(x, ', ')
+  INT AUTO_INCREMENT PRIMARY KEY     -> INTEGER PRIMARY KEY AUTOINCREMENT
+  SHOW TABLES / EXPLAIN              -> sqlite_master / EXPLAIN QUERY PLAN
+  SELECT ... FOR UPDATE              -> SELECT ... (a writer already holds the database lock)
+and CONCAT(), NOW(), VERSION(), DATABASE(), GET_LOCK() and RELEASE_LOCK()
+are provided as SQL functions.
+"""
+import re
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from mysql.connector import Error, errorcode
+
+BUSY_TIMEOUT = 10  # seconds to wait for another connection's write lock
+
+_AUTO_INCREMENT_RE = re.compile(r"\b\w+\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r"\s+SEPARATOR\s+", re.IGNORECASE)
+_SHOW_TABLES_RE = re.compile(r"^\s*SHOW\s+TABLES\s*;?\s*$", re.IGNORECASE)
+_EXPLAIN_RE = re.compile(r"^\s*EXPLAIN\s+(?!QUERY\s+PLAN)", re.IGNORECASE)
+_FOR_UPDATE_RE = re.compile(r"\s+FOR\s+UPDATE\s*;?\s*$", re.IGNORECASE)
+
+
+# --- type mapping ---
+def _to_timedelta(value):
+    parts = [int(float(p)) for p in value.decode().split(":")]
+    hours, minutes, seconds = (parts + [0, 0, 0])[:3]
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _format_timedelta(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(time, lambda value: value.isoformat())
+sqlite3.register_adapter(timedelta, _format_timedelta)
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIME", _to_timedelta)
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+
+
+# --- SQL translation ---
+def _split_literals(query):
+    """Yield (is_literal, text) chunks so rewrites never touch quoted strings"""
+    chunk, quote = [], None
+    for ch in query:
+        if quote:
+            chunk.append(ch)
+            if ch == quote:
+                yield True, "".join(chunk)
+                chunk, quote = [], None
+        elif ch in ("'", '"', "`"):
+            if chunk:
+                yield False, "".join(chunk)
+            chunk, quote = [ch], ch
+        else:
+            chunk.append(ch)
+    if chunk:
+        yield bool(quote), "".join(chunk)
+
+
+def _rewrite_group_concat(query):
+    """GROUP_CONCAT(expr SEPARATOR 'sep') -> GROUP_CONCAT(expr, 'sep')"""
+    out, pos, upper = [], 0, query.upper()
+    while True:
+        start = upper.find("GROUP_CONCAT(", pos)
+        if start == -1:
+            out.append(query[pos:])
+            return "".join(out)
+        body_start = start + len("GROUP_CONCAT(")
+        depth, quote, end = 1, None, body_start
+        while end < len(query) and depth:
+            ch = query[end]
+            if quote:
+                quote = None if ch == quote else quote
+            elif ch in ("'", '"'):
+                quote = ch
+            elif ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            end += 1
+        body = "".join(text if is_literal else _SEPARATOR_RE.sub(", ", text)
+                       for is_literal, text in _split_literals(query[body_start:end - 1]))
+        out.append(query[pos:body_start])
+        out.append(body)
+        out.append(")")
+        pos = end
+
+
+def translate(query):
+    """Rewrite a MySQL-flavoured statement for SQLite"""
+    if _SHOW_TABLES_RE.match(query):
+        return "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    query = _EXPLAIN_RE.sub("EXPLAIN QUERY PLAN ", query, count=1)
+    query = _FOR_UPDATE_RE.sub("", query)
+
+    parts = []
+    for is_literal, text in _split_literals(query):
+        if not is_literal:
+            text = text.replace("%s", "?").replace("%%", "%")
+            text = _AUTO_INCREMENT_RE.sub("INTEGER PRIMARY KEY AUTOINCREMENT", text)
+        parts.append(text)
+    query = "".join(parts)
+
+    if "GROUP_CONCAT" in query.upper():
+        query = _rewrite_group_concat(query)
+    return query
+
+
+# --- errors ---
+def _as_mysql_error(error):
+    message = str(error)
+    errno = None
+    lowered = message.lower()
+    if "already exists" in lowered:
+        errno = errorcode.ER_DUP_KEYNAME if lowered.startswith("index") else errorcode.ER_TABLE_EXISTS_ERROR
+    elif "duplicate column name" in lowered:
+        errno = errorcode.ER_DUP_FIELDNAME
+    elif "unique constraint failed" in lowered:
+        errno = errorcode.ER_DUP_ENTRY
+    elif "no such table" in lowered:
+        errno = errorcode.ER_NO_SUCH_TABLE
+    return Error(msg=message, errno=errno)
+
+
+def _concat(*values):
+    # MySQL semantics: NULL if any argument is NULL
+    if any(value is None for value in values):
+        return None
+    return "".join(str(value) for value in values)
+
+
+# --- connection / cursor ---
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._conn.cursor()
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        try:
+            self._cursor.execute(translate(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def executemany(self, query, seq_of_params):
+        try:
+            self._cursor.executemany(translate(query), [tuple(params) for params in seq_of_params])
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def _convert(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        try:
+            self._cursor.close()
+        except sqlite3.ProgrammingError:
+            pass  # connection already closed, like a mysql cursor whose link dropped
+
+
+class SQLiteConnection:
+    def __init__(self, path):
+        self.path = path
+        if path == ":memory:":
+            # One in-memory database shared by every pooled connection
+            target, uri = "file:rms_memory?mode=memory&cache=shared", True
+        else:
+            target, uri = path, False
+        try:
+            # isolation_level=None: autocommit, like the MySQL pool; start_transaction() opens one
+            self._conn = sqlite3.connect(target, uri=uri, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                         detect_types=sqlite3.PARSE_DECLTYPES,
+                                         check_same_thread=False)  # the pool hands it to one thread at a time
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+        self._closed = False
+        self._conn.create_function("CONCAT", -1, _concat)
+        self._conn.create_function("NOW", 0, lambda: datetime.now().isoformat(" ", timespec="seconds"))
+        self._conn.create_function("VERSION", 0, lambda: f"SQLite {sqlite3.sqlite_version}")
+        self._conn.create_function("DATABASE", 0, lambda: self.path)
+        # Single process: named locks always succeed
+        self._conn.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        self._conn.create_function("RELEASE_LOCK", 1, lambda name: 1)
+
+    def cursor(self, dictionary=False, **_):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self, **_):
+        # IMMEDIATE takes the write lock up front: a deferred transaction that reads
+        # first can fail outright when it upgrades after another writer committed
+        if self._conn.in_transaction:
+            raise Error(msg="Transaction already in progress")
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def is_connected(self):
+        return not self._closed
+
+    def ping(self, reconnect=False, **_):
+        if self._closed:
+            raise Error(msg="SQLite connection is closed")
+        try:
+            self._conn.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def close(self):
+        self._closed = True
+        self._conn.close()
+
+
+def connect(path):
+    """Open a SQLite connection that behaves like a mysql.connector one"""
+    return SQLiteConnection(path)
@@ -1,12 +1,24 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, date
-from db_connection import db
+from db_connection import executor
+from services.availability import day_key
+from services.reservations import (WINDOWS, PAGE_SIZE, window_bounds, page_key, fetch_page, count_in_window,
+                                   search_page, sort_key, ReservationIndex, validate_reservation, InvalidReservation,
+                                   ReservationNotFoundError, PartyTooLargeError,
+                                   check_availability, add_reservation, update_reservation, delete_reservation)
+from services.reservation_csv import import_csv, export_csv
+from ui.debounce import Debouncer
+from ui.paged_tree import PagedTreeview
+
+SEARCH_DEBOUNCE_MS = 150  # wait this long after the last keystroke before searching
+IMPORT_REJECTS_SHOWN = 10  # rejected CSV rows listed after an import
 
 class ReservationTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
+        self.activated = False
         self.setup_ui()
         self.load_reservations()
 
@@ -90,8 +102,29 @@ class ReservationTab(tk.Frame):
         header_frame = tk.Frame(table_frame, bg="#1a1a1a")
         header_frame.pack(fill="x", pady=(0, 10))
 
-        tk.Label(header_frame, text="All Reservations", font=("Arial", 11, "bold"), 
-                bg="#1a1a1a", fg="#ebcd95").pack(side="left")
+        # Date window: only this range is queried, a page at a time
+        window_frame = tk.Frame(header_frame, bg="#1a1a1a")
+        window_frame.pack(side="left")
+
+        self.window_var = tk.StringVar(value="Today")
+        window_box = ttk.Combobox(window_frame, textvariable=self.window_var, values=WINDOWS,
+                                  state="readonly", width=10)
+        window_box.pack(side="left")
+        window_box.bind("<<ComboboxSelected>>", lambda e: self.on_window_selected())
+
+        self.from_entry = tk.Entry(window_frame, width=11, font=("Arial", 10),
+                                   bg="#2d2015", fg="#ebcd95", insertbackground="#ebcd95")
+        self.from_entry.pack(side="left", padx=(10, 2))
+        tk.Label(window_frame, text="to", bg="#1a1a1a", fg="#ebcd95").pack(side="left")
+        self.to_entry = tk.Entry(window_frame, width=11, font=("Arial", 10),
+                                 bg="#2d2015", fg="#ebcd95", insertbackground="#ebcd95")
+        self.to_entry.pack(side="left", padx=2)
+        for entry in (self.from_entry, self.to_entry):
+            entry.bind("<Return>", lambda e: self.apply_custom_window())
+
+        tk.Button(window_frame, text="Show", command=self.apply_custom_window,
+                  font=("Arial", 10), bg="#124035", fg="#ebcd95",
+                  padx=8, pady=2, relief="raised", bd=2).pack(side="left", padx=5)
         
         action_frame = tk.Frame(header_frame, bg="#1a1a1a")
         action_frame.pack(side="right")
@@ -107,11 +140,40 @@ class ReservationTab(tk.Frame):
                               padx=10, pady=4, relief="raised", bd=2)
         delete_btn.pack(side="left", padx=5)
 
+        import_btn = tk.Button(action_frame, text="📥 Import CSV", command=self.import_reservations,
+                               font=("Arial", 10), bg="#124035", fg="#ebcd95",
+                               padx=10, pady=4, relief="raised", bd=2)
+        import_btn.pack(side="left", padx=5)
+
+        export_btn = tk.Button(action_frame, text="📤 Export CSV", command=self.export_reservations,
+                               font=("Arial", 10), bg="#124035", fg="#ebcd95",
+                               padx=10, pady=4, relief="raised", bd=2)
+        export_btn.pack(side="left", padx=5)
+
         # Status label
         self.status_label = tk.Label(header_frame, text="Ready", font=("Arial", 9), 
                                    bg="#1a1a1a", fg="#124035")
         self.status_label.pack(side="right", padx=10)
 
+        # Search by phone or name prefix within the window
+        search_frame = tk.Frame(table_frame, bg="#1a1a1a")
+        search_frame.pack(fill="x", pady=(0, 10))
+
+        tk.Label(search_frame, text="🔍 Phone or name:", font=("Arial", 10, "bold"),
+                 bg="#1a1a1a", fg="#ebcd95").pack(side="left")
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, width=30, font=("Arial", 10),
+                                bg="#2d2015", fg="#ebcd95", insertbackground="#ebcd95")
+        search_entry.pack(side="left", padx=(10, 5))
+        search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+        self.search_debouncer = Debouncer(self, SEARCH_DEBOUNCE_MS, self.apply_search)
+        self.search_var.trace_add("write", self.search_debouncer)
+        search_entry.bind("<Return>", lambda e: self.search_debouncer.flush())
+
+        tk.Button(search_frame, text="✖", command=lambda: self.search_var.set(""),
+                  font=("Arial", 9), bg="#124035", fg="#ebcd95",
+                  padx=6, pady=0, relief="raised", bd=2).pack(side="left")
+
         # Treeview for reservations
         style = ttk.Style()
         style.configure("Treeview", background="#2d2015", fieldbackground="#2d2015", foreground="#ebcd95")
@@ -130,7 +192,18 @@ class ReservationTab(tk.Frame):
         # Scrollbars
         vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
+        # Rows are fetched a page at a time as the table is scrolled
+        self.pages = PagedTreeview(self.tree, vsb, None, page_key, self.row_values,
+                                   lambda row: str(row["res_id"]), page_size=PAGE_SIZE,
+                                   on_loaded=self._on_page_loaded, on_error=self._on_load_failed,
+                                   on_page=self._on_rows)
+        self.window_total = None
+        self.bounds = None
+        self.placeholder = None
+        # Searches are answered from this index once it holds the whole window
+        self.index = ReservationIndex()
+        self.search_term = ""
         
         self.tree.pack(fill="both", expand=True)
         vsb.pack(side="right", fill="y")
@@ -259,68 +332,32 @@ class ReservationTab(tk.Frame):
 
     def save_edited_reservation(self, res_id, customer_name, phone, reservation_date, reservation_time, guests, edit_win):
         """Save the edited reservation to database"""
-        # Validation
-        if not customer_name:
-            messagebox.showerror("Error", "Please enter customer name")
-            return
-        
-        if not phone:
-            messagebox.showerror("Error", "Please enter phone number")
-            return
-
-        if not reservation_date:
-            messagebox.showerror("Error", "Please enter reservation date")
-            return
-
-        if not reservation_time:
-            messagebox.showerror("Error", "Please enter reservation time")
-            return
-
-        # Validate guests
         try:
-            guests_int = int(guests)
-            if guests_int < 1 or guests_int > 20:
-                messagebox.showerror("Error", "Number of guests must be between 1 and 20")
-                return
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid number for guests")
+            customer_name, phone, reservation_date, reservation_time, guests_int = validate_reservation(
+                customer_name, phone, reservation_date, reservation_time, guests)
+        except InvalidReservation as e:
+            messagebox.showerror("Error", str(e), parent=edit_win)
             return
 
-        # Validate date format
-        try:
-            datetime.strptime(reservation_date, '%Y-%m-%d')
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date format. Please use YYYY-MM-DD")
-            return
-
-        # Validate time format
-        try:
-            datetime.strptime(reservation_time, '%H:%M')
-        except ValueError:
-            messagebox.showerror("Error", "Invalid time format. Please use HH:MM")
-            return
-
-        try:
-            # Update reservation in database
-            query = """
-                UPDATE reservation 
-                SET customer_name = %s, phone = %s, date = %s, time = %s, guests = %s
-                WHERE res_id = %s
-            """
-            
-            result = db.execute_query(query, (customer_name, phone, reservation_date, reservation_time, guests_int, res_id))
-            
+        def on_saved(result):
             if result is not None:
                 messagebox.showinfo("Success", f"Reservation #{res_id} updated successfully!")
                 edit_win.destroy()
-                self.load_reservations()  # Refresh the table
+                self.apply_change(res_id, {
+                    "res_id": int(res_id), "customer_name": customer_name, "phone": phone,
+                    "date": reservation_date, "time": reservation_time, "guests": guests_int,
+                })
             else:
                 messagebox.showerror("Error", "Failed to update reservation. Check database connection.")
-                
-        except Exception as e:
-            error_msg = f"Error updating reservation: {str(e)}"
-            print(error_msg)
-            messagebox.showerror("Database Error", error_msg)
+
+        def save():
+            executor.run(self, update_reservation, res_id, customer_name, phone,
+                         reservation_date, reservation_time, guests_int,
+                         on_success=on_saved,
+                         on_error=lambda e: self._on_write_failed("Error updating reservation", res_id, e, edit_win))
+
+        self._when_table_free(reservation_date, reservation_time, guests_int, save,
+                              exclude=int(res_id), parent=edit_win)
 
     def delete_reservation(self):
         """Delete selected reservation from database"""
@@ -355,21 +392,16 @@ class ReservationTab(tk.Frame):
         if not confirm:
             return
         
-        try:
-            # Delete from database
-            query = "DELETE FROM reservation WHERE res_id = %s"
-            result = db.execute_query(query, (res_id,))
-            
+        def on_deleted(result):
             if result is not None:
                 messagebox.showinfo("Success", f"Reservation #{res_id} deleted successfully!")
-                self.load_reservations()  # Refresh the table
+                self.apply_change(res_id)
             else:
                 messagebox.showerror("Error", "Failed to delete reservation. Check database connection.")
-                
-        except Exception as e:
-            error_msg = f"Error deleting reservation: {str(e)}"
-            print(error_msg)
-            messagebox.showerror("Database Error", error_msg)
+
+        executor.run(self, delete_reservation, res_id,
+                     on_success=on_deleted,
+                     on_error=lambda e: self._on_write_failed("Error deleting reservation", res_id, e))
 
     def add_reservation(self):
         """Add a new reservation to the database"""
@@ -380,73 +412,141 @@ class ReservationTab(tk.Frame):
         reservation_time = self.time_entry.get().strip()
         guests = self.guests_var.get().strip()
 
-        # Validation
-        if not customer_name:
-            messagebox.showerror("Error", "Please enter customer name")
-            self.name_entry.focus()
-            return
-        
-        if not phone:
-            messagebox.showerror("Error", "Please enter phone number")
-            self.phone_entry.focus()
-            return
-
-        if not reservation_date:
-            messagebox.showerror("Error", "Please enter reservation date")
-            self.date_entry.focus()
+        try:
+            customer_name, phone, reservation_date, reservation_time, guests_int = validate_reservation(
+                customer_name, phone, reservation_date, reservation_time, guests)
+        except InvalidReservation as e:
+            messagebox.showerror("Error", str(e))
+            entry = {"customer_name": self.name_entry, "phone": self.phone_entry,
+                     "date": self.date_entry, "time": self.time_entry}.get(e.field)
+            if entry is not None:
+                entry.focus()
             return
 
-        if not reservation_time:
-            messagebox.showerror("Error", "Please enter reservation time")
-            self.time_entry.focus()
-            return
+        def on_added(res_id):
+            if res_id is not None:
+                messagebox.showinfo("Success", "Reservation added successfully!")
+                self.clear_form()
+                self.apply_change(res_id, {
+                    "res_id": res_id, "customer_name": customer_name, "phone": phone,
+                    "date": reservation_date, "time": reservation_time, "guests": guests_int,
+                })
+            else:
+                messagebox.showerror("Error", "Failed to add reservation. Check database connection.")
 
-        # Validate guests
-        try:
-            guests_int = int(guests)
-            if guests_int < 1 or guests_int > 20:
-                messagebox.showerror("Error", "Number of guests must be between 1 and 20")
+        def add():
+            executor.run(self, add_reservation, customer_name, phone,
+                         reservation_date, reservation_time, guests_int,
+                         on_success=on_added,
+                         on_error=lambda e: self._show_db_error("Error adding reservation", e))
+
+        self._when_table_free(reservation_date, reservation_time, guests_int, add)
+
+    def _when_table_free(self, reservation_date, reservation_time, guests, write, exclude=None, parent=None):
+        """Run `write` if a table is free for the whole stay; otherwise offer the next free times first"""
+        def on_checked(result):
+            seats, free_times = result
+            if seats is None:
+                suggestion = ", ".join(free_times) if free_times else "none left that day"
+                if not messagebox.askyesno(
+                    "Fully Booked",
+                    f"No table for {guests} at {reservation_time[:5]} on {reservation_date}.\n\n"
+                    f"Next free times: {suggestion}\n\n"
+                    f"Book it anyway?",
+                    parent=parent or self
+                ):
+                    return
+            write()
+
+        def on_failed(error):
+            if not isinstance(error, PartyTooLargeError):
+                self._show_db_error("Error checking availability", error)
                 return
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid number for guests")
+            if messagebox.askyesno(
+                "Party Too Large",
+                f"No single table seats {guests}; the largest seats {error.largest}.\n\n"
+                f"Book it anyway (tables pushed together)?",
+                parent=parent or self
+            ):
+                write()
+
+        executor.run(self, check_availability, reservation_date, reservation_time, guests, exclude,
+                     on_success=on_checked,
+                     on_error=on_failed)
+
+    def import_reservations(self):
+        """Bulk-add reservations from a CSV file (customer_name, phone, date, time, guests)"""
+        file_path = filedialog.askopenfilename(
+            parent=self,
+            title="Import Reservations",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
             return
 
-        # Validate date format
-        try:
-            datetime.strptime(reservation_date, '%Y-%m-%d')
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date format. Please use YYYY-MM-DD")
-            self.date_entry.focus()
+        def on_imported(result):
+            message = f"Imported {result.imported} reservation(s)."
+            if result.rejects:
+                shown = "\n".join(f"Line {line}: {error}" for line, error in result.rejects[:IMPORT_REJECTS_SHOWN])
+                more = len(result.rejects) - IMPORT_REJECTS_SHOWN
+                message += f"\n\nSkipped {len(result.rejects)} row(s):\n{shown}"
+                if more > 0:
+                    message += f"\n... and {more} more"
+                messagebox.showwarning("Import Finished", message)
+            else:
+                messagebox.showinfo("Import Finished", message)
+            self.load_reservations()
+
+        def on_failed(error):
+            self._on_page_loaded(self.pages.row_count)  # put the status back
+            self._show_db_error("Error importing reservations", error)
+
+        self.status_label.config(text="Importing...", fg="#124035")
+        executor.run(self, import_csv, file_path, on_success=on_imported, on_error=on_failed)
+
+    def export_reservations(self):
+        """Write the selected date window to a CSV file"""
+        bounds = self.current_range()
+        if bounds is None:
+            return
+        first_day, last_day = bounds
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export Reservations",
+            defaultextension=".csv",
+            initialfile=f"reservations_{first_day}_{last_day}.csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not file_path:
             return
 
-        # Validate time format
-        try:
-            datetime.strptime(reservation_time, '%H:%M')
-        except ValueError:
-            messagebox.showerror("Error", "Invalid time format. Please use HH:MM")
-            self.time_entry.focus()
+        def on_exported(count):
+            self._on_page_loaded(self.pages.row_count)  # put the status back
+            messagebox.showinfo("Export Finished", f"Exported {count} reservation(s) to {file_path}")
+
+        def on_failed(error):
+            self._on_page_loaded(self.pages.row_count)
+            self._show_db_error("Error exporting reservations", error)
+
+        self.status_label.config(text="Exporting...", fg="#124035")
+        executor.run(self, export_csv, file_path, first_day, last_day,
+                     on_success=on_exported, on_error=on_failed)
+
+    def _on_write_failed(self, prefix, res_id, error, edit_win=None):
+        """Report a failed edit or delete; a reservation removed elsewhere also leaves the list"""
+        if isinstance(error, ReservationNotFoundError):
+            if edit_win is not None:
+                edit_win.destroy()
+            self.apply_change(res_id)
+            messagebox.showerror("Error", f"{error}. It may have been deleted on another terminal.")
             return
+        self._show_db_error(prefix, error)
 
-        try:
-            # Insert into database
-            query = """
-                INSERT INTO reservation (customer_name, phone, date, time, guests)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            result = db.execute_query(query, (customer_name, phone, reservation_date, reservation_time, guests_int))
-            
-            if result is not None:
-                messagebox.showinfo("Success", "Reservation added successfully!")
-                self.clear_form()
-                self.load_reservations()  # Refresh the table
-            else:
-                messagebox.showerror("Error", "Failed to add reservation. Check database connection.")
-                
-        except Exception as e:
-            error_msg = f"Error adding reservation: {str(e)}"
-            print(error_msg)
-            messagebox.showerror("Database Error", error_msg)
+    def _show_db_error(self, prefix, error):
+        """Report a failed background write"""
+        error_msg = f"{prefix}: {str(error)}"
+        print(error_msg)
+        messagebox.showerror("Database Error", error_msg)
 
     def clear_form(self):
         """Clear the input form"""
@@ -461,68 +561,167 @@ class ReservationTab(tk.Frame):
         self.guests_var.set("2")
         self.name_entry.focus()
 
-    def load_reservations(self):
-        """Load reservations from database"""
-        self.status_label.config(text="Loading...", fg="#124035")
-        
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.activated:
+            self.load_reservations()
+        self.activated = True
+
+    def on_window_selected(self):
+        """Today / This week fill in the range and reload; Custom waits for the dates"""
+        bounds = window_bounds(self.window_var.get())
+        if bounds is None:
+            self.from_entry.focus()
+            return
+        self.set_range_entries(*bounds)
+        self.load_reservations()
 
+    def apply_custom_window(self):
+        self.window_var.set("Custom")
+        self.load_reservations()
+
+    def set_range_entries(self, first_day, last_day):
+        for entry, day in ((self.from_entry, first_day), (self.to_entry, last_day)):
+            entry.delete(0, tk.END)
+            entry.insert(0, day.strftime("%Y-%m-%d"))
+
+    def current_range(self):
+        """(first_day, last_day) of the selected window, or None if the custom dates are invalid"""
+        bounds = window_bounds(self.window_var.get())
+        if bounds is not None:
+            self.set_range_entries(*bounds)
+            return bounds
         try:
-            # Get data from database
-            query = """
-                SELECT 
-                    res_id, 
-                    customer_name, 
-                    phone, 
-                    time,
-                    date,
-                    guests
-                FROM reservation 
-                ORDER BY date ASC, time ASC
-            """
-            
-            reservations = db.execute_query(query)
-            
-            if reservations is None:
-                self.status_label.config(text="Database error", fg="red")
-                self.tree.insert("", "end", values=("Error", "Cannot connect to database", "", "", "", ""))
-                return
-                
-            if reservations:
-                self.status_label.config(text=f"Loaded {len(reservations)} reservations", fg="#124035")
-                
-                for reservation in reservations:
-                    res_id = reservation.get('res_id', '')
-                    customer_name = reservation.get('customer_name', '')
-                    phone = reservation.get('phone', '')
-                    reservation_time = reservation.get('time', '')
-                    reservation_date = reservation.get('date', '')
-                    guests = reservation.get('guests', 1)
-                    
-                    # Format time to remove seconds if present
-                    if reservation_time and ':' in str(reservation_time):
-                        time_parts = str(reservation_time).split(':')
-                        if len(time_parts) >= 2:
-                            reservation_time = f"{time_parts[0]}:{time_parts[1]}"
-                    
-                    # Format date if needed
-                    if isinstance(reservation_date, date):
-                        reservation_date = reservation_date.strftime("%Y-%m-%d")
-                    else:
-                        reservation_date = str(reservation_date)
-                    
-                    self.tree.insert("", "end", values=(
-                        res_id, customer_name, phone, reservation_time, reservation_date, guests
-                    ))
+            first_day = datetime.strptime(self.from_entry.get().strip(), '%Y-%m-%d').date()
+            last_day = datetime.strptime(self.to_entry.get().strip(), '%Y-%m-%d').date()
+        except ValueError:
+            messagebox.showerror("Error", "Invalid date range. Please use YYYY-MM-DD")
+            return None
+        return (first_day, last_day) if first_day <= last_day else (last_day, first_day)
+
+    def load_reservations(self):
+        """Reload the selected date window (or the search matches in it) from its first page"""
+        bounds = self.current_range()
+        if bounds is None:
+            return
+        self.bounds = bounds
+        self.window_total = None
+        self.index.clear()
+        self._reload_pages()
+        executor.run(self, count_in_window, *bounds,
+                     on_success=self._on_window_counted,
+                     on_error=lambda e: None)
+
+    def _reload_pages(self):
+        first_day, last_day = self.bounds
+        term = self.search_term
+        self.placeholder = None
+        if term:
+            self.status_label.config(text="Searching...", fg="#124035")
+            self.pages.reload(lambda after, limit: search_page(term, first_day, last_day, after, limit))
+        else:
+            self.index.clear()  # refilled page by page
+            self.status_label.config(text="Loading...", fg="#124035")
+            self.pages.reload(lambda after, limit: fetch_page(first_day, last_day, after, limit))
+
+    def apply_search(self):
+        term = self.search_var.get().strip()
+        if term == self.search_term:
+            return
+        self.search_term = term
+        self.show_current_rows()
+
+    def show_current_rows(self):
+        """The window or the search matches: from the index when it holds the whole window, else from the server"""
+        if self.bounds is None:
+            return
+        if not self.index.complete:
+            self._reload_pages()
+            return
+        self._clear_placeholder()
+        rows = self.index.search(self.search_term) if self.search_term else self.index.all_rows()
+        self.pages.show_rows(rows)
+
+    def apply_change(self, res_id, row=None):
+        """Show one added or edited reservation (row), or drop a deleted one (no row), without reloading"""
+        self.index.remove(res_id)
+        self.pages.delete_row(str(res_id))
+        if row is not None and self.bounds and str(self.bounds[0]) <= day_key(row["date"]) <= str(self.bounds[1]):
+            # Rows past the last one loaded arrive with a later page
+            last_key = self.index.last_key()
+            if self.index.complete or (last_key is not None and sort_key(row) < last_key):
+                position = self.index.add(row)
+                if not self.search_term:
+                    self._clear_placeholder()
+                    self.pages.insert_row(row, position)
+        if self.search_term:
+            self.show_current_rows()
+        if self.bounds:
+            executor.run(self, count_in_window, *self.bounds,
+                         on_success=self._on_window_counted,
+                         on_error=lambda e: None)
+
+    def _on_rows(self, rows):
+        """Pages of the unfiltered window feed the search index"""
+        if self.search_term:
+            return
+        for row in rows:
+            self.index.add(row)
+        self.index.complete = self.pages.exhausted
+
+    def _clear_placeholder(self):
+        if self.placeholder is not None and self.tree.exists(self.placeholder):
+            self.tree.delete(self.placeholder)
+        self.placeholder = None
+
+    def _on_window_counted(self, total):
+        self.window_total = total
+        self._on_page_loaded(self.pages.row_count)
+
+    def _on_page_loaded(self, shown):
+        if shown == 0 and self.pages.exhausted:
+            if self.search_term:
+                self.status_label.config(text=f"No matches for '{self.search_term}'", fg="#124035")
+                message = ("No data", "No matching reservations", "Try another phone or name", "", "", "")
             else:
-                self.status_label.config(text="No reservations found", fg="#124035")
-                self.tree.insert("", "end", values=(
-                    "No data", "No reservations found", "Add some using the form", "", "", ""
-                ))
-                
-        except Exception as e:
-            error_msg = f"Failed to load reservations: {str(e)}"
-            self.status_label.config(text="Error loading data", fg="red")
-            print(f"DEBUG: {error_msg}")
-            self.tree.insert("", "end", values=("Error", "Check console for details", "", "", "", ""))
\ No newline at end of file
+                self.status_label.config(text="No reservations in this range", fg="#124035")
+                message = ("No data", "No reservations found", "Add some using the form", "", "", "")
+            if not self.tree.get_children():
+                self.placeholder = self.tree.insert("", "end", values=message)
+            return
+        if self.search_term:
+            more = "" if self.pages.exhausted else "+"
+            matches = "match" if shown == 1 and not more else "matches"
+            self.status_label.config(text=f"{shown}{more} {matches} for '{self.search_term}'", fg="#124035")
+            return
+        of_total = f" of {self.window_total}" if self.window_total is not None else ""
+        self.status_label.config(text=f"Showing {shown}{of_total} reservations", fg="#124035")
+
+    def _on_load_failed(self, error):
+        error_msg = f"Failed to load reservations: {str(error)}"
+        self.status_label.config(text="Error loading data", fg="red")
+        print(f"DEBUG: {error_msg}")
+        if not self.tree.get_children():
+            self.placeholder = self.tree.insert("", "end", values=("Error", "Check console for details", "", "", "", ""))
+
+    @staticmethod
+    def row_values(reservation):
+        """Tree values for one reservation row"""
+        reservation_time = reservation.get('time', '')
+        reservation_date = reservation.get('date', '')
+
+        # Format time to remove seconds if present
+        if reservation_time and ':' in str(reservation_time):
+            time_parts = str(reservation_time).split(':')
+            if len(time_parts) >= 2:
+                reservation_time = f"{int(time_parts[0]):02d}:{time_parts[1]}"
+
+        # Format date if needed
+        if isinstance(reservation_date, date):
+            reservation_date = reservation_date.strftime("%Y-%m-%d")
+        else:
+            reservation_date = str(reservation_date)
+
+        return (reservation.get('res_id', ''), reservation.get('customer_name', ''),
+                reservation.get('phone', ''), reservation_time, reservation_date,
+                reservation.get('guests', 1))
\ No newline at end of file
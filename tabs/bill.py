@@ -1,13 +1,46 @@
 import tkinter as tk
-from tkinter import ttk
-from db_connection import create_connection
+from tkinter import ttk, messagebox
+from db_connection import executor, change_feed
 from datetime import datetime
+from services.bills import (PAGE_SIZE, RANGES, METHODS, ALL_METHODS, range_bounds, page_key, matches,
+                            fetch_page, fetch_by_id, summarize)
+from ui.paged_tree import PagedTreeview
 
 class BillTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
+        self.activated = False
         tk.Label(self, text="Bills", font=("Arial", 18, 'bold')).pack(pady=10)
 
+        # Filters: pushed into the query, the list is read a page at a time
+        filter_frame = tk.Frame(self)
+        filter_frame.pack(fill="x", padx=10)
+
+        self.range_var = tk.StringVar(value="Today")
+        range_box = ttk.Combobox(filter_frame, textvariable=self.range_var, values=RANGES,
+                                 state="readonly", width=11)
+        range_box.pack(side="left")
+        range_box.bind("<<ComboboxSelected>>", lambda e: self.on_range_selected())
+
+        self.from_entry = ttk.Entry(filter_frame, width=11)
+        self.from_entry.pack(side="left", padx=(10, 2))
+        tk.Label(filter_frame, text="to").pack(side="left")
+        self.to_entry = ttk.Entry(filter_frame, width=11)
+        self.to_entry.pack(side="left", padx=2)
+        for entry in (self.from_entry, self.to_entry):
+            entry.bind("<Return>", lambda e: self.apply_custom_range())
+        ttk.Button(filter_frame, text="Show", command=self.apply_custom_range).pack(side="left", padx=5)
+
+        self.method_var = tk.StringVar(value=ALL_METHODS)
+        method_box = ttk.Combobox(filter_frame, textvariable=self.method_var, values=METHODS,
+                                  state="readonly", width=12)
+        method_box.pack(side="left", padx=(15, 0))
+        method_box.bind("<<ComboboxSelected>>", lambda e: self.load_bills())
+
+        # Summary bar: count and totals of everything the filters match, not just the loaded pages
+        self.summary_label = tk.Label(self, text="", font=("Arial", 11, "bold"), anchor="w")
+        self.summary_label.pack(fill="x", padx=10, pady=(8, 0))
+
         columns = ("bill_id", "customer_name", "order_id", "bill_date", "payment_method",
                    "bill_amount", "name", "status")
         self.tree = ttk.Treeview(self, columns=columns, show="headings", height=20)
@@ -21,7 +54,15 @@ class BillTab(tk.Frame):
         # Scrollbars
         vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
+        self.pages = PagedTreeview(self.tree, vsb, None, page_key, self.row_values,
+                                   lambda bill: str(bill[0]), page_size=PAGE_SIZE,
+                                   on_error=lambda e: messagebox.showerror(
+                                       "Database Error", f"Failed to load bills: {str(e)}"),
+                                   on_page=self._on_rows,
+                                   row_tags=lambda i: ('evenrow' if i % 2 == 0 else 'oddrow',))
+        self.filters = None
+        self.row_keys = {}      # iid -> page_key of every bill shown
         self.tree.pack(fill="both", expand=True, padx=10, pady=10)
         vsb.pack(side="right", fill="y")
         hsb.pack(side="bottom", fill="x")
@@ -48,31 +89,146 @@ class BillTab(tk.Frame):
         self.tree.tag_configure('evenrow', background='#f2f2f2')
 
         self.load_bills()
+        # Card sales and bills the manager marks as paid arrive through the change feed
+        self.feed = change_feed.subscribe(self, ["bill"], self.on_bill_changes)
+
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.activated:
+            self.load_bills()
+        self.activated = True
+        self.feed.resume()
+
+    def on_tab_deactivated(self):
+        self.feed.pause()
+
+    def destroy(self):
+        """Stop polling the change feed before the widgets go (the tab manager closes idle tabs)"""
+        self.feed.cancel()
+        super().destroy()
+
+    def on_range_selected(self):
+        """Named ranges fill in the dates and reload; Custom waits for the dates"""
+        bounds = range_bounds(self.range_var.get())
+        if bounds is None:
+            self.from_entry.focus()
+            return
+        self.load_bills()
+
+    def apply_custom_range(self):
+        self.range_var.set("Custom")
+        self.load_bills()
+
+    def set_range_entries(self, first_day, last_day):
+        for entry, day in ((self.from_entry, first_day), (self.to_entry, last_day)):
+            entry.delete(0, tk.END)
+            if day is not None:
+                entry.insert(0, day.strftime("%Y-%m-%d"))
+
+    def current_filters(self):
+        """(first_day, last_day, method) from the filter bar, or None if the custom dates are invalid"""
+        bounds = range_bounds(self.range_var.get())
+        if bounds is not None:
+            self.set_range_entries(*bounds)
+        else:
+            try:
+                first_day = datetime.strptime(self.from_entry.get().strip(), '%Y-%m-%d').date()
+                last_day = datetime.strptime(self.to_entry.get().strip(), '%Y-%m-%d').date()
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date range. Please use YYYY-MM-DD")
+                return None
+            bounds = (first_day, last_day) if first_day <= last_day else (last_day, first_day)
+        return bounds + (self.method_var.get(),)
 
     def load_bills(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        conn = create_connection()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT b.bill_id, c.customer_name, b.order_id, b.bill_date, b.payment_method,
-                   b.bill_amount, e.name, b.status
-            FROM bill b
-            JOIN customer c ON b.customer_id = c.customer_id
-            JOIN employees e ON b.employee_id = e.employee_id
-            WHERE b.status = 'Paid'
-            ORDER BY b.bill_date DESC
-        """
-        cursor.execute(query)
-        bills = cursor.fetchall()
-        conn.close()
-
-        for i, bill in enumerate(bills):
-            bill_id, cust_name, order_id, bill_date, payment_method, amount, emp_name, status = bill
-            bill_date_str = bill_date.strftime("%Y-%m-%d %H:%M:%S") if isinstance(bill_date, datetime) else str(bill_date)
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert("", "end", values=(bill_id, cust_name, order_id, bill_date_str,
-                                                payment_method, f"{amount:.2f}", emp_name, status),
-                             tags=(tag,))
+        """Summarize the filtered bills, then page through them from the newest"""
+        filters = self.current_filters()
+        if filters is None:
+            return
+        self.filters = filters
+        self.summary_label.config(text="Loading...")
+        executor.run(self, self.fetch_summary, filters,
+                     on_success=lambda result: self._on_summary_loaded(filters, result),
+                     on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load bills: {str(e)}"))
+
+    def fetch_summary(self, filters):
+        """Runs on a worker thread - no Tk calls here"""
+        # Read the feed position first so nothing written during the load is missed
+        mark = change_feed.current_mark()
+        return mark, summarize(*filters)
+
+    def _on_summary_loaded(self, filters, result):
+        if filters != self.filters:
+            return  # the filters changed while this was loading
+        mark, summary = result
+        self.feed.mark = mark
+        self.show_summary(summary)
+        self.row_keys = {}
+        self.pages.reload(lambda after, limit: fetch_page(*filters, after=after, limit=limit))
+
+    def _on_rows(self, bills):
+        for bill in bills:
+            self.row_keys[str(bill[0])] = page_key(bill)
+
+    def show_summary(self, summary):
+        parts = [f"{summary.count} bills", f"Total: {summary.total:.2f} BHD"]
+        parts += [f"{method}: {count} ({total:.2f})" for method, (count, total) in summary.by_method.items()]
+        self.summary_label.config(text="   |   ".join(parts))
+
+    def refresh_summary(self):
+        filters = self.filters
+
+        def on_summarized(summary):
+            if filters == self.filters:
+                self.show_summary(summary)
+
+        executor.run(self, summarize, *filters,
+                     on_success=on_summarized,
+                     on_error=lambda e: print(f"⚠️ Failed to refresh bill summary: {e}"))
+
+    def on_bill_changes(self, changes):
+        """Change feed callback: re-read only the bills that changed"""
+        bill_ids = sorted(changes.get("bill", ()))
+        if bill_ids and self.filters is not None:
+            executor.run(self, fetch_by_id, bill_ids,
+                         on_success=self.merge_bills,
+                         on_error=lambda e: print(f"⚠️ Failed to refresh bills: {e}"))
+
+    def merge_bills(self, bills):
+        """Put newly paid bills in date order, update changed ones and drop those that no longer match"""
+        for bill in bills:
+            iid = str(bill[0])
+            if not matches(bill, *self.filters):
+                if self.pages.delete_row(iid):
+                    del self.row_keys[iid]
+            elif self.tree.exists(iid):
+                self.tree.item(iid, values=self.row_values(bill))
+            else:
+                children = self.tree.get_children()
+                key = page_key(bill)
+                # Bills older than the last row loaded arrive with a later page
+                if self.pages.exhausted or (children and key > self.row_keys[children[-1]]):
+                    self.pages.insert_row(bill, self.position_of(children, key))
+                    self.row_keys[iid] = key
+        self.restripe()
+        self.refresh_summary()
+
+    def position_of(self, children, key):
+        """Index at which a bill with this key goes in the newest-first list"""
+        lo, hi = 0, len(children)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.row_keys[children[mid]] > key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def row_values(self, bill):
+        bill_id, cust_name, order_id, bill_date, payment_method, amount, emp_name, status = bill
+        bill_date_str = bill_date.strftime("%Y-%m-%d %H:%M:%S") if isinstance(bill_date, datetime) else str(bill_date)
+        return (bill_id, cust_name, order_id, bill_date_str, payment_method, f"{amount:.2f}", emp_name, status)
+
+    def restripe(self):
+        for i, iid in enumerate(self.tree.get_children()):
+            self.tree.item(iid, tags=('evenrow' if i % 2 == 0 else 'oddrow',))
@@ -1,14 +1,49 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db_connection import db
+from db_connection import db, executor, change_feed
 from datetime import datetime
 
+ORDER_CARD_COLUMNS = """
+    SELECT o.order_id, o.order_date, c.customer_name,
+           o.kitchen_status, o.total_price,
+           GROUP_CONCAT(CONCAT(m.name, ' (x', oi.qty, ')') SEPARATOR ', ') as items
+    FROM orders o
+    JOIN customer c ON o.customer_id = c.customer_id
+    JOIN order_items oi ON o.order_id = oi.order_id
+    JOIN menu m ON oi.menu_id = m.menu_id
+"""
+
+PENDING_ORDERS_QUERY = ORDER_CARD_COLUMNS + """
+    WHERE (o.kitchen_status != 'Completed' OR o.kitchen_status IS NULL)
+      AND EXISTS (SELECT 1 FROM bill b WHERE b.order_id = o.order_id)
+    GROUP BY o.order_id
+    ORDER BY o.order_date ASC
+"""
+
+PENDING_ORDERS_BY_STATUS_QUERY = ORDER_CARD_COLUMNS + """
+    WHERE o.kitchen_status = %s
+      AND EXISTS (SELECT 1 FROM bill b WHERE b.order_id = o.order_id)
+    GROUP BY o.order_id
+    ORDER BY o.order_date ASC
+"""
+
+COMPLETED_ORDERS_QUERY = ORDER_CARD_COLUMNS + """
+    WHERE o.kitchen_status = 'Completed'
+    GROUP BY o.order_id
+    ORDER BY o.order_date DESC
+    LIMIT 20
+"""
+
+
 class KitchenTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
+        self.activated = False
         self.setup_ui()
         self.load_orders()
+        # New POS orders and other stations' status changes arrive through the change feed
+        self.feed = change_feed.subscribe(self, ["orders"], self.on_order_changes)
 
     def setup_ui(self):
         """Setup the kitchen interface"""
@@ -21,6 +56,10 @@ class KitchenTab(tk.Frame):
         header_frame.pack(fill="x", pady=(0, 10))
 
         tk.Label(header_frame, text="🍳 Kitchen Orders", font=("Arial", 18, "bold")).pack(side="left")
+
+        # Shown while the last load failed; the cards already on screen stay as they were
+        self.retry_button = tk.Button(header_frame, text="Retry", command=self.load_orders)
+        self.load_error_label = tk.Label(header_frame, font=("Arial", 10), fg="red")
        
 
         # Status filter
@@ -86,6 +125,16 @@ class KitchenTab(tk.Frame):
         self.completed_orders_frame = tk.Frame(self.completed_canvas, bg="white")
         self.completed_canvas_window = self.completed_canvas.create_window((0, 0), window=self.completed_orders_frame, anchor="nw")
 
+        # Keyed model of the cards on screen: pane -> {order_id: card}, in display order
+        self.pane_frames = {"pending": self.pending_orders_frame, "completed": self.completed_orders_frame}
+        self.order_cards = {"pending": {}, "completed": {}}
+        self.empty_labels = {
+            "pending": tk.Label(self.pending_orders_frame, text="No pending orders",
+                                font=("Arial", 12), fg="gray", pady=20, bg="white"),
+            "completed": tk.Label(self.completed_orders_frame, text="No completed orders",
+                                  font=("Arial", 12), fg="gray", pady=20, bg="white"),
+        }
+
         # Bind canvas configuration to update scroll region
         self.pending_orders_frame.bind("<Configure>", self.on_pending_frame_configure)
         self.completed_orders_frame.bind("<Configure>", self.on_completed_frame_configure)
@@ -98,129 +147,214 @@ class KitchenTab(tk.Frame):
         """Update scroll region when completed frame size changes"""
         self.completed_canvas.configure(scrollregion=self.completed_canvas.bbox("all"))
 
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.activated:
+            self.load_orders()
+        self.activated = True
+        self.feed.resume()
+
+    def on_tab_deactivated(self):
+        self.feed.pause()
+
+    def destroy(self):
+        """Stop polling the change feed before the widgets go (the tab manager closes idle tabs)"""
+        self.feed.cancel()
+        super().destroy()
+
     def load_orders(self):
-        """Load orders from database"""
+        """Load orders from database in the background, then redraw both panes"""
+        executor.run(self, self.fetch_orders, self.status_var.get(),
+                     on_success=self.render_orders,
+                     on_error=self.on_load_failed)
+
+    def fetch_orders(self, status_filter):
+        """Runs on a worker thread: return (pending_orders, completed_orders, feed_mark)"""
+        # Read the feed position first so nothing written during the load is missed
+        mark = change_feed.current_mark()
+
+        # Build query based on filter
+        if status_filter == "All":
+            orders = db.execute_query(PENDING_ORDERS_QUERY, raise_errors=True)
+        else:
+            orders = db.execute_query(PENDING_ORDERS_BY_STATUS_QUERY, (status_filter,), raise_errors=True)
+
+        # Load completed orders separately
+        completed_orders = db.execute_query(COMPLETED_ORDERS_QUERY, raise_errors=True)
+        return orders, completed_orders, mark
+
+    def fetch_orders_by_id(self, order_ids):
+        """Runs on a worker thread: current rows for the given (billed) orders"""
+        placeholders = ", ".join(["%s"] * len(order_ids))
+        query = f"""{ORDER_CARD_COLUMNS}
+            WHERE o.order_id IN ({placeholders})
+              AND EXISTS (SELECT 1 FROM bill b WHERE b.order_id = o.order_id)
+            GROUP BY o.order_id
+        """
+        return order_ids, db.execute_query(query, tuple(order_ids), raise_errors=True)
+
+    def on_order_changes(self, changes):
+        """Change feed callback: re-read only the orders that changed"""
+        order_ids = sorted(changes.get("orders", ()))
+        if order_ids:
+            executor.run(self, self.fetch_orders_by_id, order_ids,
+                         on_success=self.merge_orders,
+                         on_error=self.on_load_failed)
+
+    def on_load_failed(self, error):
+        """
+        A load or refresh failed: keep the cards on screen and leave the feed
+        mark alone, and offer a full reload (which also picks up whatever a
+        failed refresh missed).
+        """
+        print(f"⚠️ Failed to load kitchen orders: {error}")
+        self.load_error_label.config(text=f"⚠️ Could not load orders: {error}")
+        self.retry_button.pack(side="right")
+        self.load_error_label.pack(side="right", padx=10)
+
+    def clear_load_error(self):
+        self.load_error_label.pack_forget()
+        self.retry_button.pack_forget()
+
+    def merge_orders(self, result):
+        """Fold re-read orders into both panes (through the same keyed diff as a full load)"""
+        order_ids, rows = result
+        pending = {order_id: card.order for order_id, card in self.order_cards["pending"].items()}
+        completed = {order_id: card.order for order_id, card in self.order_cards["completed"].items()}
+        for order_id in order_ids:
+            pending.pop(order_id, None)
+            completed.pop(order_id, None)
+
+        status_filter = self.status_var.get()
+        for order in rows:
+            status = order['kitchen_status'] or "Received"
+            if status == "Completed":
+                completed[order['order_id']] = order
+            elif status_filter == "All" or status == status_filter:
+                pending[order['order_id']] = order
+
+        self.sync_pane("pending", sorted(pending.values(), key=lambda o: o['order_date']))
+        self.sync_pane("completed", sorted(completed.values(), key=lambda o: o['order_date'], reverse=True)[:20])
+
+    def render_orders(self, result):
+        """Bring both panes in line with freshly fetched rows, touching only cards that changed"""
+        orders, completed_orders, mark = result
+        self.feed.mark = mark
+        self.clear_load_error()
         try:
-            # Clear existing orders
-            for widget in self.pending_orders_frame.winfo_children():
-                widget.destroy()
-            for widget in self.completed_orders_frame.winfo_children():
-                widget.destroy()
+            self.sync_pane("pending", orders)
+            self.sync_pane("completed", completed_orders)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to display orders: {str(e)}")
 
-            # Build query based on filter
-            status_filter = self.status_var.get()
-            
-            if status_filter == "All":
-                query = """
-                    SELECT o.order_id, o.order_date, c.customer_name, 
-                           o.kitchen_status, o.total_price,
-                           GROUP_CONCAT(CONCAT(m.name, ' (x', oi.qty, ')') SEPARATOR ', ') as items
-                    FROM orders o
-                    JOIN customer c ON o.customer_id = c.customer_id
-                    JOIN order_items oi ON o.order_id = oi.order_id
-                    JOIN menu m ON oi.menu_id = m.menu_id
-                    WHERE o.kitchen_status != 'Completed' OR o.kitchen_status IS NULL
-                    GROUP BY o.order_id
-                    ORDER BY o.order_date ASC
-                """
-                orders = db.execute_query(query)
-            else:
-                query = """
-                    SELECT o.order_id, o.order_date, c.customer_name, 
-                           o.kitchen_status, o.total_price,
-                           GROUP_CONCAT(CONCAT(m.name, ' (x', oi.qty, ')') SEPARATOR ', ') as items
-                    FROM orders o
-                    JOIN customer c ON o.customer_id = c.customer_id
-                    JOIN order_items oi ON o.order_id = oi.order_id
-                    JOIN menu m ON oi.menu_id = m.menu_id
-                    WHERE o.kitchen_status = %s
-                    GROUP BY o.order_id
-                    ORDER BY o.order_date ASC
-                """
-                orders = db.execute_query(query, (status_filter,))
-
-            # Load completed orders separately
-            completed_query = """
-                SELECT o.order_id, o.order_date, c.customer_name, 
-                       o.kitchen_status, o.total_price,
-                       GROUP_CONCAT(CONCAT(m.name, ' (x', oi.qty, ')') SEPARATOR ', ') as items
-                FROM orders o
-                JOIN customer c ON o.customer_id = c.customer_id
-                JOIN order_items oi ON o.order_id = oi.order_id
-                JOIN menu m ON oi.menu_id = m.menu_id
-                WHERE o.kitchen_status = 'Completed'
-                GROUP BY o.order_id
-                ORDER BY o.order_date DESC
-                LIMIT 20
-            """
-            completed_orders = db.execute_query(completed_query)
-
-            if orders:
-                self.display_orders(orders, self.pending_orders_frame, False)
-            else:
-                no_orders_label = tk.Label(self.pending_orders_frame, text="No pending orders", 
-                                          font=("Arial", 12), fg="gray", pady=20, bg="white")
-                no_orders_label.pack()
-
-            if completed_orders:
-                self.display_orders(completed_orders, self.completed_orders_frame, True)   
-            else:
-                no_completed_label = tk.Label(self.completed_orders_frame, text="No completed orders", 
-                                            font=("Arial", 12), fg="gray", pady=20, bg="white")
-                no_completed_label.pack()
-
-           
+    def sync_pane(self, pane, orders):
+        """
+        Keyed diff of one pane: cards are kept per order_id, so new orders get
+        a card, changed ones are updated in place and vanished ones removed.
+        """
+        cards = self.order_cards[pane]
+        wanted = {order['order_id'] for order in orders}
 
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Failed to load orders: {str(e)}")
+        for order_id in [order_id for order_id in cards if order_id not in wanted]:
+            cards.pop(order_id).destroy()
 
-    def display_orders(self, orders, parent_frame, is_completed):
-        """Display orders in the given frame"""
+        previous = None
         for order in orders:
-            # Create order frame
-            order_frame = tk.Frame(parent_frame, relief="solid", borderwidth=1, padx=10, pady=10, bg="white")
-            order_frame.pack(fill="x", pady=5, padx=5)
-
-            # Order header
-            header_frame = tk.Frame(order_frame, bg="white")
-            header_frame.pack(fill="x")
-
-            tk.Label(header_frame, text=f"Order #{order['order_id']}", 
-                    font=("Arial", 12, "bold"), bg="white").pack(side="left")
-            
-            tk.Label(header_frame, text=f"Customer: {order['customer_name']}", 
-                    font=("Arial", 10), bg="white").pack(side="left", padx=(20, 0))
-
-            # Order details
-            details_frame = tk.Frame(order_frame, bg="white")
-            details_frame.pack(fill="x", pady=5)
-
-            # Format order date
-            order_date = order['order_date']
-            if isinstance(order_date, datetime):
-                date_str = order_date.strftime("%Y-%m-%d %H:%M")
-            else:
-                date_str = str(order_date)
-
-            tk.Label(details_frame, text=f"Time: {date_str}", font=("Arial", 9), bg="white").pack(anchor="w")
-            tk.Label(details_frame, text=f"Items: {order['items']}", font=("Arial", 9), bg="white").pack(anchor="w")
-            tk.Label(details_frame, text=f"Total: ${order['total_price']:.2f}", 
-                    font=("Arial", 10, "bold"), bg="white").pack(anchor="w")
-
-            # Status and actions
-            status_frame = tk.Frame(order_frame, bg="white")
-            status_frame.pack(fill="x", pady=(5, 0))
-
-            current_status = order['kitchen_status'] or "Received"
-           
-            status_color = self.get_status_color(current_status)
-            
-            status_label = tk.Label(status_frame, text=f"Status: {current_status}", 
-                                   font=("Arial", 10, "bold"), fg=status_color, bg="white")
-            status_label.pack(side="left")
-
-            if not is_completed:
-                self.add_action_buttons(status_frame, order['order_id'], current_status)
+            card = cards.get(order['order_id'])
+            if card is None:
+                card = self.create_order_card(self.pane_frames[pane], order, pane == "completed")
+                if previous is not None:
+                    card.pack(fill="x", pady=5, padx=5, after=previous)
+                elif cards:
+                    card.pack(fill="x", pady=5, padx=5, before=next(iter(cards.values())))
+                else:
+                    card.pack(fill="x", pady=5, padx=5)
+            elif card.order != order:
+                self.update_order_card(card, order)
+            cards[order['order_id']] = card
+            previous = card
+
+        # Keep the dict in display order so the next insert lands in the right place
+        self.order_cards[pane] = {order['order_id']: cards[order['order_id']] for order in orders}
+        self.show_empty_label(pane)
+
+    def show_empty_label(self, pane):
+        label = self.empty_labels[pane]
+        if self.order_cards[pane]:
+            label.pack_forget()
+        elif not label.winfo_ismapped():
+            label.pack()
+
+    def create_order_card(self, parent_frame, order, is_completed):
+        """Build one order card; its changing parts are kept as attributes for update_order_card()"""
+        # Create order frame
+        order_frame = tk.Frame(parent_frame, relief="solid", borderwidth=1, padx=10, pady=10, bg="white")
+        order_frame.order = dict(order)
+        order_frame.is_completed = is_completed
+
+        # Order header
+        header_frame = tk.Frame(order_frame, bg="white")
+        header_frame.pack(fill="x")
+
+        tk.Label(header_frame, text=f"Order #{order['order_id']}", 
+                font=("Arial", 12, "bold"), bg="white").pack(side="left")
+        
+        order_frame.customer_label = tk.Label(header_frame, text=f"Customer: {order['customer_name']}", 
+                                              font=("Arial", 10), bg="white")
+        order_frame.customer_label.pack(side="left", padx=(20, 0))
+
+        # Order details
+        details_frame = tk.Frame(order_frame, bg="white")
+        details_frame.pack(fill="x", pady=5)
+
+        tk.Label(details_frame, text=f"Time: {self.format_order_date(order['order_date'])}",
+                 font=("Arial", 9), bg="white").pack(anchor="w")
+        order_frame.items_label = tk.Label(details_frame, text=f"Items: {order['items']}", font=("Arial", 9), bg="white")
+        order_frame.items_label.pack(anchor="w")
+        order_frame.total_label = tk.Label(details_frame, text=f"Total: ${order['total_price']:.2f}", 
+                                           font=("Arial", 10, "bold"), bg="white")
+        order_frame.total_label.pack(anchor="w")
+
+        # Status and actions
+        status_frame = tk.Frame(order_frame, bg="white")
+        status_frame.pack(fill="x", pady=(5, 0))
+
+        current_status = order['kitchen_status'] or "Received"
+        order_frame.status_label = tk.Label(status_frame, text=f"Status: {current_status}", 
+                                            font=("Arial", 10, "bold"), fg=self.get_status_color(current_status), bg="white")
+        order_frame.status_label.pack(side="left")
+
+        order_frame.button_frame = tk.Frame(status_frame, bg="white")
+        order_frame.button_frame.pack(side="right")
+        if not is_completed:
+            self.add_action_buttons(order_frame.button_frame, order['order_id'], current_status)
+
+        return order_frame
+
+    def update_order_card(self, card, order):
+        """Refresh the parts of an existing card whose data changed"""
+        old = card.order
+        if order['customer_name'] != old['customer_name']:
+            card.customer_label.config(text=f"Customer: {order['customer_name']}")
+        if order['items'] != old['items']:
+            card.items_label.config(text=f"Items: {order['items']}")
+        if order['total_price'] != old['total_price']:
+            card.total_label.config(text=f"Total: ${order['total_price']:.2f}")
+
+        current_status = order['kitchen_status'] or "Received"
+        if current_status != (old['kitchen_status'] or "Received"):
+            card.status_label.config(text=f"Status: {current_status}", fg=self.get_status_color(current_status))
+            for widget in card.button_frame.winfo_children():
+                widget.destroy()
+            if not card.is_completed:
+                self.add_action_buttons(card.button_frame, order['order_id'], current_status)
+
+        card.order = dict(order)
+
+    def format_order_date(self, order_date):
+        if isinstance(order_date, datetime):
+            return order_date.strftime("%Y-%m-%d %H:%M")
+        return str(order_date)
 
     def get_status_color(self, status):
         """Get color for status label"""
@@ -231,11 +365,8 @@ class KitchenTab(tk.Frame):
         }
         return colors.get(status, "black")
 
-    def add_action_buttons(self, parent, order_id, current_status):
+    def add_action_buttons(self, button_frame, order_id, current_status):
         """Add action buttons based on current status"""
-        button_frame = tk.Frame(parent, bg="white")
-        button_frame.pack(side="right")
-
         if current_status == "Received":
             start_btn = tk.Button(button_frame, text="Start Cooking", 
                                  command=lambda: self.update_order_status(order_id, "Cooking"),
@@ -250,40 +381,64 @@ class KitchenTab(tk.Frame):
 
 
     def update_order_status(self, order_id, new_status):
-        """Update order status in database"""
-        try:
-            print(f"DEBUG: Updating order {order_id} to status {new_status}")
-            
-            # Ensure database connection
-            if not db.connection or not db.connection.is_connected():
-                print("DEBUG: Reconnecting to database...")
-                if not db.connect():
-                    messagebox.showerror("Error", "Cannot connect to database")
-                    return
-            
-            query = "UPDATE orders SET kitchen_status = %s WHERE order_id = %s"
-            print(f"DEBUG: Executing query: {query} with params: ({new_status}, {order_id})")
-            
-            result = db.execute_query(query, (new_status, order_id))
-            print(f"DEBUG: Query result: {result}")
-            
-            if result is not None:
-                messagebox.showinfo("Success", f"Order #{order_id} status updated to {new_status}")
-                self.load_orders()  # Refresh the display
-            else:
-                # Try to get more detailed error
-                test_query = "SELECT 1"
-                test_result = db.execute_query(test_query)
-                if test_result is None:
-                    messagebox.showerror("Error", "Database connection lost. Please check your database server.")
-                else:
-                    messagebox.showerror("Error", "Failed to update order status. The order might not exist.")
-                
-        except Exception as e:
+        """Update order status in database (in the background)"""
+        print(f"DEBUG: Updating order {order_id} to status {new_status}")
+
+        def on_error(e):
             error_msg = f"Failed to update order: {str(e)}"
             print(f"DEBUG: Exception: {error_msg}")
             messagebox.showerror("Database Error", error_msg)
 
+        executor.run(self, self._write_order_status, order_id, new_status,
+                     on_success=lambda outcome: self._on_status_written(order_id, new_status, outcome),
+                     on_error=on_error)
+
+    def _write_order_status(self, order_id, new_status):
+        """Runs on a worker thread: returns ok, no_connection or failed"""
+        # No liveness check up front: the pool's keepalive keeps connections healthy
+        query = "UPDATE orders SET kitchen_status = %s WHERE order_id = %s"
+        print(f"DEBUG: Executing query: {query} with params: ({new_status}, {order_id})")
+
+        result = db.execute_query(query, (new_status, order_id), changes=[("orders", order_id)])
+        print(f"DEBUG: Query result: {result}")
+
+        if result is not None:
+            return "ok"
+
+        # Only on failure: find out whether the database is reachable at all
+        return "failed" if db.test_connection() else "no_connection"
+
+    def _on_status_written(self, order_id, new_status, outcome):
+        if outcome == "ok":
+            messagebox.showinfo("Success", f"Order #{order_id} status updated to {new_status}")
+            self.apply_status_change(order_id, new_status)
+        elif outcome == "no_connection":
+            messagebox.showerror("Error", "Database connection lost. Please check your database server.")
+        else:
+            messagebox.showerror("Error", "Failed to update order status. The order might not exist.")
+
+    def apply_status_change(self, order_id, new_status):
+        """Reflect a successful status update on the board without re-querying"""
+        card = self.order_cards["pending"].get(order_id)
+        if card is None:
+            self.load_orders()
+            return
+
+        order = dict(card.order, kitchen_status=new_status)
+        status_filter = self.status_var.get()
+        if new_status == "Completed" or (status_filter != "All" and status_filter != new_status):
+            del self.order_cards["pending"][order_id]
+            card.destroy()
+            self.show_empty_label("pending")
+        else:
+            self.update_order_card(card, order)
+
+        if new_status == "Completed":
+            # Completed pane is newest first and capped at 20, like its query
+            completed = [order] + [c.order for c in self.order_cards["completed"].values()]
+            completed.sort(key=lambda o: o['order_date'], reverse=True)
+            self.sync_pane("completed", completed[:20])
+
     def refresh_orders(self):
         """Refresh orders display"""
         self.load_orders()
\ No newline at end of file
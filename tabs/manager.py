@@ -1,12 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db_connection import create_connection
+from mysql.connector import Error
+from db_connection import create_connection, executor, change_feed, record_change
 from datetime import datetime
+from services.bills import BILL_COLUMNS
+
+PENDING_BILLS_QUERY = f"{BILL_COLUMNS} WHERE b.status = 'Pending' ORDER BY b.bill_date ASC"
+
+
+def _borrow_connection():
+    """A pooled connection for a worker thread; use it in a with block so it always goes back"""
+    conn = create_connection()
+    if conn is None:
+        raise Error("Cannot connect to database")
+    return conn
+
 
 class ManagerTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
+        self.activated = False
+        self.feed = None  # subscribed once the manager has logged in
         self.configure(bg="#23170e")  # Dark brown background
 
         
@@ -158,37 +173,100 @@ class ManagerTab(tk.Frame):
         # Bind click on Action column
         self.tree.bind("<Button-1>", self.on_tree_click)
 
-        # Load pending bills
+        # Load pending bills, then follow new cash sales through the change feed
         self.load_pending_bills()
+        self.feed = change_feed.subscribe(self, ["bill"], self.on_bill_changes)
+
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.feed is None:
+            return  # still behind the password screen
+        if self.activated:
+            self.load_pending_bills()
+        self.activated = True
+        self.feed.resume()
+
+    def on_tab_deactivated(self):
+        if self.feed is not None:
+            self.feed.pause()
+
+    def destroy(self):
+        """Stop polling the change feed before the widgets go (the tab manager closes idle tabs)"""
+        if self.feed is not None:
+            self.feed.cancel()
+        super().destroy()
 
     def load_pending_bills(self):
+        """Fetch pending bills in the background, then fill the table"""
+        executor.run(self, self.fetch_pending_bills,
+                     on_success=self._on_pending_loaded,
+                     on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load pending bills: {str(e)}"))
+
+    def _on_pending_loaded(self, result):
+        mark, pending_bills = result
+        if self.feed is not None:
+            self.feed.mark = mark
+        self.show_pending_rows(pending_bills)
+
+    def fetch_pending_bills(self):
+        """Runs on a worker thread - no Tk calls here"""
+        # Read the feed position first so nothing written during the load is missed
+        mark = change_feed.current_mark()
+        with _borrow_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(PENDING_BILLS_QUERY)
+            pending_bills = cursor.fetchall()
+            cursor.close()
+        return mark, pending_bills
+
+    def fetch_bills_by_id(self, bill_ids):
+        """Runs on a worker thread: current rows for the given bills"""
+        placeholders = ", ".join(["%s"] * len(bill_ids))
+        with _borrow_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{BILL_COLUMNS} WHERE b.bill_id IN ({placeholders})", tuple(bill_ids))
+            bills = cursor.fetchall()
+            cursor.close()
+        return bills
+
+    def on_bill_changes(self, changes):
+        """Change feed callback: re-read only the bills that changed"""
+        bill_ids = sorted(changes.get("bill", ()))
+        if bill_ids:
+            executor.run(self, self.fetch_bills_by_id, bill_ids,
+                         on_success=self.merge_pending_rows,
+                         on_error=lambda e: print(f"⚠️ Failed to refresh pending bills: {e}"))
+
+    def merge_pending_rows(self, bills):
+        """Append new pending bills and drop the ones that got paid elsewhere"""
+        for bill in sorted(bills, key=lambda b: b[3]):
+            iid = str(bill[0])
+            if bill[7] != 'Pending':
+                if self.tree.exists(iid):
+                    self.tree.delete(iid)
+            elif self.tree.exists(iid):
+                self.tree.item(iid, values=self.row_values(bill))
+            else:
+                self.tree.insert("", "end", iid=iid, values=self.row_values(bill))
+        for i, iid in enumerate(self.tree.get_children()):
+            self.tree.item(iid, tags=('evenrow' if i % 2 == 0 else 'oddrow',))
+
+    def row_values(self, bill):
+        """Table values for a bill row, with "✔" in the Action column"""
+        bill_id, cust_name, order_id, bill_date, payment_method, amount, emp_name, status = bill
+        bill_date_str = bill_date.strftime("%Y-%m-%d %H:%M:%S") if isinstance(bill_date, datetime) else str(bill_date)
+        return (bill_id, cust_name, order_id, bill_date_str, payment_method, f"{amount:.2f}", emp_name, "✔")
+
+    def show_pending_rows(self, pending_bills):
+        self.pending_bills = pending_bills
         for row in self.tree.get_children():
             self.tree.delete(row)
 
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT b.bill_id, c.customer_name, b.order_id, b.bill_date, b.payment_method,
-                   b.bill_amount, e.name, b.status
-            FROM bill b
-            JOIN customer c ON b.customer_id = c.customer_id
-            JOIN employees e ON b.employee_id = e.employee_id
-            WHERE b.status = 'Pending'
-            ORDER BY b.bill_date ASC
-        """)
-        self.pending_bills = cursor.fetchall()
-        conn.close()
-
         for i, bill in enumerate(self.pending_bills):
-            bill_id, cust_name, order_id, bill_date, payment_method, amount, emp_name, status = bill
-            bill_date_str = bill_date.strftime("%Y-%m-%d %H:%M:%S") if isinstance(bill_date, datetime) else str(bill_date)
             tag = 'evenrow' if i % 2 == 0 else 'oddrow'
 
             # Insert row, set Action column text as "✔"
-            self.tree.insert("", "end", iid=str(bill_id),
-                             values=(bill_id, cust_name, order_id, bill_date_str,
-                                     payment_method, f"{amount:.2f}", emp_name, "✔"),
-                             tags=(tag,))
+            self.tree.insert("", "end", iid=str(bill[0]), values=self.row_values(bill), tags=(tag,))
 
     def on_tree_click(self, event):
         region = self.tree.identify("region", event.x, event.y)
@@ -205,11 +283,23 @@ class ManagerTab(tk.Frame):
             self.mark_as_paid(row_id)
 
     def mark_as_paid(self, bill_id):
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE bill SET status='Paid' WHERE bill_id=%s", (bill_id,))
-        conn.commit()
-        conn.close()
-
-        self.tree.delete(bill_id)
-        messagebox.showinfo("Success", f"Bill {bill_id} marked as Paid!")
\ No newline at end of file
+        def on_paid(_):
+            if self.tree.exists(bill_id):
+                self.tree.delete(bill_id)
+            messagebox.showinfo("Success", f"Bill {bill_id} marked as Paid!")
+
+        executor.run(self, self._write_paid, bill_id,
+                     on_success=on_paid,
+                     on_error=lambda e: messagebox.showerror("Database Error", f"Failed to update bill: {str(e)}"))
+
+    def _write_paid(self, bill_id):
+        """Runs on a worker thread"""
+        change_feed.ensure_table()
+        # Closing returns the connection to the pool, which rolls back anything left uncommitted
+        with _borrow_connection() as conn:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            cursor.execute("UPDATE bill SET status='Paid' WHERE bill_id=%s", (bill_id,))
+            record_change(cursor, "bill", bill_id)
+            conn.commit()
+            cursor.close()
\ No newline at end of file
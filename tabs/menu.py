@@ -3,11 +3,17 @@ import os
 import shutil
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
-from db_connection import create_connection
+from db_connection import db, executor
 from ui.theme import COLORS
+from ui.virtual_grid import VirtualCardGrid
+from ui.debounce import Debouncer
+from ui.thumbnails import thumbnails
+from services.menu_search import MenuSearchIndex, MENU_QUERY
+from services.models import Menu
 
 FALLBACK_IMAGE = "images/image.png"  # default fallback image
+THUMBNAIL_SIZE = 180
+SEARCH_DEBOUNCE_MS = 150  # wait this long after the last keystroke before filtering
 
 # Theme
 CARD_BG = "#124035"          # Dark green for cards (unchanged)
@@ -19,8 +25,8 @@ class MenuTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent, bg=BACKGROUND_COLOR)
 
-        self.menu_items = []
-        self.image_cache = {}
+        self.menu = Menu()
+        self.activated = False
 
         # Configure ttk styles to match our theme
         self.configure_styles()
@@ -33,23 +39,22 @@ class MenuTab(tk.Frame):
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(top_frame, textvariable=self.search_var, width=25, style="Custom.TEntry")
         search_entry.pack(side="left", padx=8)
-        self.search_var.trace_add("write", lambda *_: self.populate_menu())
+        self.search_debouncer = Debouncer(self, SEARCH_DEBOUNCE_MS, self.apply_search)
+        self.search_var.trace_add("write", self.search_debouncer)
 
         add_btn = ttk.Button(top_frame, text="➕ Add Item", command=self.add_item, style="Custom.TButton")
         add_btn.pack(side="right")
 
-        canvas = tk.Canvas(self, bg=BACKGROUND_COLOR, highlightthickness=0)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=canvas.yview, style="Custom.Vertical.TScrollbar")
-        scrollbar.pack(side="right", fill="y")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.menu_frame = tk.Frame(canvas, bg=BACKGROUND_COLOR)
-        canvas.create_window((0, 0), window=self.menu_frame, anchor="nw")
-        self.menu_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        # Virtualized card grid: only on-screen cards exist, and they are recycled on scroll
+        self.search_index = MenuSearchIndex()
+        self.card_grid = VirtualCardGrid(self, self.create_card, self.bind_card, columns=3,
+                                         card_height=380, card_padx=40, card_pady=24,
+                                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                                         scrollbar_style="Custom.Vertical.TScrollbar")
+        self.card_grid.pack(fill="both", expand=True)
+        self.menu_frame = self.card_grid
 
         self.load_menu_from_db()
-        self.populate_menu()
 
     def center_window(self, window):
         """
@@ -163,14 +168,40 @@ class MenuTab(tk.Frame):
         enforce_theme(self.menu_frame)
 
     # --- Load menu items ---
-    def load_menu_from_db(self):
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT menu_id, name, image, price, category, status FROM menu ORDER BY category, name")
-        self.menu_items = cursor.fetchall()
-        cursor.execute("SELECT DISTINCT category FROM menu")
-        self.categories = [row[0] for row in cursor.fetchall()]
-        conn.close()
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.activated:
+            self.load_menu_from_db(redraw_if_unchanged=False)
+        self.activated = True
+
+    def on_tab_deactivated(self):
+        self.search_debouncer.flush()
+
+    def load_menu_from_db(self, redraw_if_unchanged=True):
+        """Fetch the menu in the background, then redraw the grid"""
+        executor.run(self, self._fetch_menu,
+                     on_success=lambda result: self._on_menu_loaded(result, redraw_if_unchanged),
+                     on_error=lambda e: messagebox.showerror("Database Error", f"Failed to load menu: {str(e)}"))
+
+    def _fetch_menu(self):
+        """Runs on a worker thread - no Tk calls here"""
+        return Menu.from_rows(db.execute_query(MENU_QUERY, cache=True, dictionary=False, raise_errors=True))
+
+    def _on_menu_loaded(self, result, redraw_if_unchanged=True):
+        menu = result
+        if menu == self.menu and not redraw_if_unchanged:
+            return  # keep the grid (and its scroll position) as it is
+        self.menu = menu
+        self.populate_menu()
+
+    def _write_menu(self, query, params, image_src=None, image_dest=None):
+        """Runs on a worker thread: copy the uploaded image (if any) and run one write"""
+        if image_src and image_dest:
+            os.makedirs(os.path.dirname(image_dest), exist_ok=True)
+            shutil.copy(image_src, image_dest)
+
+        # Through execute_query so the cached menu reads are invalidated
+        db.execute_query(query, params, raise_errors=True)
 
     # --- Add Item ---
     def add_item(self):
@@ -214,7 +245,7 @@ class MenuTab(tk.Frame):
 
         tk.Label(win, text="Category:", bg=CARD_BG, fg=TEXT_COLOR).pack(anchor="w", padx=10, pady=(10, 0))
         cat_var = tk.StringVar()
-        ttk.Combobox(win, textvariable=cat_var, values=self.categories, state="readonly", style="Custom.TCombobox").pack(fill="x", padx=10, pady=5)
+        ttk.Combobox(win, textvariable=cat_var, values=self.menu.categories, state="readonly", style="Custom.TCombobox").pack(fill="x", padx=10, pady=5)
 
         tk.Label(win, text="Status:", bg=CARD_BG, fg=TEXT_COLOR).pack(anchor="w", padx=10, pady=(10, 0))
         status_var = tk.StringVar(value="Available")
@@ -228,37 +259,37 @@ class MenuTab(tk.Frame):
 
             # Save image to images/<menu_name>/image.ext
             saved_img_path = FALLBACK_IMAGE
+            image_src = None
             if img_var.get():
                 folder = os.path.join("images", name_var.get().replace(" ", "_"))
-                os.makedirs(folder, exist_ok=True)
                 ext = os.path.splitext(img_var.get())[1]
                 saved_img_path = os.path.join(folder, f"image{ext}")
-                shutil.copy(img_var.get(), saved_img_path)
+                image_src = img_var.get()
 
-            conn = create_connection()
-            cursor = conn.cursor()
-            cursor.execute(
+            def on_saved(_):
+                self.load_menu_from_db()
+                win.destroy()
+                messagebox.showinfo("Success", "New item added successfully!")
+
+            executor.run(
+                self, self._write_menu,
                 "INSERT INTO menu (name, price, image, category, status) VALUES (%s, %s, %s, %s, %s)",
-                (name_var.get(), price_var.get(), saved_img_path, cat_var.get(), status_var.get())
+                (name_var.get(), price_var.get(), saved_img_path, cat_var.get(), status_var.get()),
+                image_src, saved_img_path,
+                on_success=on_saved,
+                on_error=lambda e: messagebox.showerror("Database Error", f"Failed to add item: {str(e)}")
             )
-            conn.commit()
-            conn.close()
-
-            self.load_menu_from_db()
-            self.populate_menu()
-            win.destroy()
-            messagebox.showinfo("Success", "New item added successfully!")
 
         ttk.Button(win, text="✅ Add", command=save_new, style="Custom.TButton").pack(pady=15)
         ttk.Button(win, text="❌ Cancel", command=win.destroy, style="Custom.TButton").pack()
 
     def edit_item(self, menu_id):
-        item = next((i for i in self.menu_items if i[0] == menu_id), None)
+        item = self.menu.get(menu_id)
         if not item:
             messagebox.showerror("Error", "Menu item not found!")
             return
 
-        menu_id, name, image_path, price, category, status = item
+        name, image_path, price, category, status = item.name, item.image, item.price, item.category, item.status
 
         win = tk.Toplevel(self)
         win.title("Edit Menu Item")
@@ -300,7 +331,7 @@ class MenuTab(tk.Frame):
 
         tk.Label(win, text="Category:", bg=CARD_BG, fg=TEXT_COLOR).pack(anchor="w", padx=10, pady=(10, 0))
         cat_var = tk.StringVar(value=category)
-        ttk.Combobox(win, textvariable=cat_var, values=self.categories, state="readonly", style="Custom.TCombobox").pack(fill="x", padx=10, pady=5)
+        ttk.Combobox(win, textvariable=cat_var, values=self.menu.categories, state="readonly", style="Custom.TCombobox").pack(fill="x", padx=10, pady=5)
 
         tk.Label(win, text="Status:", bg=CARD_BG, fg=TEXT_COLOR).pack(anchor="w", padx=10, pady=(10, 0))
         status_var = tk.StringVar(value=status)
@@ -309,146 +340,135 @@ class MenuTab(tk.Frame):
         # Save changes
         def save_changes():
             saved_img_path = image_path
+            image_src = None
             if img_var.get() != image_path and img_var.get():
                 folder = os.path.join("images", name_var.get().replace(" ", "_"))
-                os.makedirs(folder, exist_ok=True)
                 ext = os.path.splitext(img_var.get())[1]
                 saved_img_path = os.path.join(folder, f"image{ext}")
-                shutil.copy(img_var.get(), saved_img_path)
+                image_src = img_var.get()
 
-            conn = create_connection()
-            cursor = conn.cursor()
-            cursor.execute(
+            def on_saved(_):
+                self.load_menu_from_db()
+                win.destroy()
+                messagebox.showinfo("Success", "Item updated successfully!")
+
+            executor.run(
+                self, self._write_menu,
                 "UPDATE menu SET name=%s, price=%s, image=%s, category=%s, status=%s WHERE menu_id=%s",
-                (name_var.get(), price_var.get(), saved_img_path, cat_var.get(), status_var.get(), menu_id)
+                (name_var.get(), price_var.get(), saved_img_path, cat_var.get(), status_var.get(), menu_id),
+                image_src, saved_img_path,
+                on_success=on_saved,
+                on_error=lambda e: messagebox.showerror("Database Error", f"Failed to update item: {str(e)}")
             )
-            conn.commit()
-            conn.close()
-
-            self.load_menu_from_db()
-            self.populate_menu()
-            win.destroy()
-            messagebox.showinfo("Success", "Item updated successfully!")
 
         ttk.Button(win, text="✅ Save", command=save_changes, style="Custom.TButton").pack(pady=15)
         ttk.Button(win, text="❌ Cancel", command=win.destroy, style="Custom.TButton").pack()
 
     def delete_item(self, menu_id):
         if messagebox.askyesno("Delete", "Are you sure you want to delete this item?"):
-            conn = create_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM menu WHERE menu_id=%s", (menu_id,))
-            conn.commit()
-            conn.close()
-            self.load_menu_from_db()
-            self.populate_menu()
-
-    def populate_menu(self):
-        for widget in self.menu_frame.winfo_children():
-            widget.destroy()
-
-        search_text = self.search_var.get().lower()
-        filtered_items = [item for item in self.menu_items if search_text in item[1].lower()]
-
-        current_category = None
-        row_frame = None
-        item_count = 0
-
-        for menu_id, name, image_path, price, category, status in filtered_items:
-            # Create category header - dark brown background
-            if category != current_category:
-                current_category = category
-                item_count = 0
-                category_label = tk.Label(self.menu_frame, text=category, font=("Arial", 18, "bold"),
-                         background=BACKGROUND_COLOR, foreground=TEXT_COLOR)
-                category_label.pack(pady=(20, 15), fill="x")
-
-                row_frame = tk.Frame(self.menu_frame, bg=BACKGROUND_COLOR)
-                row_frame.pack(fill="x", padx=70, pady=60)
-
-            if item_count % 3 == 0:
-                row_frame = tk.Frame(self.menu_frame, bg=BACKGROUND_COLOR)
-                row_frame.pack(fill="x", padx=25, pady=20)
-
-            card = tk.Frame(row_frame, relief="solid", bg=CARD_BG, bd=2,
-                          highlightbackground=BORDER_COLOR, highlightthickness=1)
-            card.pack(side="left", fill="both", expand=True, padx=55, pady=48)
-            card.configure(width=320, height=380)
-            # Mark this frame as a card so the nuclear routine can detect and skip it
-            setattr(card, "is_card", True)
-
-            # EVERYTHING inside the card should remain GREEN
-            inner_frame = tk.Frame(card, bg=CARD_BG, padx=15, pady=15)
-            inner_frame.pack(fill="both", expand=True)
-
-            # Image
-            if image_path not in self.image_cache:
-                img_path = image_path if os.path.exists(image_path) else FALLBACK_IMAGE
-                try:
-                    img = Image.open(img_path)
-                    img.thumbnail((180, 180))
-                    self.image_cache[image_path] = ImageTk.PhotoImage(img)
-                except:
-                    self.image_cache[image_path] = None
-
-            content_frame = tk.Frame(inner_frame, bg=CARD_BG)
-            content_frame.pack(fill="both", expand=True)
-
-            if self.image_cache[image_path]:
-                img_label = tk.Label(content_frame, image=self.image_cache[image_path], bg=CARD_BG)
-                img_label.pack(pady=12)
-
-            info_frame = tk.Frame(content_frame, bg=CARD_BG)
-            info_frame.pack(fill="x", pady=12)
-
-            # Name label - GREEN background, GOLDEN text
-            name_label = tk.Label(info_frame, text=name, font=("Arial", 14, "bold"),
-                                bg=CARD_BG, fg=TEXT_COLOR, wraplength=260)
-            name_label.pack(pady=(8, 5))
-
-            # Price label - GREEN background, GOLDEN text
-            price_label = tk.Label(info_frame, text=f"BHD {price:.2f}", font=("Arial", 13, "bold"),
-                                 bg=CARD_BG, fg=TEXT_COLOR)
-            price_label.pack(pady=(5, 10))
-
-            bottom_frame = tk.Frame(info_frame, bg=CARD_BG)
-            bottom_frame.pack(fill="x", pady=(8, 0))
-
-            # Status Badge - keep clear green/red
-            status_color = "#27ae60" if status.lower() == "available" else "#e74c3c"
-            status_text = "AVAILABLE" if status.lower() == "available" else "UNAVAILABLE"
-
-            status_label = tk.Label(
-                bottom_frame,
-                text=status_text,
-                bg=status_color,
-                fg="white",
-                font=("Arial", 10, "bold"),
-                padx=20,
-                pady=6,
-                relief="raised",
-                bd=2
+            executor.run(
+                self, self._write_menu,
+                "DELETE FROM menu WHERE menu_id=%s", (menu_id,),
+                on_success=lambda _: self.load_menu_from_db(),
+                on_error=lambda e: messagebox.showerror("Database Error", f"Failed to delete item: {str(e)}")
             )
-            status_label.pack(side="left", padx=(0, 15))
-
-            btn_frame = tk.Frame(bottom_frame, bg=CARD_BG)
-            btn_frame.pack(side="right")
-
-            edit_btn = ttk.Button(btn_frame, text="📝", width=5,
-                                command=lambda mid=menu_id: self.edit_item(mid), style="Custom.TButton")
-            edit_btn.pack(side="left", padx=4)
 
-            delete_btn = ttk.Button(btn_frame, text="❌", width=5,
-                                  command=lambda mid=menu_id: self.delete_item(mid), style="Custom.TButton")
-            delete_btn.pack(side="left", padx=4)
+    def populate_menu(self):
+        """Rebuild the search index and hand the items to the grid; called when the menu is (re)loaded"""
+        self.search_index = MenuSearchIndex(self.menu)
+        self.card_grid.set_items(self.menu)
+        self.apply_search()
 
-            item_count += 1
+        # Keep the nuclear routine (but it no longer recolors card contents)
+        self.after(200, self._nuclear_force_green_cards)
 
-        remaining_items = item_count % 3
-        if remaining_items > 0:
-            for _ in range(3 - remaining_items):
-                filler = tk.Frame(row_frame, bg=BACKGROUND_COLOR)
-                filler.pack(side="left", fill="both", expand=True, padx=12, pady=12)
+    def apply_search(self):
+        """Show only the cards matching the current search text"""
+        self.card_grid.filter(self.search_index.search(self.search_var.get()))
 
-        # Keep the nuclear routine (but it no longer recolors card contents)
-        self.after(200, self._nuclear_force_green_cards)
\ No newline at end of file
+    def show_image(self, card, image_path, photo):
+        """Put a thumbnail on a card, unless the card has been recycled for another item"""
+        if card.image_path != image_path:
+            return
+        if photo:
+            card.img_label.configure(image=photo)
+            card.img_label.image = photo  # keep it alive if the cache evicts it
+            card.img_label.pack(pady=12, before=card.info_frame)
+        else:
+            card.img_label.pack_forget()
+
+    def create_card(self, parent):
+        """Build an empty card; the grid fills it through bind_card() and recycles it on scroll"""
+        card = tk.Frame(parent, relief="solid", bg=CARD_BG, bd=2,
+                      highlightbackground=BORDER_COLOR, highlightthickness=1)
+        # Mark this frame as a card so the nuclear routine can detect and skip it
+        setattr(card, "is_card", True)
+
+        # EVERYTHING inside the card should remain GREEN
+        inner_frame = tk.Frame(card, bg=CARD_BG, padx=15, pady=15)
+        inner_frame.pack(fill="both", expand=True)
+
+        content_frame = tk.Frame(inner_frame, bg=CARD_BG)
+        content_frame.pack(fill="both", expand=True)
+
+        card.img_label = tk.Label(content_frame, bg=CARD_BG)
+        card.img_label.pack(pady=12)
+
+        card.info_frame = tk.Frame(content_frame, bg=CARD_BG)
+        card.info_frame.pack(fill="x", pady=12)
+
+        # Name label - GREEN background, GOLDEN text
+        card.name_label = tk.Label(card.info_frame, font=("Arial", 14, "bold"),
+                                   bg=CARD_BG, fg=TEXT_COLOR, wraplength=260)
+        card.name_label.pack(pady=(8, 5))
+
+        # Price label - GREEN background, GOLDEN text
+        card.price_label = tk.Label(card.info_frame, font=("Arial", 13, "bold"),
+                                    bg=CARD_BG, fg=TEXT_COLOR)
+        card.price_label.pack(pady=(5, 10))
+
+        bottom_frame = tk.Frame(card.info_frame, bg=CARD_BG)
+        bottom_frame.pack(fill="x", pady=(8, 0))
+
+        # Status Badge - keep clear green/red
+        card.status_label = tk.Label(
+            bottom_frame,
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=20,
+            pady=6,
+            relief="raised",
+            bd=2
+        )
+        card.status_label.pack(side="left", padx=(0, 15))
+
+        btn_frame = tk.Frame(bottom_frame, bg=CARD_BG)
+        btn_frame.pack(side="right")
+
+        card.edit_btn = ttk.Button(btn_frame, text="📝", width=5, style="Custom.TButton")
+        card.edit_btn.pack(side="left", padx=4)
+
+        card.delete_btn = ttk.Button(btn_frame, text="❌", width=5, style="Custom.TButton")
+        card.delete_btn.pack(side="left", padx=4)
+
+        return card
+
+    def bind_card(self, card, item):
+        """Fill a (possibly recycled) card with one menu row"""
+        menu_id, image_path = item.menu_id, item.image
+
+        # Placeholder first; the real thumbnail is swapped in once it is decoded
+        card.image_path = image_path
+        self.show_image(card, image_path, thumbnails.placeholder(THUMBNAIL_SIZE))
+        thumbnails.request(card, image_path, THUMBNAIL_SIZE,
+                           lambda photo: self.show_image(card, image_path, photo))
+
+        card.name_label.configure(text=item.name)
+        card.price_label.configure(text=f"BHD {item.price:.2f}")
+
+        available = item.status.lower() == "available"
+        card.status_label.configure(text="AVAILABLE" if available else "UNAVAILABLE",
+                                    bg="#27ae60" if available else "#e74c3c")
+
+        card.edit_btn.configure(command=lambda: self.edit_item(menu_id))
+        card.delete_btn.configure(command=lambda: self.delete_item(menu_id))
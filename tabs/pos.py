@@ -1,11 +1,19 @@
 from datetime import datetime
-import os
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-from db_connection import create_connection
-
-FALLBACK_IMAGE = "images/image.png"
+from db_connection import db, executor
+from services.checkout import checkout, cart_total, EmployeeNotFoundError
+from services.order_staging import order_staging, SUBMITTING
+from services.customers import customer_directory, normalize_phone
+from services.menu_search import MenuSearchIndex, MENU_QUERY
+from services.models import Menu, Cart
+from ui.virtual_grid import VirtualCardGrid
+from ui.debounce import Debouncer
+from ui.thumbnails import thumbnails
+
+THUMBNAIL_SIZE = 200
+SEARCH_DEBOUNCE_MS = 150  # wait this long after the last keystroke before filtering
+PHONE_AUTOCOMPLETE_MIN_DIGITS = 3  # start suggesting customers after this many digits
 
 # Use the exact same color scheme as Menu tab
 CARD_BG = "#124035"  # Dark green for CARDS
@@ -16,9 +24,9 @@ BORDER_COLOR = "#444444"  # Grey border color
 class PosTab(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent, bg=BACKGROUND_COLOR)
-        self.menu_items = []
-        self.image_cache = {}
-        self.cart = {}  # {menu_id: {'name':..., 'price':..., 'qty':..., 'menu_id':...}}
+        self.menu = Menu()
+        self.activated = False
+        self.cart = Cart()
 
         # Configure ttk styles
         self.configure_styles()
@@ -32,27 +40,25 @@ class PosTab(tk.Frame):
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(top_frame, textvariable=self.search_var, width=25, style="Custom.TEntry")
         search_entry.pack(side="left", padx=8)
-        self.search_var.trace_add("write", lambda *_: self.populate_menu())
+        self.search_debouncer = Debouncer(self, SEARCH_DEBOUNCE_MS, self.apply_search)
+        self.search_var.trace_add("write", self.search_debouncer)
 
         # Cart button with count
         self.cart_btn = ttk.Button(top_frame, text="🛒 Cart (0)", command=self.show_cart, style="Custom.TButton")
         self.cart_btn.pack(side="right")
 
-        # ===== Scrollable Menu Area =====
-        canvas = tk.Canvas(self, bg=BACKGROUND_COLOR, highlightthickness=0)
-        canvas.pack(side="left", fill="both", expand=True)
-        
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=canvas.yview, style="Custom.Vertical.TScrollbar")
-        scrollbar.pack(side="right", fill="y")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.menu_frame = tk.Frame(canvas, bg=BACKGROUND_COLOR)
-        canvas.create_window((0, 0), window=self.menu_frame, anchor="nw")
-        self.menu_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        # ===== Scrollable Menu Area (virtualized - cards are recycled on scroll) =====
+        self.search_index = MenuSearchIndex()
+        self.card_grid = VirtualCardGrid(self, self.create_card, self.bind_card, columns=3,
+                                         card_height=420, card_padx=40, card_pady=30,
+                                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                                         scrollbar_style="Custom.Vertical.TScrollbar",
+                                         prefetch=self.prefetch_images)
+        self.card_grid.pack(fill="both", expand=True)
+        self.menu_frame = self.card_grid
 
         # Load menu from database
         self.load_menu_from_db()
-        self.populate_menu()
 
     def center_window(self, window):
         """
@@ -155,139 +161,149 @@ class PosTab(tk.Frame):
 
         enforce_theme(self.menu_frame)
 
-    def load_menu_from_db(self):
-        """Load menu items from database"""
-        try:
-            conn = create_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT menu_id, name, image, price, category, status FROM menu ORDER BY category, name")
-            self.menu_items = cursor.fetchall()
-            conn.close()
-        except Exception as e:
+    def on_tab_activated(self):
+        """Called by the tab manager whenever this tab is shown again"""
+        if self.activated:
+            self.load_menu_from_db(redraw_if_unchanged=False)
+        self.activated = True
+        customer_directory.ensure_loaded(self)  # phone autocomplete for the cart window
+
+    def on_tab_deactivated(self):
+        self.search_debouncer.flush()
+
+    def can_evict_tab(self):
+        """Never drop the tab while a cart is being rung up"""
+        return not self.cart
+
+    def load_menu_from_db(self, redraw_if_unchanged=True):
+        """Load menu items from database in the background"""
+        def on_loaded(menu):
+            if menu == self.menu and not redraw_if_unchanged:
+                return  # keep the grid (and its scroll position) as it is
+            self.menu = menu
+            self.populate_menu()
+
+        def on_error(e):
+            self.menu = Menu()
             messagebox.showerror("Database Error", f"Failed to load menu: {str(e)}")
-            self.menu_items = []
+
+        executor.run(self, self._fetch_menu, on_success=on_loaded, on_error=on_error)
+
+    def _fetch_menu(self):
+        """Runs on a worker thread - no Tk calls here"""
+        return Menu.from_rows(db.execute_query(MENU_QUERY, cache=True, dictionary=False, raise_errors=True))
 
     def update_cart_btn(self):
         """Update cart button count"""
-        count = sum(item['qty'] for item in self.cart.values())
-        self.cart_btn.config(text=f"🛒 Cart ({count})")
+        self.cart_btn.config(text=f"🛒 Cart ({self.cart.count})")
 
     def populate_menu(self):
-        """Populate menu area with items - EXACT SAME STRUCTURE AS MENU TAB"""
-        for widget in self.menu_frame.winfo_children():
-            widget.destroy()
-
-        search_text = self.search_var.get().lower()
-        filtered_items = [i for i in self.menu_items if search_text in i[1].lower()]
-
-        current_category = None
-        row_frame = None
-        item_count = 0
-        
-        for menu_id, name, image_path, price, category, status in filtered_items:
-            if category != current_category:
-                current_category = category
-                item_count = 0
-                # Category header - EXACT SAME AS MENU TAB
-                category_label = tk.Label(self.menu_frame, text=category, font=("Arial", 18, "bold"), 
-                        bg=BACKGROUND_COLOR, fg=TEXT_COLOR)
-                category_label.pack(pady=(20, 15), fill="x")
-                
-                row_frame = tk.Frame(self.menu_frame, bg=BACKGROUND_COLOR)
-                row_frame.pack(fill="x", padx=75, pady=60)
-
-            if item_count % 3 == 0:
-                row_frame = tk.Frame(self.menu_frame, bg=BACKGROUND_COLOR)
-                row_frame.pack(fill="x", padx=55, pady=50)
-
-            # Card with EXACT SAME STRUCTURE as Menu tab
-            card = tk.Frame(row_frame, relief="solid", bg=CARD_BG, bd=2, 
-                          highlightbackground=BORDER_COLOR, highlightthickness=1)
-            card.pack(side="left", fill="both", expand=True, padx=55, pady=48)
-            card.configure(width=380, height=420)
-            # MARK AS CARD - EXACT SAME AS MENU TAB
-            setattr(card, "is_card", True)
-
-            # Inner frame - EVERYTHING INSIDE CARD STAYS GREEN
-            inner_frame = tk.Frame(card, bg=CARD_BG, padx=20, pady=20)
-            inner_frame.pack(fill="both", expand=True)
-
-            # Load image
-            if image_path not in self.image_cache:
-                img_path = image_path if os.path.exists(image_path) else FALLBACK_IMAGE
-                try:
-                    img = Image.open(img_path)
-                    img.thumbnail((200, 200))
-                    self.image_cache[image_path] = ImageTk.PhotoImage(img)
-                except:
-                    self.image_cache[image_path] = None
-
-            content_frame = tk.Frame(inner_frame, bg=CARD_BG)
-            content_frame.pack(fill="both", expand=True)
-
-            if self.image_cache.get(image_path):
-                img_label = tk.Label(content_frame, image=self.image_cache[image_path], bg=CARD_BG)
-                img_label.pack(pady=15)
-
-            info_frame = tk.Frame(content_frame, bg=CARD_BG)
-            info_frame.pack(fill="x", pady=25)
-
-            # Name and price - GOLDEN TEXT (INSIDE CARD - STAYS GREEN)
-            tk.Label(info_frame, text=name, font=("Arial", 16, "bold"),
-                    bg=CARD_BG, fg=TEXT_COLOR, wraplength=300).pack(pady=(10, 6))
-            
-            tk.Label(info_frame, text=f"BHD {price:.2f}", font=("Arial", 14, "bold"),
-                    bg=CARD_BG, fg=TEXT_COLOR).pack(pady=(6, 12))
-
-            bottom_frame = tk.Frame(info_frame, bg=CARD_BG)
-            bottom_frame.pack(fill="x", pady=(10, 0))
-
-            # Status badge - INSIDE CARD - STAYS GREEN
-            status_color = "#27ae60" if status.lower() == "available" else "#e74c3c"
-            status_text = "AVAILABLE" if status.lower() == "available" else "UNAVAILABLE"
-            
-            status_label = tk.Label(
-                bottom_frame,
-                text=status_text,
-                bg=status_color,
-                fg="white",
-                font=("Arial", 11, "bold"),
-                padx=22,
-                pady=7,
-                relief="raised",
-                bd=2
-            )
-            status_label.pack(side="left", padx=(0, 15))
-
-            # Add to Cart button (only if available) - INSIDE CARD - STAYS GREEN
-            if status.lower() == "available":
-                ttk.Button(bottom_frame, text="Add to Cart", 
-                          command=lambda mid=menu_id: self.add_to_cart(mid),
-                          style="Custom.TButton").pack(side="right")
-
-            item_count += 1
-
-        # Fill remaining spaces in the last row - EXACT SAME AS MENU TAB
-        remaining_items = item_count % 3
-        if remaining_items > 0 and row_frame:
-            for _ in range(3 - remaining_items):
-                filler = tk.Frame(row_frame, bg=BACKGROUND_COLOR)
-                filler.pack(side="left", fill="both", expand=True, padx=40, pady=40)
+        """Rebuild the search index and hand the items to the grid - EXACT SAME STRUCTURE AS MENU TAB"""
+        self.search_index = MenuSearchIndex(self.menu)
+        self.card_grid.set_items(self.menu)
+        self.apply_search()
 
         # CALL NUCLEAR ROUTINE - EXACT SAME AS MENU TAB
         self.after(200, self._nuclear_force_green_cards)
 
+    def apply_search(self):
+        """Show only the cards matching the current search text"""
+        self.card_grid.filter(self.search_index.search(self.search_var.get()))
+
+    def show_image(self, card, image_path, photo):
+        """Put a thumbnail on a card, unless the card has been recycled for another item"""
+        if card.image_path != image_path:
+            return
+        if photo:
+            card.img_label.configure(image=photo)
+            card.img_label.image = photo  # keep it alive if the cache evicts it
+            card.img_label.pack(pady=15, before=card.info_frame)
+        else:
+            card.img_label.pack_forget()
+
+    def prefetch_images(self, items):
+        """Warm thumbnails for menu rows that are about to scroll into view"""
+        thumbnails.prefetch(self, [item.image for item in items], THUMBNAIL_SIZE)
+
+    def create_card(self, parent):
+        """Build an empty card; the grid fills it through bind_card() and recycles it on scroll"""
+        # Card with EXACT SAME STRUCTURE as Menu tab
+        card = tk.Frame(parent, relief="solid", bg=CARD_BG, bd=2, 
+                      highlightbackground=BORDER_COLOR, highlightthickness=1)
+        # MARK AS CARD - EXACT SAME AS MENU TAB
+        setattr(card, "is_card", True)
+
+        # Inner frame - EVERYTHING INSIDE CARD STAYS GREEN
+        inner_frame = tk.Frame(card, bg=CARD_BG, padx=20, pady=20)
+        inner_frame.pack(fill="both", expand=True)
+
+        content_frame = tk.Frame(inner_frame, bg=CARD_BG)
+        content_frame.pack(fill="both", expand=True)
+
+        card.img_label = tk.Label(content_frame, bg=CARD_BG)
+        card.img_label.pack(pady=15)
+
+        card.info_frame = tk.Frame(content_frame, bg=CARD_BG)
+        card.info_frame.pack(fill="x", pady=25)
+
+        # Name and price - GOLDEN TEXT (INSIDE CARD - STAYS GREEN)
+        card.name_label = tk.Label(card.info_frame, font=("Arial", 16, "bold"),
+                                   bg=CARD_BG, fg=TEXT_COLOR, wraplength=300)
+        card.name_label.pack(pady=(10, 6))
+
+        card.price_label = tk.Label(card.info_frame, font=("Arial", 14, "bold"),
+                                    bg=CARD_BG, fg=TEXT_COLOR)
+        card.price_label.pack(pady=(6, 12))
+
+        bottom_frame = tk.Frame(card.info_frame, bg=CARD_BG)
+        bottom_frame.pack(fill="x", pady=(10, 0))
+
+        # Status badge - INSIDE CARD - STAYS GREEN
+        card.status_label = tk.Label(
+            bottom_frame,
+            fg="white",
+            font=("Arial", 11, "bold"),
+            padx=22,
+            pady=7,
+            relief="raised",
+            bd=2
+        )
+        card.status_label.pack(side="left", padx=(0, 15))
+
+        # Add to Cart button (only shown if available) - INSIDE CARD - STAYS GREEN
+        card.add_btn = ttk.Button(bottom_frame, text="Add to Cart", style="Custom.TButton")
+
+        return card
+
+    def bind_card(self, card, item):
+        """Fill a (possibly recycled) card with one menu row"""
+        menu_id, image_path = item.menu_id, item.image
+
+        # Placeholder first; the real thumbnail is swapped in once it is decoded
+        card.image_path = image_path
+        self.show_image(card, image_path, thumbnails.placeholder(THUMBNAIL_SIZE))
+        thumbnails.request(card, image_path, THUMBNAIL_SIZE,
+                           lambda photo: self.show_image(card, image_path, photo))
+
+        card.name_label.configure(text=item.name)
+        card.price_label.configure(text=f"BHD {item.price:.2f}")
+
+        available = item.status.lower() == "available"
+        card.status_label.configure(text="AVAILABLE" if available else "UNAVAILABLE",
+                                    bg="#27ae60" if available else "#e74c3c")
+
+        if available:
+            card.add_btn.configure(command=lambda: self.add_to_cart(menu_id))
+            card.add_btn.pack(side="right")
+        else:
+            card.add_btn.pack_forget()
+
     def add_to_cart(self, menu_id):
         """Add item to cart"""
-        item = next((i for i in self.menu_items if i[0]==menu_id), None)
+        item = self.menu.get(menu_id)
         if not item:
             return
-        _, name, _, price, _, _ = item
-        if menu_id in self.cart:
-            self.cart[menu_id]['qty'] += 1
-        else:
-            self.cart[menu_id] = {'name': name, 'price': price, 'qty': 1, 'menu_id': menu_id}
-
+        self.cart.add(item)
         self.update_cart_btn()
 
     def show_cart(self):
@@ -313,42 +329,39 @@ class PosTab(tk.Frame):
         total_var = tk.DoubleVar(value=0.0)
 
         def update_total():
-            total = sum(v['price']*v['qty'] for v in self.cart.values())
-            total_var.set(total)
+            total_var.set(self.cart.total)
             self.update_cart_btn()
 
         # Display cart items
-        for menu_id, info in list(self.cart.items()):
+        for line in self.cart.lines():
             frame = tk.Frame(items_frame, bg=CARD_BG, relief="solid", bd=1, padx=10, pady=8)
             frame.pack(fill="x", pady=5)
 
             # Item info - GOLDEN TEXT
-            tk.Label(frame, text=info['name'], bg=CARD_BG, fg=TEXT_COLOR, 
+            tk.Label(frame, text=line.name, bg=CARD_BG, fg=TEXT_COLOR, 
                     font=("Arial", 11, 'bold')).pack(side="left")
             
-            qty_label = tk.Label(frame, text=str(info['qty']), bg=CARD_BG, fg=TEXT_COLOR,
+            qty_label = tk.Label(frame, text=str(line.qty), bg=CARD_BG, fg=TEXT_COLOR,
                                width=3, font=("Arial", 11, 'bold'))
             qty_label.pack(side="left", padx=10)
             
-            tk.Label(frame, text=f"BHD {info['price']*info['qty']:.2f}", 
+            tk.Label(frame, text=f"BHD {line.total:.2f}", 
                     bg=CARD_BG, fg=TEXT_COLOR, font=("Arial", 11)).pack(side="left", padx=5)
 
             # Quantity controls
             btn_frame = tk.Frame(frame, bg=CARD_BG)
             btn_frame.pack(side="right")
 
-            def plus(mid=menu_id, ql=qty_label):
-                self.cart[mid]['qty'] += 1
-                ql.config(text=str(self.cart[mid]['qty']))
+            def plus(mid=line.menu_id, ql=qty_label):
+                ql.config(text=str(self.cart.increment(mid).qty))
                 update_total()
 
-            def minus(mid=menu_id, ql=qty_label):
-                if self.cart[mid]['qty'] > 1:
-                    self.cart[mid]['qty'] -= 1
-                    ql.config(text=str(self.cart[mid]['qty']))
+            def minus(mid=line.menu_id, ql=qty_label, row=frame):
+                remaining = self.cart.decrement(mid)
+                if remaining is None:
+                    row.destroy()
                 else:
-                    del self.cart[mid]
-                    frame.destroy()
+                    ql.config(text=str(remaining.qty))
                 update_total()
 
             ttk.Button(btn_frame, text="+", command=plus, width=3, style="Custom.TButton").pack(side="left", padx=2)
@@ -368,15 +381,24 @@ class PosTab(tk.Frame):
         cust_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
         cust_frame.pack(fill="x", pady=15, padx=20)
 
-        tk.Label(cust_frame, text="Customer Name:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).grid(row=0, column=0, sticky="w", pady=5)
-        customer_name_var = tk.StringVar()
-        ttk.Entry(cust_frame, textvariable=customer_name_var, style="Custom.TEntry").grid(row=0, column=1, sticky="ew", padx=5, pady=5)
-
-        tk.Label(cust_frame, text="Customer Phone:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).grid(row=1, column=0, sticky="w", pady=5)
+        # Phone first: a returning customer's name is filled in from the first digits
+        tk.Label(cust_frame, text="Customer Phone:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).grid(row=0, column=0, sticky="w", pady=5)
         customer_phone_var = tk.StringVar()
-        ttk.Entry(cust_frame, textvariable=customer_phone_var, style="Custom.TEntry").grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+        phone_entry = ttk.Entry(cust_frame, textvariable=customer_phone_var, style="Custom.TEntry")
+        phone_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
+
+        suggestion_var = tk.StringVar()
+        tk.Label(cust_frame, textvariable=suggestion_var, bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                 font=("Arial", 9), anchor="w", justify="left").grid(row=1, column=1, sticky="w", padx=5)
+
+        tk.Label(cust_frame, text="Customer Name:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).grid(row=2, column=0, sticky="w", pady=5)
+        customer_name_var = tk.StringVar()
+        ttk.Entry(cust_frame, textvariable=customer_name_var, style="Custom.TEntry").grid(row=2, column=1, sticky="ew", padx=5, pady=5)
 
         cust_frame.columnconfigure(1, weight=1)
+        self.bind_phone_autocomplete(customer_phone_var, customer_name_var, suggestion_var)
+        customer_directory.ensure_loaded(self)
+        phone_entry.focus_set()
 
         # Payment buttons
         btn_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
@@ -385,17 +407,112 @@ class PosTab(tk.Frame):
         ttk.Button(
             btn_frame,
             text="💳 Pay by Card",
-            command=lambda: self.pay_by_card(win, customer_name_var.get(), customer_phone_var.get(), list(self.cart.values())),
+            command=lambda: self.pay_by_card(win, customer_name_var.get(), customer_phone_var.get(), self.cart.snapshot()),
             style="Custom.TButton"
         ).pack(side="left", padx=8)
         
         ttk.Button(
             btn_frame,
             text="💵 Pay by Cash",
-            command=lambda: self.pay_by_cash(win, customer_name_var.get(), customer_phone_var.get(), list(self.cart.values())),
+            command=lambda: self.pay_by_cash(win, customer_name_var.get(), customer_phone_var.get(), self.cart.snapshot()),
             style="Custom.TButton"
         ).pack(side="left", padx=8)
 
+    def bind_phone_autocomplete(self, phone_var, name_var, suggestion_var):
+        """Fill the name from the customer directory as the phone is typed - no query per keystroke"""
+        autofilled = {"name": None}
+
+        def on_phone_change(*_):
+            digits = normalize_phone(phone_var.get()) or ""
+            matches = customer_directory.complete(digits) if len(digits) >= PHONE_AUTOCOMPLETE_MIN_DIGITS else []
+            # Only replace a name we filled in ourselves, never one the cashier typed
+            can_fill = name_var.get() in ("", autofilled["name"])
+
+            exact = [name for phone, name in matches if normalize_phone(phone) == digits]
+            if exact or len(matches) == 1:
+                name = exact[0] if exact else matches[0][1]
+                if can_fill:
+                    name_var.set(name)
+                    autofilled["name"] = name
+            elif can_fill and autofilled["name"] is not None:
+                name_var.set("")
+                autofilled["name"] = None
+
+            suggestion_var.set("\n".join(f"↳ {phone}  {name}" for phone, name in matches[:3]))
+
+        phone_var.trace_add("write", on_phone_change)
+
+    def _watch_staged_order(self, win, token):
+        """
+        Tie a payment dialog to its staged order: closing the dialog discards
+        the order, and the dialog closes itself if the sweeper reaps the order.
+        While the sale is being written the dialog stays open, so the receipt
+        has somewhere to go.
+        """
+        def on_close():
+            if order_staging.state(token) == SUBMITTING:
+                win.bell()
+                return
+            order_staging.discard(token)
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", on_close)
+
+        def check():
+            try:
+                if not win.winfo_exists():
+                    return
+            except tk.TclError:
+                return
+            if order_staging.was_reaped(token):
+                self._on_order_expired(win)
+            elif order_staging.state(token) is not None:
+                win.after(5000, check)
+
+        win.after(5000, check)
+
+    def _on_order_expired(self, win):
+        """Staged order timed out before payment - nothing was sent to the kitchen"""
+        win.destroy()
+        messagebox.showwarning("Order Expired",
+                               "The payment window was left open too long and the order was not sent.\n"
+                               "The items are still in the cart.")
+
+    def _checkout_staged(self, token, staged, emp_id):
+        """Runs on a worker thread: write the staged sale, then settle its staging entry"""
+        try:
+            sale = checkout(staged.cust_name, staged.cust_phone, staged.cart_items,
+                            staged.payment_method, emp_id)
+        except Exception:
+            order_staging.reopen(token)  # let the cashier fix the input and retry
+            raise
+        order_staging.finish(token)
+        return sale
+
+    def _receipt_window(self, win, title, geometry):
+        """The payment window emptied for the receipt, or a new window if it was closed meanwhile"""
+        try:
+            reuse = win.winfo_exists()
+        except tk.TclError:
+            reuse = False
+        if reuse:
+            for widget in win.winfo_children():
+                widget.destroy()
+        else:
+            win = tk.Toplevel()
+            win.title(title)
+            win.geometry(geometry)
+        win.configure(bg=BACKGROUND_COLOR)
+        self.center_window(win)  # CENTER THE RECEIPT WINDOW
+        return win
+
+    def _on_checkout_failed(self, error):
+        """Report a failed checkout; nothing was written and the cart is kept"""
+        if isinstance(error, EmployeeNotFoundError):
+            messagebox.showerror("Error", "Employee ID not found!")
+        else:
+            messagebox.showerror("Database Error", f"Failed to complete payment: {str(error)}")
+
     def pay_by_card(self, cart_window, cust_name, cust_phone, cart_items):
         """Process card payment - FULL VERSION WITH DATABASE"""
         if not cart_items:
@@ -406,128 +523,105 @@ class PosTab(tk.Frame):
             return
 
         cart_window.destroy()
-        total_price = sum(item['price'] * item['qty'] for item in cart_items)
-
-        conn = create_connection()
-        cursor = conn.cursor()
+        total_price = cart_total(cart_items)
 
-        try:
-            # Create customer
-            cursor.execute("INSERT INTO customer (customer_name, phone) VALUES (%s, %s)", (cust_name, cust_phone))
-            customer_id = cursor.lastrowid
-
-            # Create order with kitchen_status
-            cursor.execute("INSERT INTO orders (customer_id, total_price, order_date, kitchen_status) VALUES (%s, %s, %s, %s)",
-                        (customer_id, total_price, datetime.now(), "Received"))
-            order_id = cursor.lastrowid
-
-            # Insert order items
-            for item in cart_items:
-                cursor.execute("INSERT INTO order_items (order_id, menu_id, qty, price) VALUES (%s, %s, %s, %s)",
-                            (order_id, item['menu_id'], item['qty'], item['price']))
-
-            conn.commit()
-            
-            # Clear cart
-            self.cart.clear()
-            self.update_cart_btn()
-
-            # Card Payment Window
-            win = tk.Toplevel()
-            win.title("Card Payment")
-            win.geometry("500x650")
-            win.configure(bg=BACKGROUND_COLOR)
-            self.center_window(win)  # CENTER THE PAYMENT WINDOW
-
-            # Title - GOLDEN TEXT
-            tk.Label(win, text="💳 Card Payment", font=("Arial", 20, "bold"), 
-                    bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
-
-            # Payment form
-            form_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
-            form_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-            # Card Number
-            tk.Label(form_frame, text="Card Number:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR, 
-                    font=("Arial", 11)).grid(row=0, column=0, sticky="w", pady=8)
-            card_number_var = tk.StringVar()
-            ttk.Entry(form_frame, textvariable=card_number_var, style="Custom.TEntry", 
-                     font=("Arial", 11)).grid(row=0, column=1, sticky="ew", padx=10, pady=8)
-
-            # Cardholder Name
-            tk.Label(form_frame, text="Cardholder Name:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
-                    font=("Arial", 11)).grid(row=1, column=0, sticky="w", pady=8)
-            card_name_var = tk.StringVar()
-            ttk.Entry(form_frame, textvariable=card_name_var, style="Custom.TEntry",
-                     font=("Arial", 11)).grid(row=1, column=1, sticky="ew", padx=10, pady=8)
-
-            # Security Code
-            tk.Label(form_frame, text="Security Code:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
-                    font=("Arial", 11)).grid(row=2, column=0, sticky="w", pady=8)
-            cvv_var = tk.StringVar()
-            ttk.Entry(form_frame, textvariable=cvv_var, style="Custom.TEntry",
-                     font=("Arial", 11)).grid(row=2, column=1, sticky="ew", padx=10, pady=8)
-
-            # Expiry Date
-            tk.Label(form_frame, text="Expiry Date (MM/YY):", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
-                    font=("Arial", 11)).grid(row=3, column=0, sticky="w", pady=8)
-            expiry_var = tk.StringVar()
-            ttk.Entry(form_frame, textvariable=expiry_var, style="Custom.TEntry",
-                     font=("Arial", 11)).grid(row=3, column=1, sticky="ew", padx=10, pady=8)
-
-            # Employee ID
-            tk.Label(form_frame, text="Employee ID:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
-                    font=("Arial", 11)).grid(row=4, column=0, sticky="w", pady=8)
-            emp_id_var = tk.IntVar()
-            ttk.Entry(form_frame, textvariable=emp_id_var, style="Custom.TEntry",
-                     font=("Arial", 11)).grid(row=4, column=1, sticky="ew", padx=10, pady=8)
-
-            form_frame.columnconfigure(1, weight=1)
-
-            # Amount to pay
-            amount_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
-            amount_frame.pack(pady=15)
-            tk.Label(amount_frame, text=f"Amount to Pay: BHD {total_price:.2f}", 
-                    font=("Arial", 16, "bold"), bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack()
-
-            def process_payment():
-                if not all([card_number_var.get(), card_name_var.get(), cvv_var.get(), expiry_var.get(), emp_id_var.get()]):
-                    messagebox.showerror("Error", "Please fill all fields!")
-                    return
+        # Stage the order in memory - nothing is written until payment is confirmed
+        token = order_staging.stage(cust_name, cust_phone, cart_items, "Card")
 
-                # Fetch employee name from employee ID
-                cursor.execute("SELECT name FROM employees WHERE employee_id = %s", (emp_id_var.get(),))
-                result = cursor.fetchone()
-                if not result:
-                    messagebox.showerror("Error", "Employee ID not found!")
-                    return
-                emp_name = result[0]
+        # Card Payment Window
+        win = tk.Toplevel()
+        win.title("Card Payment")
+        win.geometry("500x650")
+        win.configure(bg=BACKGROUND_COLOR)
+        self.center_window(win)  # CENTER THE PAYMENT WINDOW
+        self._watch_staged_order(win, token)
 
-                # Insert into bill
-                cursor.execute("""
-                    INSERT INTO bill (customer_id, order_id, bill_date, payment_method, bill_amount, employee_id, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (customer_id, order_id, datetime.now(), "Card", total_price, emp_id_var.get(), "Paid"))
-                bill_id = cursor.lastrowid
-                conn.commit()
-                conn.close()
+        # Title - GOLDEN TEXT
+        tk.Label(win, text="💳 Card Payment", font=("Arial", 20, "bold"), 
+                bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
+
+        # Payment form
+        form_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
+        form_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Card Number
+        tk.Label(form_frame, text="Card Number:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR, 
+                font=("Arial", 11)).grid(row=0, column=0, sticky="w", pady=8)
+        card_number_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=card_number_var, style="Custom.TEntry", 
+                 font=("Arial", 11)).grid(row=0, column=1, sticky="ew", padx=10, pady=8)
+
+        # Cardholder Name
+        tk.Label(form_frame, text="Cardholder Name:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                font=("Arial", 11)).grid(row=1, column=0, sticky="w", pady=8)
+        card_name_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=card_name_var, style="Custom.TEntry",
+                 font=("Arial", 11)).grid(row=1, column=1, sticky="ew", padx=10, pady=8)
+
+        # Security Code
+        tk.Label(form_frame, text="Security Code:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                font=("Arial", 11)).grid(row=2, column=0, sticky="w", pady=8)
+        cvv_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=cvv_var, style="Custom.TEntry",
+                 font=("Arial", 11)).grid(row=2, column=1, sticky="ew", padx=10, pady=8)
+
+        # Expiry Date
+        tk.Label(form_frame, text="Expiry Date (MM/YY):", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                font=("Arial", 11)).grid(row=3, column=0, sticky="w", pady=8)
+        expiry_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=expiry_var, style="Custom.TEntry",
+                 font=("Arial", 11)).grid(row=3, column=1, sticky="ew", padx=10, pady=8)
+
+        # Employee ID
+        tk.Label(form_frame, text="Employee ID:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                font=("Arial", 11)).grid(row=4, column=0, sticky="w", pady=8)
+        emp_id_var = tk.IntVar()
+        ttk.Entry(form_frame, textvariable=emp_id_var, style="Custom.TEntry",
+                 font=("Arial", 11)).grid(row=4, column=1, sticky="ew", padx=10, pady=8)
+
+        form_frame.columnconfigure(1, weight=1)
+
+        # Amount to pay
+        amount_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
+        amount_frame.pack(pady=15)
+        tk.Label(amount_frame, text=f"Amount to Pay: BHD {total_price:.2f}", 
+                font=("Arial", 16, "bold"), bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack()
+
+        def process_payment():
+            if not all([card_number_var.get(), card_name_var.get(), cvv_var.get(), expiry_var.get(), emp_id_var.get()]):
+                messagebox.showerror("Error", "Please fill all fields!")
+                return
+
+            emp_id = emp_id_var.get()
+
+            staged = order_staging.begin_submit(token)
+            if staged is None:
+                if order_staging.was_reaped(token):
+                    self._on_order_expired(win)
+                return  # already being submitted
+
+            def on_paid(sale):
+                emp_name = sale['employee_name']
+                bill_id = sale['bill_id']
+                order_id = sale['order_id']
+                customer_directory.add(staged.cust_phone, sale['customer_name'])
+
+                # Clear cart
+                self.cart.clear()
+                self.update_cart_btn()
 
                 # Display Receipt
-                for widget in win.winfo_children():
-                    widget.destroy()
+                receipt_win = self._receipt_window(win, "Card Payment", "500x650")
 
-                win.configure(bg=BACKGROUND_COLOR)
-                self.center_window(win)  # CENTER THE RECEIPT WINDOW
-                
                 # Receipt content
-                tk.Label(win, text="🎉 PAYMENT SUCCESSFUL!", font=("Arial", 18, "bold"), 
+                tk.Label(receipt_win, text="🎉 PAYMENT SUCCESSFUL!", font=("Arial", 18, "bold"), 
                         bg=BACKGROUND_COLOR, fg="#27ae60").pack(pady=10)
-                tk.Label(win, text="*** BILL RECEIPT ***", font=("Arial", 14, "bold"), 
+                tk.Label(receipt_win, text="*** BILL RECEIPT ***", font=("Arial", 14, "bold"), 
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=5)
-                
-                receipt_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
+            
+                receipt_frame = tk.Frame(receipt_win, bg=BACKGROUND_COLOR)
                 receipt_frame.pack(fill="both", expand=True, padx=20, pady=10)
-                
+            
                 tk.Label(receipt_frame, text=f"Bill ID: {bill_id}", 
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=("Arial", 11)).pack(anchor="w")
                 tk.Label(receipt_frame, text=f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
@@ -540,9 +634,9 @@ class PosTab(tk.Frame):
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=5)
 
                 for item in cart_items:
-                    item_total = item['qty'] * item['price']
+                    item_total = item.total
                     tk.Label(receipt_frame, 
-                            text=f"{item['name']} x {item['qty']} @ BHD {item['price']:.2f} = BHD {item_total:.2f}",
+                            text=f"{item.name} x {item.qty} @ BHD {item.price:.2f} = BHD {item_total:.2f}",
                             bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=("Arial", 10)).pack(anchor="w")
 
                 tk.Label(receipt_frame, text="─" * 40, 
@@ -554,15 +648,14 @@ class PosTab(tk.Frame):
                 tk.Label(receipt_frame, text=f"Order #{order_id} sent to kitchen! ✅", 
                         font=("Arial", 11, "bold"), bg=BACKGROUND_COLOR, fg="#27ae60").pack(anchor="w", pady=10)
 
-                ttk.Button(win, text="Close", command=win.destroy, style="Custom.TButton").pack(pady=15)
+                ttk.Button(receipt_win, text="Close", command=receipt_win.destroy, style="Custom.TButton").pack(pady=15)
 
-            ttk.Button(win, text="Pay Now", command=process_payment, style="Custom.TButton", 
-                      width=15).pack(pady=20)
+            executor.run(self, self._checkout_staged, token, staged, emp_id,
+                         on_success=on_paid,
+                         on_error=self._on_checkout_failed)
 
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Failed to create order: {str(e)}")
-            conn.rollback()
-            conn.close()
+        ttk.Button(win, text="Pay Now", command=process_payment, style="Custom.TButton", 
+                  width=15).pack(pady=20)
 
     def pay_by_cash(self, cart_window, cust_name, cust_phone, cart_items):
         """Process cash payment - FULL VERSION WITH DATABASE"""
@@ -574,92 +667,69 @@ class PosTab(tk.Frame):
             return
 
         cart_window.destroy()
-        total_price = sum(item['price'] * item['qty'] for item in cart_items)
+        total_price = cart_total(cart_items)
 
-        conn = create_connection()
-        cursor = conn.cursor()
+        # Stage the order in memory - nothing is written until payment is confirmed
+        token = order_staging.stage(cust_name, cust_phone, cart_items, "Cash")
 
-        try:
-            # Create customer
-            cursor.execute("INSERT INTO customer (customer_name, phone) VALUES (%s, %s)", (cust_name, cust_phone))
-            customer_id = cursor.lastrowid
+        # Cash Payment Window
+        win = tk.Toplevel()
+        win.title("Cash Payment")
+        win.geometry("400x400")
+        win.configure(bg=BACKGROUND_COLOR)
+        self.center_window(win)  # CENTER THE PAYMENT WINDOW
+        self._watch_staged_order(win, token)
 
-            # Create order with kitchen_status
-            cursor.execute("INSERT INTO orders (customer_id, total_price, order_date, kitchen_status) VALUES (%s, %s, %s, %s)",
-                        (customer_id, total_price, datetime.now(), "Received"))
-            order_id = cursor.lastrowid
+        # Title - GOLDEN TEXT
+        tk.Label(win, text="💵 Cash Payment", font=("Arial", 18, "bold"), 
+                bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
 
-            # Insert order items
-            for item in cart_items:
-                cursor.execute("INSERT INTO order_items (order_id, menu_id, qty, price) VALUES (%s, %s, %s, %s)",
-                            (order_id, item['menu_id'], item['qty'], item['price']))
+        content_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
+        content_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
-            conn.commit()
-            
-            # Clear cart
-            self.cart.clear()
-            self.update_cart_btn()
+        tk.Label(content_frame, text="Employee ID:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
+                font=("Arial", 11)).pack(anchor="w", pady=8)
+        emp_id_var = tk.IntVar()
+        ttk.Entry(content_frame, textvariable=emp_id_var, style="Custom.TEntry",
+                 font=("Arial", 11)).pack(fill="x", pady=8)
 
-            # Cash Payment Window
-            win = tk.Toplevel()
-            win.title("Cash Payment")
-            win.geometry("400x400")
-            win.configure(bg=BACKGROUND_COLOR)
-            self.center_window(win)  # CENTER THE PAYMENT WINDOW
-
-            # Title - GOLDEN TEXT
-            tk.Label(win, text="💵 Cash Payment", font=("Arial", 18, "bold"), 
-                    bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
-
-            content_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
-            content_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-            tk.Label(content_frame, text="Employee ID:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR,
-                    font=("Arial", 11)).pack(anchor="w", pady=8)
-            emp_id_var = tk.IntVar()
-            ttk.Entry(content_frame, textvariable=emp_id_var, style="Custom.TEntry",
-                     font=("Arial", 11)).pack(fill="x", pady=8)
-
-            tk.Label(content_frame, text=f"Amount to Pay: BHD {total_price:.2f}", 
-                    font=("Arial", 14, "bold"), bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
-
-            def payment_received():
-                if not emp_id_var.get():
-                    messagebox.showerror("Error", "Please enter employee ID!")
-                    return
+        tk.Label(content_frame, text=f"Amount to Pay: BHD {total_price:.2f}", 
+                font=("Arial", 14, "bold"), bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=15)
 
-                # Fetch employee name from employee ID
-                cursor.execute("SELECT name FROM employees WHERE employee_id = %s", (emp_id_var.get(),))
-                result = cursor.fetchone()
-                if not result:
-                    messagebox.showerror("Error", "Employee ID not found!")
-                    return
-                emp_name = result[0]
+        def payment_received():
+            if not emp_id_var.get():
+                messagebox.showerror("Error", "Please enter employee ID!")
+                return
+
+            emp_id = emp_id_var.get()
 
-                # Insert bill
-                cursor.execute("""
-                    INSERT INTO bill (customer_id, order_id, bill_date, payment_method, bill_amount, employee_id, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (customer_id, order_id, datetime.now(), "Cash", total_price, emp_id_var.get(), "Pending"))
-                bill_id = cursor.lastrowid
-                conn.commit()
-                conn.close()
+            staged = order_staging.begin_submit(token)
+            if staged is None:
+                if order_staging.was_reaped(token):
+                    self._on_order_expired(win)
+                return  # already being submitted
+
+            def on_paid(sale):
+                emp_name = sale['employee_name']
+                bill_id = sale['bill_id']
+                order_id = sale['order_id']
+                customer_directory.add(staged.cust_phone, sale['customer_name'])
+
+                # Clear cart
+                self.cart.clear()
+                self.update_cart_btn()
 
                 # Display Receipt
-                for widget in win.winfo_children():
-                    widget.destroy()
+                receipt_win = self._receipt_window(win, "Cash Payment", "400x400")
 
-                win.configure(bg=BACKGROUND_COLOR)
-                self.center_window(win)  # CENTER THE RECEIPT WINDOW
-                
-                tk.Label(win, text="💰 CASH PAYMENT RECEIVED", font=("Arial", 16, "bold"), 
+                tk.Label(receipt_win, text="💰 CASH PAYMENT RECEIVED", font=("Arial", 16, "bold"), 
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=10)
-                tk.Label(win, text="*** BILL RECEIPT ***", font=("Arial", 12, "bold"), 
+                tk.Label(receipt_win, text="*** BILL RECEIPT ***", font=("Arial", 12, "bold"), 
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(pady=5)
-                
-                receipt_frame = tk.Frame(win, bg=BACKGROUND_COLOR)
+            
+                receipt_frame = tk.Frame(receipt_win, bg=BACKGROUND_COLOR)
                 receipt_frame.pack(fill="both", expand=True, padx=20, pady=10)
-                
+            
                 tk.Label(receipt_frame, text=f"Bill ID: {bill_id}", 
                         bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(anchor="w")
                 tk.Label(receipt_frame, text=f"Customer: {cust_name}", 
@@ -673,15 +743,14 @@ class PosTab(tk.Frame):
                 tk.Label(receipt_frame, text=f"Order #{order_id} sent to kitchen! ✅", 
                         font=("Arial", 10, "bold"), bg=BACKGROUND_COLOR, fg="#27ae60").pack(anchor="w", pady=10)
 
-                ttk.Button(win, text="Close", command=win.destroy, style="Custom.TButton").pack(pady=15)
+                ttk.Button(receipt_win, text="Close", command=receipt_win.destroy, style="Custom.TButton").pack(pady=15)
 
-            ttk.Button(win, text="Payment Received", command=payment_received, 
-                      style="Custom.TButton").pack(pady=20)
+            executor.run(self, self._checkout_staged, token, staged, emp_id,
+                         on_success=on_paid,
+                         on_error=self._on_checkout_failed)
 
-        except Exception as e:
-            messagebox.showerror("Database Error", f"Failed to create order: {str(e)}")
-            conn.rollback()
-            conn.close()
+        ttk.Button(win, text="Payment Received", command=payment_received, 
+                  style="Custom.TButton").pack(pady=20)
 
 
 if __name__ == "__main__":
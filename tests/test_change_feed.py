@@ -0,0 +1,69 @@
+"""
+Change feed ordering with two writers that commit out of event_id order.
+
+Runs on a throwaway SQLite file unless DB_BACKEND is already set (point
+it at a MySQL test database to exercise InnoDB's AUTO_INCREMENT, where
+ids are handed out at INSERT time rather than at commit).
+
+    python -m pytest tests
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+if "DB_BACKEND" not in os.environ:
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "feed.sqlite3")
+
+from db_connection import ChangeFeed, get_pool, record_change  # noqa: E402
+
+WRITER_TIMEOUT = 15  # seconds; longer than the SQLite busy timeout
+
+
+class InterleavedWritersTest(unittest.TestCase):
+    def test_event_committed_after_a_later_id_is_not_skipped(self):
+        feed = ChangeFeed(min_interval=0)
+        feed.ensure_table()
+        mark = feed.current_mark()
+        seen, errors = set(), []
+
+        # First writer takes the lower event_id and keeps its transaction open
+        first = get_pool().acquire()
+        first.start_transaction()
+        first_cursor = first.cursor()
+        record_change(first_cursor, "orders", 101)
+
+        def second_writer():
+            try:
+                with get_pool().acquire() as conn:
+                    conn.start_transaction()
+                    cursor = conn.cursor()
+                    record_change(cursor, "orders", 102)
+                    conn.commit()
+                    cursor.close()
+            except Exception as e:
+                errors.append(e)
+
+        second = threading.Thread(target=second_writer)
+        second.start()
+        second.join(0.5)  # without turn-taking it commits the higher id here
+
+        # A reader polls between the two commits and moves its mark on
+        mark, changes = feed.changes_since(mark, ("orders",))
+        seen |= changes.get("orders", set())
+
+        first.commit()
+        first_cursor.close()
+        first.close()
+        second.join(WRITER_TIMEOUT)
+        self.assertFalse(second.is_alive(), "second writer never committed")
+        self.assertEqual(errors, [])
+
+        mark, changes = feed.changes_since(mark, ("orders",))
+        seen |= changes.get("orders", set())
+        self.assertEqual(seen, {101, 102})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+class Debouncer:
+    """
+    Collapse a burst of calls into one: the callback runs `delay_ms` after
+    the last call, on the Tk main loop of `widget`.
+    """
+
+    def __init__(self, widget, delay_ms, callback):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self.callback = callback
+        self._pending = None
+
+    def __call__(self, *_):
+        self.cancel()
+        self._pending = self.widget.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        self.callback()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def flush(self):
+        """Run a pending callback right away"""
+        if self._pending is not None:
+            self.cancel()
+            self.callback()
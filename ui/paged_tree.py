@@ -0,0 +1,128 @@
+from db_connection import executor
+
+
+class PagedTreeview:
+    """
+    Fills a ttk.Treeview a page at a time as the user scrolls.
+
+    The first page is fetched by reload(); whenever the visible part of the
+    tree reaches the last `threshold` of its rows, the next page is fetched
+    in the background and appended. A page shorter than `page_size` means
+    the end was reached. Pages that arrive after a newer reload() are
+    dropped.
+
+      fetch_page(after, limit) -> rows   runs on a worker thread; `after` is
+                                         page_key(last row) or None
+      page_key(row)                      keyset cursor of a row
+      row_values(row)                    tuple shown in the tree
+      row_iid(row)                       tree item id
+      row_tags(position)                 optional tags for the row at that position (striping)
+
+    show_rows() puts a list already in memory in place of the pages, and
+    insert_row()/delete_row() apply single changes without a reload.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, page_key, row_values, row_iid,
+                 page_size=100, threshold=0.9, on_loaded=None, on_error=None, on_page=None, row_tags=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.page_key = page_key
+        self.row_values = row_values
+        self.row_iid = row_iid
+        self.row_tags = row_tags
+        self.page_size = page_size
+        self.threshold = threshold
+        self.on_loaded = on_loaded     # called with the number of rows shown after each page
+        self.on_error = on_error
+        self.on_page = on_page         # called with the rows of each page as it arrives
+        self.row_count = 0
+        self.exhausted = False
+        self._after = None
+        self._loading = False
+        self._generation = 0
+
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self, fetch_page=None):
+        """Clear the tree and start again from the first page (optionally with a new query)"""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        self._generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.tree.yview_moveto(0)
+        self.row_count = 0
+        self.exhausted = False
+        self._after = None
+        self._loading = False
+        self._load_more()
+
+    def show_rows(self, rows):
+        """Show these rows instead of the paged query; nothing more is fetched until reload()"""
+        self._generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.tree.yview_moveto(0)
+        for position, row in enumerate(rows):
+            self._insert(row, "end", position)
+        self.row_count = len(rows)
+        self.exhausted = True
+        self._loading = False
+        if self.on_loaded:
+            self.on_loaded(self.row_count)
+
+    def insert_row(self, row, index="end"):
+        self._insert(row, index, self.row_count if index == "end" else index)
+        self.row_count += 1
+
+    def _insert(self, row, index, position):
+        tags = self.row_tags(position) if self.row_tags else ()
+        self.tree.insert("", index, iid=self.row_iid(row), values=self.row_values(row), tags=tags)
+
+    def delete_row(self, iid):
+        """Remove a row if it is shown; returns whether it was"""
+        if not self.tree.exists(iid):
+            return False
+        self.tree.delete(iid)
+        self.row_count -= 1
+        return True
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= self.threshold:
+            self._load_more()
+
+    def _load_more(self):
+        # Scroll and resize events can arrive before the first reload() supplies a query
+        if self._loading or self.exhausted or self.fetch_page is None:
+            return
+        self._loading = True
+        generation = self._generation
+        executor.run(self.tree, self.fetch_page, self._after, self.page_size,
+                     on_success=lambda rows: self._on_page(generation, rows),
+                     on_error=lambda error: self._on_page_failed(generation, error))
+
+    def _on_page(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._loading = False
+        for offset, row in enumerate(rows):
+            self._insert(row, "end", self.row_count + offset)
+        self.row_count += len(rows)
+        if rows:
+            self._after = self.page_key(rows[-1])
+        self.exhausted = len(rows) < self.page_size
+        if self.on_page:
+            self.on_page(rows)
+        if self.on_loaded:
+            self.on_loaded(self.row_count)
+        # No explicit follow-up fetch: once Tk lays the rows out it reports the
+        # new scroll position, which fetches again if the view is still not full
+
+    def _on_page_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self.on_error:
+            self.on_error(error)
+        else:
+            print(f"❌ Failed to load page: {error}")
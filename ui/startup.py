@@ -0,0 +1,53 @@
+"""
+Startup timing for the front-of-house terminals.
+
+main.py imports this module first, so the clock starts as close to process
+start as Python allows. Phases are recorded with `startup.phase(name)` and
+the report is printed once the first frame has been painted (and appended
+to STARTUP_LOG when that is set, one line per launch, to track launch time
+over releases).
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []   # [(name, seconds)] in the order they finished
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - began)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def elapsed(self):
+        """Seconds since the timer started"""
+        return time.perf_counter() - self.started
+
+    def report(self):
+        lines = ["⏱️ Startup timing"]
+        for name, seconds in self.phases:
+            lines.append(f"   {name:<18}{seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def log_line(self):
+        phases = " ".join(f"{name.replace(' ', '_')}={seconds * 1000:.1f}" for name, seconds in self.phases)
+        return f"{datetime.now().isoformat(timespec='seconds')} {phases}"
+
+    def write_log(self, path):
+        try:
+            with open(path, "a", encoding="utf-8") as log:
+                log.write(self.log_line() + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write startup log {path}: {e}")
+
+
+startup = StartupTimer()
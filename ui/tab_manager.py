@@ -0,0 +1,95 @@
+import collections
+import importlib
+import tkinter as tk
+
+
+def lazy_tab(module_name, class_name):
+    """Tab factory that only imports the tab's module the first time it is built"""
+    def factory(parent):
+        tab_class = getattr(importlib.import_module(module_name), class_name)
+        return tab_class(parent)
+    factory.__name__ = class_name
+    return factory
+
+
+class TabManager:
+    """
+    Keeps tab instances alive between visits.
+
+    Tabs are built lazily the first time they are shown and afterwards only
+    hidden (pack_forget) and shown again, so their loaded data, scroll
+    position and state (e.g. the POS cart) survive a switch.
+
+    Optional hooks on a tab:
+      on_tab_activated()   - called every time the tab is shown
+      on_tab_deactivated() - called when another tab is shown instead
+      can_evict_tab()      - return False to keep the tab alive when the
+                             cap is reached (e.g. a POS cart in progress)
+
+    With max_alive set, the least recently used hidden tabs are destroyed
+    once more than max_alive tabs exist; they are rebuilt on the next visit.
+    """
+
+    def __init__(self, container, factories, max_alive=None):
+        self.container = container
+        self.factories = factories
+        self.max_alive = max_alive or None
+        self._tabs = collections.OrderedDict()   # name -> tab, least recently shown first
+        self.current_name = None
+
+    @property
+    def current(self):
+        return self._tabs.get(self.current_name)
+
+    def show(self, name):
+        """Hide the current tab and show `name`, building it on first use"""
+        if name not in self.factories:
+            raise ValueError(f"Tab '{name}' does not exist")
+        if name == self.current_name and name in self._tabs:
+            return self._tabs[name]
+
+        previous = self.current
+        if previous is not None:
+            self._call_hook(previous, "on_tab_deactivated")
+            previous.pack_forget()
+
+        tab = self._tabs.get(name)
+        if tab is None or not tab.winfo_exists():
+            tab = self.factories[name](self.container)
+            self._tabs[name] = tab
+        self._tabs.move_to_end(name)
+        self.current_name = name
+
+        tab.pack(fill="both", expand=True)
+        self._call_hook(tab, "on_tab_activated")
+        self._evict()
+        return tab
+
+    def alive(self):
+        """Names of the tabs that currently exist, least recently shown first"""
+        return list(self._tabs)
+
+    def _evict(self):
+        if not self.max_alive:
+            return
+        for name in list(self._tabs):
+            if len(self._tabs) <= self.max_alive:
+                break
+            if name == self.current_name:
+                continue
+            tab = self._tabs[name]
+            if hasattr(tab, "can_evict_tab") and not tab.can_evict_tab():
+                continue
+            del self._tabs[name]
+            tab.destroy()
+            print(f"♻️ Closed idle tab {name}")
+
+    @staticmethod
+    def _call_hook(tab, hook):
+        callback = getattr(tab, hook, None)
+        if callback is None:
+            return
+        try:
+            callback()
+        except tk.TclError as e:
+            print(f"⚠️ {type(tab).__name__}.{hook} failed: {e}")
@@ -1,14 +1,10 @@
 import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tabs.dashboard_tab import DashboardTab
-from tabs.bill import BillTab
-from tabs.kitchen_order import KitchenTab
-from tabs.pos import PosTab
-from tabs.menu import MenuTab
-from tabs.manager import ManagerTab
 from ui.theme import apply_theme, COLORS
-from tabs.Reservation import ReservationTab 
+from ui.tab_manager import TabManager, lazy_tab
+from ui.startup import startup
+from config import getenv
 
 class Tabsframe(tk.Frame):
     def __init__(self, parent):
@@ -24,7 +20,8 @@ class Tabsframe(tk.Frame):
             "border": "#333333"     # Dark gray border
         })
         
-        apply_theme(self.parent)
+        with startup.phase("theme"):
+            apply_theme(self.parent)
         self.configure(bg=COLORS["bg"])
         
         # Initialize current tab tracking
@@ -33,7 +30,8 @@ class Tabsframe(tk.Frame):
         
         self._setup_navbar()
         self._setup_content_area()
-        self.show_tab("Dashboard")
+        with startup.phase("first tab"):
+            self.show_tab("Dashboard")
 
     def _setup_navbar(self):
         """Setup the navigation bar with logo, tabs, and user info"""
@@ -72,14 +70,15 @@ class Tabsframe(tk.Frame):
         center_frame = tk.Frame(self.navbar, bg=COLORS["bg"])
         center_frame.pack(side="left", padx=60)
 
+        # Tab modules (and PIL / the database layer they pull in) are imported on first visit
         self.tabs = {
-            "Dashboard": DashboardTab,
-            "Menu": MenuTab,
-            "POS": PosTab,
-            "Kitchen": KitchenTab,
-            "Reservation": ReservationTab,
-            "Bill": BillTab,
-            "Manager": ManagerTab
+            "Dashboard": lazy_tab("tabs.dashboard_tab", "DashboardTab"),
+            "Menu": lazy_tab("tabs.menu", "MenuTab"),
+            "POS": lazy_tab("tabs.pos", "PosTab"),
+            "Kitchen": lazy_tab("tabs.kitchen_order", "KitchenTab"),
+            "Reservation": lazy_tab("tabs.Reservation", "ReservationTab"),
+            "Bill": lazy_tab("tabs.bill", "BillTab"),
+            "Manager": lazy_tab("tabs.manager", "ManagerTab")
         }
 
         self.buttons = {}
@@ -111,23 +110,19 @@ class Tabsframe(tk.Frame):
         self.container = tk.Frame(self, bg=COLORS["bg"])
         self.container.pack(fill="both", expand=True, padx=20, pady=20)
 
+        # Tabs are built on first visit and then kept alive; TAB_CACHE_LIMIT caps how many
+        self.tab_manager = TabManager(self.container, self.tabs,
+                                      max_alive=int(getenv("TAB_CACHE_LIMIT", 0)))
+
     def show_tab(self, tab_name):
         """Switch to the specified tab"""
         if tab_name not in self.tabs:
             raise ValueError(f"Tab '{tab_name}' does not exist")
         
-        if self.current_tab:
-            self.current_tab.destroy()
-        
-        tab_class = self.tabs[tab_name]
-        self.current_tab = tab_class(self.container)
-        self.current_tab.pack(fill="both", expand=True)
+        self.current_tab = self.tab_manager.show(tab_name)
         
         self._update_button_styles(tab_name)
         self.active_tab = tab_name
-        
-        if hasattr(self.current_tab, 'on_tab_activated'):
-            self.current_tab.on_tab_activated()
 
     def _update_button_styles(self, active_tab_name):
         """Update the visual style of tab buttons to show active state"""
@@ -0,0 +1,224 @@
+"""
+Process-wide thumbnail cache for menu images.
+
+Menu and POS cards used to re-open the full-size photo and resize it every
+time a tab was built. Thumbnails now come from two cache levels:
+
+- on disk: every size in THUMBNAIL_SIZES is written once as a small PNG
+  under THUMBNAIL_CACHE_DIR, keyed by source path + mtime + file size, so
+  replacing an image (the Menu tab's edit dialog) invalidates it
+  automatically;
+- in memory: a bounded LRU of ready-to-use PhotoImage objects shared by
+  every tab.
+
+Decoding and resizing run on a small thread pool. request() hands cards a
+placeholder right away and delivers the real PhotoImage through after()
+once it is ready; prefetch() warms the cache for cards that are about to
+scroll into view.
+"""
+import collections
+import hashlib
+import os
+import threading
+import tkinter as tk
+from PIL import Image, ImageTk
+from config import getenv
+from db_connection import QueryExecutor
+
+FALLBACK_IMAGE = "images/image.png"
+THUMBNAIL_SIZES = (180, 200)   # Menu cards, POS cards
+THUMBNAIL_CACHE_DIR = getenv("THUMBNAIL_CACHE_DIR", ".thumbnails")
+
+
+def _source_key(image_path):
+    """(path, mtime, size) of the image that will actually be shown, or None"""
+    for path in (image_path, FALLBACK_IMAGE):
+        if not path:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+    return None
+
+
+def _disk_path(source_key, size):
+    path, mtime, file_size = source_key
+    digest = hashlib.sha1(f"{path}|{mtime}|{file_size}|{size}".encode("utf-8")).hexdigest()
+    return os.path.join(THUMBNAIL_CACHE_DIR, f"{digest}_{size}.png")
+
+
+def _write_variants(source_key):
+    """Decode the source once and store every thumbnail size on disk"""
+    with Image.open(source_key[0]) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+        variants = {}
+        for size in THUMBNAIL_SIZES:
+            thumb = img.copy()
+            thumb.thumbnail((size, size))
+            dest = _disk_path(source_key, size)
+            tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                thumb.save(tmp, "PNG")
+                os.replace(tmp, dest)
+            except OSError as e:
+                # A read-only cache dir only costs us the disk level
+                print(f"⚠️ Could not cache thumbnail {dest}: {e}")
+            variants[size] = thumb
+        return variants
+
+
+def load_thumbnail(image_path, size):
+    """
+    Return a resized PIL image for image_path (falling back to FALLBACK_IMAGE),
+    or None if neither can be read. Safe to call from worker threads.
+    """
+    source_key = _source_key(image_path)
+    if source_key is None:
+        return None
+
+    cached = _disk_path(source_key, size)
+    try:
+        with Image.open(cached) as img:
+            img.load()
+            return img
+    except OSError:
+        pass
+
+    try:
+        variants = _write_variants(source_key)
+    except OSError as e:
+        print(f"⚠️ Could not load image {source_key[0]}: {e}")
+        return None
+    if size in variants:
+        return variants[size]
+
+    # Size outside THUMBNAIL_SIZES: resize on the fly, without persisting it
+    with Image.open(source_key[0]) as img:
+        img.thumbnail((size, size))
+        return img.copy()
+
+
+class ThumbnailCache:
+    """Bounded LRU of PhotoImage thumbnails shared by all tabs"""
+
+    def __init__(self, max_items=256, workers=2):
+        self.max_items = max_items
+        self._photos = collections.OrderedDict()   # (source_key, size) -> PhotoImage
+        self._pending = {}                          # (source_key, size) -> [callback]
+        self._placeholders = {}                     # size -> blank PhotoImage
+        self._decoder = QueryExecutor(max_workers=workers, thread_name_prefix="thumb-decoder")
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "decoded": 0, "failed": 0}
+
+    def get(self, image_path, size):
+        """
+        PhotoImage for image_path at the given size, or None if the image
+        cannot be loaded. Must be called on the Tk main thread.
+        """
+        source_key = _source_key(image_path)
+        if source_key is None:
+            return None
+
+        key = (source_key, size)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            self._stats["hits"] += 1
+            return photo
+
+        self._stats["misses"] += 1
+        img = load_thumbnail(image_path, size)
+        if img is None:
+            return None
+        return self._store(key, ImageTk.PhotoImage(img))
+
+    def request(self, widget, image_path, size, callback=None):
+        """
+        Deliver the thumbnail to callback(photo) on the Tk main loop.
+
+        Cached thumbnails (and missing images, as None) are delivered
+        immediately; anything else is decoded on a worker thread and
+        delivered through widget.after() when ready. Concurrent requests
+        for the same image share one decode.
+        """
+        source_key = _source_key(image_path)
+        if source_key is None:
+            if callback:
+                callback(None)
+            return
+
+        key = (source_key, size)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            self._stats["hits"] += 1
+            if callback:
+                callback(photo)
+            return
+
+        waiters = self._pending.get(key)
+        if waiters is not None:
+            if callback:
+                waiters.append(callback)
+            return
+
+        self._stats["misses"] += 1
+        self._pending[key] = [callback] if callback else []
+        # Poll from the toplevel: cards can be recycled or destroyed while we wait
+        self._decoder.run(widget.winfo_toplevel(), load_thumbnail, image_path, size,
+                          on_success=lambda img: self._on_decoded(key, img),
+                          on_error=lambda e: self._on_decoded(key, None, e))
+
+    def prefetch(self, widget, image_paths, size):
+        """Decode thumbnails in the background so later request()/get() calls hit the cache"""
+        for image_path in image_paths:
+            self.request(widget, image_path, size)
+
+    def placeholder(self, size):
+        """Blank square shown while a thumbnail is still decoding"""
+        if size not in self._placeholders:
+            self._placeholders[size] = tk.PhotoImage(width=size, height=size)
+        return self._placeholders[size]
+
+    def _on_decoded(self, key, img, error=None):
+        photo = None
+        if img is not None:
+            photo = self._store(key, ImageTk.PhotoImage(img))
+            self._stats["decoded"] += 1
+        else:
+            self._stats["failed"] += 1
+            if error is not None:
+                print(f"⚠️ Thumbnail decode failed for {key[0][0]}: {error}")
+        for callback in self._pending.pop(key, ()):
+            try:
+                callback(photo)
+            except tk.TclError:
+                pass  # the card went away while we were decoding
+
+    def _store(self, key, photo):
+        self._photos[key] = photo
+        self._photos.move_to_end(key)
+        while len(self._photos) > self.max_items:
+            self._photos.popitem(last=False)
+            self._stats["evictions"] += 1
+        return photo
+
+    def clear(self):
+        self._photos.clear()
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["cached"] = len(self._photos)
+        stats["pending"] = len(self._pending)
+        return stats
+
+
+# Shared by the Menu and POS tabs
+thumbnails = ThumbnailCache(
+    max_items=int(getenv("THUMBNAIL_CACHE_SIZE", 256)),
+    workers=int(getenv("THUMBNAIL_WORKERS", 2)),
+)
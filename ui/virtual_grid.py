@@ -0,0 +1,200 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualCardGrid(tk.Frame):
+    """
+    Scrollable, category-grouped grid of menu cards that only renders what
+    is on screen.
+
+    The grid is laid out as a list of fixed-height rows (a category header
+    or up to `columns` cards). Only rows that intersect the canvas viewport,
+    plus `overscan_rows` above and below, have widgets. Widgets scrolled out
+    of view go back to a pool and are re-bound to whichever item scrolls in
+    next, so the widget count stays at roughly one screenful no matter how
+    big the menu is.
+
+    The owning tab supplies two callbacks:
+      create_card(parent) -> card widget with empty content
+      bind_card(card, item) -> fill an existing card with a menu row
+    and optionally prefetch(items), called with the items just below the
+    viewport (the rest of the current category and the whole next one) so
+    their images can be warmed before they scroll into view.
+    """
+
+    def __init__(self, parent, create_card, bind_card, columns=3, card_height=400,
+                 card_padx=30, card_pady=24, header_height=70, overscan_rows=1,
+                 bg="#23170e", fg="#ebcd95", header_font=("Arial", 18, "bold"),
+                 scrollbar_style=None, prefetch=None):
+        super().__init__(parent, bg=bg)
+        self.create_card = create_card
+        self.bind_card = bind_card
+        self.prefetch = prefetch
+        self.columns = columns
+        self.card_height = card_height
+        self.card_padx = card_padx
+        self.card_pady = card_pady
+        self.row_height = card_height + 2 * card_pady
+        self.header_height = header_height
+        self.overscan_rows = overscan_rows
+        self.bg = bg
+        self.fg = fg
+        self.header_font = header_font
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        scrollbar_options = {"style": scrollbar_style} if scrollbar_style else {}
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview, **scrollbar_options)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.configure(yscrollcommand=self._on_yview)
+        self.canvas.bind("<Configure>", self._on_resize)
+
+        self._sections = []        # [(category, [items])] in display order
+        self._visible_ids = None   # None = no filter
+        self._rows = []            # ("header", category) or ("cards", [items])
+        self._offsets = []         # top y of each row, ascending
+        self._active = {}          # row index -> [(kind, widget, window_id)]
+        self._free = {"header": [], "card": []}   # recycled (widget, window_id)
+        self._width = 1
+        self._render_pending = False
+        self._prefetched_from = None   # first row index last handed to prefetch()
+
+    # --- data ---
+    def set_items(self, menu):
+        """Replace the grid contents with a Menu, one section per category"""
+        self._sections = list(menu.by_category.items())
+        self._relayout()
+
+    def filter(self, visible_ids):
+        """Show only items whose menu_id is in visible_ids (None shows everything)"""
+        self._visible_ids = visible_ids
+        self.canvas.yview_moveto(0)
+        self._relayout()
+
+    def visible_items(self):
+        """Items currently bound to on-screen cards"""
+        return [item for index in sorted(self._active)
+                if self._rows[index][0] == "cards"
+                for item in self._rows[index][1]]
+
+    def refresh(self):
+        """Re-bind every on-screen card, e.g. after its images became available"""
+        for index in list(self._active):
+            self._release_row(index)
+        self._render()
+
+    # --- layout ---
+    def _relayout(self):
+        rows, offsets, y = [], [], 0
+        for category, items in self._sections:
+            shown = items if self._visible_ids is None else [i for i in items if i.menu_id in self._visible_ids]
+            if not shown:
+                continue
+            rows.append(("header", category))
+            offsets.append(y)
+            y += self.header_height
+            for start in range(0, len(shown), self.columns):
+                rows.append(("cards", shown[start:start + self.columns]))
+                offsets.append(y)
+                y += self.row_height
+
+        for index in list(self._active):
+            self._release_row(index)
+        self._rows, self._offsets = rows, offsets
+        self._prefetched_from = None
+        self.canvas.configure(scrollregion=(0, 0, self._width, y))
+        self._render()
+
+    def _on_resize(self, event):
+        if event.width != self._width:
+            self._width = event.width
+            self._relayout()
+        else:
+            self._schedule_render()
+
+    def _on_yview(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        """Bind widgets to the rows in (or near) the viewport and recycle the rest"""
+        self._render_pending = False
+        if not self._rows:
+            return
+
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        overscan = self.overscan_rows * self.row_height
+        first = max(0, bisect.bisect_right(self._offsets, top - overscan) - 1)
+        last = bisect.bisect_left(self._offsets, bottom + overscan)
+
+        for index in [i for i in self._active if i < first or i >= last]:
+            self._release_row(index)
+        for index in range(first, last):
+            if index not in self._active:
+                self._place_row(index)
+
+        if self.prefetch and last != self._prefetched_from:
+            self._prefetched_from = last
+            upcoming = self._upcoming_items(last)
+            if upcoming:
+                self.prefetch(upcoming)
+
+    def _upcoming_items(self, start):
+        """Items from row `start` through the end of the next category"""
+        items, headers = [], 0
+        for kind, payload in self._rows[start:]:
+            if kind == "header":
+                headers += 1
+                if headers > 1:
+                    break
+            else:
+                items.extend(payload)
+        return items
+
+    # --- widget pool ---
+    def _acquire(self, kind):
+        if self._free[kind]:
+            return self._free[kind].pop()
+        if kind == "header":
+            widget = tk.Label(self.canvas, font=self.header_font, bg=self.bg, fg=self.fg)
+        else:
+            widget = self.create_card(self.canvas)
+        window_id = self.canvas.create_window(0, 0, window=widget, anchor="nw", state="hidden")
+        return widget, window_id
+
+    def _place_row(self, index):
+        kind, payload = self._rows[index]
+        y = self._offsets[index]
+        placed = []
+
+        if kind == "header":
+            label, window_id = self._acquire("header")
+            label.configure(text=payload)
+            self.canvas.coords(window_id, 0, y)
+            self.canvas.itemconfigure(window_id, state="normal", width=self._width, height=self.header_height)
+            placed.append(("header", label, window_id))
+        else:
+            column_width = self._width / self.columns
+            for column, item in enumerate(payload):
+                card, window_id = self._acquire("card")
+                self.bind_card(card, item)
+                self.canvas.coords(window_id, column * column_width + self.card_padx, y + self.card_pady)
+                self.canvas.itemconfigure(window_id, state="normal",
+                                          width=max(1, column_width - 2 * self.card_padx),
+                                          height=self.card_height)
+                placed.append(("card", card, window_id))
+
+        self._active[index] = placed
+
+    def _release_row(self, index):
+        for kind, widget, window_id in self._active.pop(index, ()):
+            self.canvas.itemconfigure(window_id, state="hidden")
+            self._free[kind].append((widget, window_id))